@@ -0,0 +1,121 @@
+"""
+Benchmark do motor analítico (motor_analitico).
+
+Gera um DataFrame sintético de movimentações com os mesmos tipos do snapshot do
+dashboard e calcula os nós agregados do grafo de métricas (custos por tipo, saídas
+por categoria, agregados e faturamento mensais) para o último ano e para todo o
+histórico, no pandas e no DuckDB, conferindo se os resultados são iguais.
+
+Uso (a partir da pasta projeto):
+    python benchmarks/agregacoes_duckdb.py                               # 10 milhões de linhas
+    python benchmarks/agregacoes_duckdb.py --linhas 1000000 --threads 4
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from indices_analiticos import CATEGORIAS, TIPOS_CUSTO
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Nós do grafo calculados por agrupar_somas
+NOS_MEDIDOS = ['custos_tipo', 'agregados_categoria', 'agregados_mensais', 'faturamento_mensal']
+
+# Linhas geradas por lote (os lotes passam pelo mesmo carregador do dashboard)
+LOTE_GERACAO = 1_000_000
+
+
+def gerar_lotes(linhas, seed=42):
+    """Lotes de movimentações sintéticas distribuídas ao longo de cinco anos"""
+    aleatorio = np.random.default_rng(seed)
+    inicio = np.datetime64('2020-01-01')
+    naturezas = np.array([f"{n:05d}" for n in range(1, 401)], dtype=object)
+    historicos = np.array([f'Lançamento sintético {n}' for n in range(1000)], dtype=object)
+
+    for deslocamento in range(0, linhas, LOTE_GERACAO):
+        tamanho = min(LOTE_GERACAO, linhas - deslocamento)
+        eh_entrada = (np.arange(deslocamento, deslocamento + tamanho) % 4) == 0
+        valores = aleatorio.uniform(0, 5000, tamanho).round(2)
+        yield pd.DataFrame({
+            'data': inicio + aleatorio.integers(0, 5 * 365, tamanho).astype('timedelta64[D]'),
+            'filial': aleatorio.integers(1, 6, tamanho).astype(str).astype(object),
+            'natureza': naturezas[aleatorio.integers(0, len(naturezas), tamanho)],
+            'nome_natureza': 'Natureza sintética',
+            'categoria': np.array(CATEGORIAS, dtype=object)[aleatorio.integers(0, len(CATEGORIAS), tamanho)],
+            'tipo_custo': np.array(TIPOS_CUSTO, dtype=object)[aleatorio.integers(0, len(TIPOS_CUSTO), tamanho)],
+            'entrada': np.where(eh_entrada, valores, 0.0),
+            'saida': np.where(eh_entrada, 0.0, valores),
+            'historico': historicos[aleatorio.integers(0, len(historicos), tamanho)]
+        })
+
+def medir(df, periodo, repeticoes):
+    """Mediana do tempo (ms) de cada nó e os resultados da última execução"""
+    from grafo_metricas import GrafoMetricas
+
+    tempos = {no: [] for no in NOS_MEDIDOS}
+    resultados = {}
+    for _ in range(repeticoes):
+        grafo = GrafoMetricas(df, pd.DataFrame(), pd.DataFrame(), *periodo)
+        # O recorte do período é o mesmo nos dois motores e fica fora da medição
+        grafo.obter('periodo')
+        for no in NOS_MEDIDOS:
+            inicio = time.perf_counter()
+            resultados[no] = grafo.obter(no)
+            tempos[no].append((time.perf_counter() - inicio) * 1000)
+    return {no: statistics.median(valores) for no, valores in tempos.items()}, resultados
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=10_000_000, help='Quantidade de movimentações sintéticas')
+    parser.add_argument('--repeticoes', type=int, default=3, help='Execuções de cada nó')
+    parser.add_argument('--threads', type=int, default=os.cpu_count() or 1, help='Threads do DuckDB')
+    args = parser.parse_args()
+
+    os.environ['DUCKDB_THREADS'] = str(args.threads)
+    sys.path.append(os.path.join(RAIZ, 'src'))
+    import motor_analitico
+    from dados_financeiros import create_movimentacoes_df
+
+    if not motor_analitico.DUCKDB_DISPONIVEL:
+        print("⚠️ DuckDB não instalado (pip install duckdb): apenas o pandas pode ser medido")
+        return
+
+    print(f"Gerando {args.linhas:,} movimentações sintéticas...")
+    df = create_movimentacoes_df(gerar_lotes(args.linhas))
+    print(f"DataFrame: {df.memory_usage(deep=False).sum() / 2**20:,.0f} MB · DuckDB com {args.threads} thread(s)")
+
+    periodos = {
+        'Último ano': (date(2024, 1, 1), date(2024, 12, 31)),
+        'Histórico completo': (date(2020, 1, 1), date(2024, 12, 31))
+    }
+
+    print()
+    print(f"{'Recorte':<20} {'Nó':<22} {'pandas (ms)':>12} {'DuckDB (ms)':>12} {'Ganho':>7}")
+    for nome, periodo in periodos.items():
+        motor_analitico.MOTOR_ANALITICO = 'pandas'
+        tempos_pandas, resultados_pandas = medir(df, periodo, args.repeticoes)
+        motor_analitico.MOTOR_ANALITICO = 'duckdb'
+        tempos_duckdb, resultados_duckdb = medir(df, periodo, args.repeticoes)
+
+        for no in NOS_MEDIDOS:
+            pd.testing.assert_frame_equal(resultados_pandas[no].reset_index(drop=True),
+                                          resultados_duckdb[no].reset_index(drop=True), check_exact=False)
+            ganho = tempos_pandas[no] / tempos_duckdb[no]
+            print(f"{nome:<20} {no:<22} {tempos_pandas[no]:>12.1f} {tempos_duckdb[no]:>12.1f} {ganho:>6.1f}x")
+
+        total_pandas = sum(tempos_pandas.values())
+        total_duckdb = sum(tempos_duckdb.values())
+        print(f"{nome:<20} {'Total':<22} {total_pandas:>12.1f} {total_duckdb:>12.1f} "
+              f"{total_pandas / total_duckdb:>6.1f}x")
+
+    print()
+    print("Resultados idênticos nos dois motores.")
+
+if __name__ == "__main__":
+    main()
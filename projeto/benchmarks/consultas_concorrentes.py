@@ -0,0 +1,126 @@
+"""
+Benchmark da camada assíncrona (database_async).
+
+Executa um conjunto de consultas independentes do dashboard (limites de datas,
+filiais, versão dos dados e os indicadores de cada mês do último ano) primeiro em
+sequência, na sessão de leitura síncrona, e depois ao mesmo tempo com
+executar_em_paralelo, comparando o tempo total com o da consulta mais lenta.
+
+Uso (a partir da pasta projeto):
+    python benchmarks/consultas_concorrentes.py                 # banco de DATABASE_URL
+    python benchmarks/consultas_concorrentes.py --linhas 500000 # banco sintético temporário
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from dateutil.relativedelta import relativedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def montar_consultas(limites):
+    """Consultas independentes: uma por indicador mensal do último ano, mais as de apoio"""
+    from consultas import limites_datas, listar_filiais, resumo_kpis
+    from dados_financeiros import versao_dados
+
+    consultas = {
+        'limites': (limites_datas,),
+        'filiais': (listar_filiais,),
+        'versao': (versao_dados,)
+    }
+    fim = limites[1]
+    for meses_atras in range(12):
+        inicio_mes = (fim - relativedelta(months=meses_atras)).replace(day=1)
+        fim_mes = inicio_mes + relativedelta(months=1, days=-1)
+        consultas[f'kpis_{inicio_mes:%Y_%m}'] = (resumo_kpis, {'mes': (inicio_mes, fim_mes)})
+    return consultas
+
+def medir_sequencial(consultas):
+    """Tempo de cada consulta executada sozinha e tempo total em sequência (ms)"""
+    from database import get_db_leitura
+
+    tempos = {}
+    db = get_db_leitura()
+    try:
+        inicio_total = time.perf_counter()
+        for nome, (funcao, *args) in consultas.items():
+            inicio = time.perf_counter()
+            funcao(db, *args)
+            tempos[nome] = (time.perf_counter() - inicio) * 1000
+        total = (time.perf_counter() - inicio_total) * 1000
+    finally:
+        db.close()
+    return tempos, total
+
+def medir_concorrente(consultas):
+    """Tempo total das consultas executadas ao mesmo tempo (ms)"""
+    from database_async import executar_em_paralelo
+
+    inicio = time.perf_counter()
+    executar_em_paralelo(consultas)
+    return (time.perf_counter() - inicio) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=0,
+                        help='Gera um banco sintético com esta quantidade de movimentações')
+    parser.add_argument('--repeticoes', type=int, default=5, help='Execuções de cada modo')
+    args = parser.parse_args()
+
+    pasta = None
+    if args.linhas:
+        from indices_analiticos import aplicar_migracao, criar_banco, popular
+
+        pasta = tempfile.TemporaryDirectory()
+        conn = criar_banco(os.path.join(pasta.name, 'benchmark.db'))
+        print(f"Gerando {args.linhas:,} movimentações sintéticas...")
+        popular(conn, args.linhas)
+        conn.close()
+        aplicar_migracao()
+
+    sys.path.append(os.path.join(RAIZ, 'src'))
+    from database import get_db_leitura
+    import database_async
+    from consultas import limites_datas
+
+    db = get_db_leitura()
+    try:
+        limites = limites_datas(db)
+    finally:
+        db.close()
+    if limites is None:
+        print("Banco sem dados: importe os dados ou use --linhas")
+        return
+
+    consultas = montar_consultas(limites)
+    if not database_async.ASYNC_DISPONIVEL:
+        print(f"⚠️ Driver {database_async.DRIVER_ASYNC} não instalado: executar_em_paralelo roda em sequência")
+    elif not database_async.CONSULTAS_CONCORRENTES:
+        print(f"ℹ️ SQLite com {os.cpu_count()} núcleo(s): o dashboard executa as consultas em sequência; "
+              "o benchmark força a execução concorrente")
+        database_async.CONSULTAS_CONCORRENTES = True
+
+    # Primeira execução de cada modo aquece os pools de conexões
+    medir_sequencial(consultas)
+    medir_concorrente(consultas)
+
+    medicoes = [medir_sequencial(consultas) for _ in range(args.repeticoes)]
+    sequencial = statistics.median(total for _, total in medicoes)
+    mais_lenta = statistics.median(max(tempos.values()) for tempos, _ in medicoes)
+    concorrente = statistics.median(medir_concorrente(consultas) for _ in range(args.repeticoes))
+
+    print()
+    print(f"Consultas independentes:   {len(consultas)}")
+    print(f"Em sequência (soma):       {sequencial:9.2f} ms")
+    print(f"Consulta mais lenta:       {mais_lenta:9.2f} ms")
+    print(f"Concorrentes (gather):     {concorrente:9.2f} ms  ({sequencial / concorrente:.1f}x)")
+
+    if pasta is not None:
+        pasta.cleanup()
+
+if __name__ == "__main__":
+    main()
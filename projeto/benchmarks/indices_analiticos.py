@@ -0,0 +1,172 @@
+"""
+Benchmark dos índices analíticos (migração 0001).
+
+Cria um banco SQLite temporário com dados sintéticos, sem índices secundários,
+mede as consultas típicas do dashboard, aplica a migração com o Alembic e mede
+novamente, exibindo o plano de execução (EXPLAIN QUERY PLAN) antes e depois.
+
+Uso (a partir da pasta projeto):
+    python benchmarks/indices_analiticos.py --linhas 500000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Consultas representativas dos recortes do dashboard e do explorador de lançamentos
+CONSULTAS = {
+    'Período': (
+        "SELECT SUM(entrada), SUM(saida) FROM movimentacoes WHERE data BETWEEN :inicio AND :fim",
+    ),
+    'Categoria + período': (
+        "SELECT COUNT(*), SUM(saida) FROM movimentacoes "
+        "WHERE categoria = :categoria AND data BETWEEN :inicio AND :fim",
+    ),
+    'Tipo de custo + período': (
+        "SELECT COUNT(*), SUM(saida) FROM movimentacoes "
+        "WHERE tipo_custo = :tipo_custo AND data BETWEEN :inicio AND :fim",
+    ),
+    'Natureza': (
+        "SELECT COUNT(*), SUM(saida) FROM movimentacoes WHERE natureza = :natureza",
+    ),
+    'Entidade': (
+        "SELECT COUNT(*), SUM(saida) FROM movimentacoes WHERE entidade = :entidade",
+    ),
+    'Faturas por mês de referência': (
+        "SELECT SUM(valor) FROM faturas WHERE mes_referencia BETWEEN :inicio AND :fim",
+    ),
+    'Despesas por período': (
+        "SELECT SUM(valor) FROM despesas WHERE data_despesa BETWEEN :inicio AND :fim",
+    ),
+}
+
+CATEGORIAS = ['Receitas', 'Despesas Operacionais', 'Despesas Administrativas', 'Impostos', 'Pessoal']
+TIPOS_CUSTO = ['Fixo', 'Variável', 'Não classificado']
+
+
+def criar_banco(caminho):
+    """Cria as tabelas pelo modelo e remove os índices secundários (estado anterior à migração)"""
+    os.environ['DATABASE_URL'] = f'sqlite:///{caminho}'
+    sys.path.append(RAIZ)
+    from sqlalchemy import create_engine
+    from src.models import Base
+
+    engine = create_engine(os.environ['DATABASE_URL'])
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    conn = sqlite3.connect(caminho)
+    indices = conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'ix_%'").fetchall()
+    for (nome,) in indices:
+        conn.execute(f'DROP INDEX "{nome}"')
+    conn.commit()
+    return conn
+
+def popular(conn, linhas, seed=42):
+    """Insere movimentações, despesas e faturas sintéticas distribuídas ao longo de cinco anos"""
+    aleatorio = random.Random(seed)
+    inicio = date(2020, 1, 1)
+    dias = 5 * 365
+
+    def data_aleatoria():
+        return (inicio + timedelta(days=aleatorio.randrange(dias))).isoformat()
+
+    conn.executemany(
+        "INSERT INTO movimentacoes (filial, data, natureza, nome_natureza, entrada, saida, historico, "
+        "categoria, tipo_custo, entidade) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            (
+                str(aleatorio.randint(1, 5)),
+                data_aleatoria(),
+                f"{aleatorio.randint(1, 400):05d}",
+                'Natureza sintética',
+                round(aleatorio.uniform(0, 5000), 2) if i % 4 == 0 else 0.0,
+                round(aleatorio.uniform(0, 3000), 2) if i % 4 else 0.0,
+                f'Lançamento {i}',
+                aleatorio.choice(CATEGORIAS),
+                aleatorio.choice(TIPOS_CUSTO),
+                f'ENTIDADE {aleatorio.randint(1, 5000):04d}'
+            )
+            for i in range(linhas)
+        )
+    )
+    conn.executemany(
+        "INSERT INTO despesas (descricao, valor, data_despesa, categoria) VALUES (?, ?, ?, ?)",
+        ((f'Despesa {i}', round(aleatorio.uniform(10, 2000), 2), data_aleatoria(), aleatorio.choice(CATEGORIAS))
+         for i in range(linhas // 10))
+    )
+    conn.executemany(
+        "INSERT INTO faturas (cliente_id, servico_id, mes_referencia, data_emissao, valor) VALUES (1, 1, ?, ?, ?)",
+        ((data_aleatoria(), data_aleatoria(), round(aleatorio.uniform(500, 8000), 2)) for _ in range(linhas // 10))
+    )
+    conn.commit()
+
+def aplicar_migracao():
+    """Aplica as migrações pendentes no banco de DATABASE_URL"""
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(RAIZ, 'alembic.ini'))
+    config.set_main_option('script_location', os.path.join(RAIZ, 'migrations'))
+    command.upgrade(config, 'head')
+
+def medir(conn, parametros, repeticoes):
+    """Plano de execução e mediana do tempo (ms) de cada consulta"""
+    conn.execute("ANALYZE")
+    resultados = {}
+    for nome, (sql,) in CONSULTAS.items():
+        plano = [linha[-1] for linha in conn.execute(f"EXPLAIN QUERY PLAN {sql}", parametros)]
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            conn.execute(sql, parametros).fetchall()
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        resultados[nome] = {'plano': '; '.join(plano), 'tempo': statistics.median(tempos)}
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=500_000, help='Quantidade de movimentações sintéticas')
+    parser.add_argument('--repeticoes', type=int, default=5, help='Execuções de cada consulta')
+    args = parser.parse_args()
+
+    # Um mês de um histórico de cinco anos, como no recorte padrão do dashboard
+    parametros = {
+        'inicio': '2024-03-01', 'fim': '2024-03-31',
+        'categoria': 'Impostos', 'tipo_custo': 'Fixo',
+        'natureza': '00042', 'entidade': 'ENTIDADE 0042'
+    }
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'benchmark.db')
+        conn = criar_banco(caminho)
+
+        print(f"Gerando {args.linhas:,} movimentações sintéticas...")
+        popular(conn, args.linhas)
+
+        antes = medir(conn, parametros, args.repeticoes)
+        aplicar_migracao()
+        depois = medir(conn, parametros, args.repeticoes)
+        conn.close()
+
+    print()
+    print(f"{'Consulta':<32} {'Antes (ms)':>11} {'Depois (ms)':>12} {'Ganho':>8}")
+    for nome in CONSULTAS:
+        ganho = antes[nome]['tempo'] / depois[nome]['tempo'] if depois[nome]['tempo'] else float('inf')
+        print(f"{nome:<32} {antes[nome]['tempo']:>11.2f} {depois[nome]['tempo']:>12.2f} {ganho:>7.1f}x")
+
+    print()
+    for nome in CONSULTAS:
+        print(f"{nome}")
+        print(f"  antes:  {antes[nome]['plano']}")
+        print(f"  depois: {depois[nome]['plano']}")
+
+if __name__ == "__main__":
+    main()
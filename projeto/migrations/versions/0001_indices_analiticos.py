@@ -0,0 +1,62 @@
+"""indices analiticos
+
+Índices secundários das tabelas de movimentações, faturas e despesas,
+alinhados aos recortes do dashboard (período, filial, categoria, tipo de
+custo, natureza e entidade).
+
+Os índices também estão declarados em models.py, de modo que bancos criados
+por init_db.py já os possuem; por isso cada índice só é criado se ainda não
+existir. Tabelas ainda não criadas são ignoradas.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nome, tabela, colunas, opções do PostgreSQL)
+INDICES = [
+    # O índice (data, id) também atende aos recortes apenas por data
+    ('ix_movimentacoes_data_id', 'movimentacoes', ['data', 'id'], None),
+    ('ix_movimentacoes_filial_data', 'movimentacoes', ['filial', 'data'], None),
+    ('ix_movimentacoes_categoria_data', 'movimentacoes', ['categoria', 'data'], None),
+    ('ix_movimentacoes_tipo_custo_data', 'movimentacoes', ['tipo_custo', 'data'], None),
+    ('ix_movimentacoes_natureza', 'movimentacoes', ['natureza'], None),
+    ('ix_movimentacoes_entidade', 'movimentacoes', ['entidade'], {'entidade': 'varchar_pattern_ops'}),
+    ('ix_faturas_mes_referencia', 'faturas', ['mes_referencia'], None),
+    ('ix_despesas_data_despesa', 'despesas', ['data_despesa'], None),
+]
+
+
+def _tabelas_existentes():
+    """Tabelas do banco (no modo offline, todas as tabelas dos índices)"""
+    if context.is_offline_mode():
+        return {tabela for _, tabela, _, _ in INDICES}
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade() -> None:
+    tabelas = _tabelas_existentes()
+    for nome, tabela, colunas, opcoes_postgresql in INDICES:
+        if tabela not in tabelas:
+            continue
+        op.create_index(nome, tabela, colunas, if_not_exists=True,
+                        postgresql_ops=opcoes_postgresql or {})
+
+
+def downgrade() -> None:
+    tabelas = _tabelas_existentes()
+    for nome, tabela, _, _ in reversed(INDICES):
+        if tabela in tabelas:
+            op.drop_index(nome, table_name=tabela, if_exists=True)
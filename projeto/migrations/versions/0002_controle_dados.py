@@ -0,0 +1,48 @@
+"""controle dados
+
+Tabela controle_dados, com a geração das importações. A geração é
+incrementada a cada importação e faz parte da versão dos dados usada pelos
+caches do dashboard, de modo que importações que alteram apenas rótulos
+também invalidam os caches.
+
+A tabela também está declarada em models.py (e é criada pela própria
+importação se faltar); por isso só é criada se ainda não existir.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABELA = 'controle_dados'
+
+
+def _tabela_existe():
+    if context.is_offline_mode():
+        return False
+    return sa.inspect(op.get_bind()).has_table(TABELA)
+
+
+def upgrade() -> None:
+    if _tabela_existe():
+        return
+    op.create_table(
+        TABELA,
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('geracao', sa.Integer(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table(TABELA, if_exists=True)
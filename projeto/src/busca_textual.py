@@ -0,0 +1,161 @@
+import re
+from sqlalchemy import text, and_, or_, column
+from database import engine, engine_leitura, IS_SQLITE
+from models import MovimentacaoBancaria
+
+# Tabela virtual FTS5 (SQLite) com conteúdo externo apontando para movimentacoes
+TABELA_FTS = 'movimentacoes_fts'
+
+# Campos textuais indexados para a busca
+CAMPOS_BUSCA = ['historico', 'nome_natureza', 'entidade']
+
+# Índice GIN do PostgreSQL
+INDICE_GIN = 'ix_movimentacoes_busca'
+
+# Documento indexado no PostgreSQL (a mesma expressão é usada no índice GIN e na consulta)
+EXPRESSAO_TSVECTOR = (
+    "to_tsvector('simple', coalesce(historico, '') || ' ' || "
+    "coalesce(nome_natureza, '') || ' ' || coalesce(entidade, ''))"
+)
+
+# Indica se o índice textual já foi verificado neste processo
+_indice_disponivel = None
+
+
+def _termos(busca):
+    """Separa o texto da busca em termos (letras e números), descartando operadores"""
+    return re.findall(r'\w+', busca or '')
+
+def _indice_existe(conn):
+    """Consulta o catálogo do banco (sem DDL) para saber se o índice textual existe"""
+    if IS_SQLITE:
+        consulta = text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :nome")
+        nome = TABELA_FTS
+    else:
+        consulta = text("SELECT 1 FROM pg_indexes WHERE indexname = :nome")
+        nome = INDICE_GIN
+    return conn.execute(consulta, {'nome': nome}).first() is not None
+
+def criar_indice_textual(conn):
+    """
+    Cria o índice de busca textual, caso ainda não exista.
+
+    No SQLite é criada uma tabela virtual FTS5 com conteúdo externo (os textos
+    continuam apenas em movimentacoes); no PostgreSQL, um índice GIN sobre o
+    tsvector dos campos textuais.
+
+    Returns:
+        bool: True se o índice foi criado agora (e precisa ser populado)
+    """
+    if _indice_existe(conn):
+        return False
+    if IS_SQLITE:
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE {TABELA_FTS} USING fts5("
+            f"{', '.join(CAMPOS_BUSCA)}, content='movimentacoes', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        ))
+        return True
+
+    conn.execute(text(
+        f"CREATE INDEX IF NOT EXISTS {INDICE_GIN} ON movimentacoes USING GIN ({EXPRESSAO_TSVECTOR})"
+    ))
+    return False
+
+def reconstruir_indice_textual():
+    """
+    Recria o conteúdo do índice textual a partir da tabela de movimentações.
+
+    Usado pela inicialização do banco; as importações usam sincronizar_indice_textual.
+    No PostgreSQL o índice GIN é mantido automaticamente pelo banco.
+    """
+    global _indice_disponivel
+    try:
+        with engine.begin() as conn:
+            criar_indice_textual(conn)
+            if IS_SQLITE:
+                conn.execute(text(f"INSERT INTO {TABELA_FTS}({TABELA_FTS}) VALUES('rebuild')"))
+        _indice_disponivel = True
+    except Exception as e:
+        print(f"⚠️ Não foi possível atualizar o índice de busca textual: {e}")
+        _indice_disponivel = False
+    return _indice_disponivel
+
+def sincronizar_indice_textual(db):
+    """
+    Reconstrói o índice textual dentro da transação que apagou ou substituiu as movimentações.
+
+    O índice FTS5 do SQLite tem conteúdo externo: seus rowids apontam para os ids
+    de movimentacoes, que o SQLite reutiliza após apagar todas as linhas. Reconstruído
+    na mesma transação, o índice é trocado junto com as linhas e nunca aponta para
+    lançamentos de outra importação. No PostgreSQL o índice GIN já acompanha a tabela.
+
+    Args:
+        db (Session): Sessão de escrita da importação
+    """
+    global _indice_disponivel
+    if not IS_SQLITE:
+        return
+    try:
+        # Em um savepoint: uma falha no índice não desfaz a importação
+        with db.begin_nested():
+            conn = db.connection()
+            criar_indice_textual(conn)
+            conn.execute(text(f"INSERT INTO {TABELA_FTS}({TABELA_FTS}) VALUES('rebuild')"))
+        _indice_disponivel = True
+    except Exception as e:
+        print(f"⚠️ Não foi possível atualizar o índice de busca textual: {e}")
+        _indice_disponivel = False
+
+def indice_textual_disponivel():
+    """
+    Verifica (uma vez por processo) se o índice textual existe.
+
+    A verificação usa o engine de leitura e apenas consulta o catálogo, de modo que
+    a busca nunca aguarda a conexão de escrita ocupada por uma importação. O índice
+    é criado por init_db e pelas importações; até lá, a busca usa LIKE.
+    """
+    global _indice_disponivel
+    if _indice_disponivel is None:
+        try:
+            with engine_leitura.connect() as conn:
+                _indice_disponivel = _indice_existe(conn)
+        except Exception as e:
+            print(f"⚠️ Busca textual indisponível, usando LIKE: {e}")
+            _indice_disponivel = False
+    return _indice_disponivel
+
+def filtro_busca_textual(busca):
+    """
+    Monta o filtro SQL da busca textual sobre historico, nome_natureza e entidade.
+
+    Todos os termos precisam estar presentes; cada termo casa também como prefixo
+    (ex.: 'FIRS' encontra 'FIRST'). Sem índice textual disponível, usa LIKE.
+
+    Args:
+        busca (str): Texto digitado pelo usuário
+
+    Returns:
+        Expressão SQLAlchemy para usar em filter(), ou None se não houver termos
+    """
+    termos = _termos(busca)
+    if not termos:
+        return None
+
+    if not indice_textual_disponivel():
+        return _filtro_like(termos)
+
+    if IS_SQLITE:
+        consulta = ' '.join(f'"{termo}"*' for termo in termos)
+        ids = text(f"SELECT rowid FROM {TABELA_FTS} WHERE {TABELA_FTS} MATCH :busca").bindparams(busca=consulta)
+        return MovimentacaoBancaria.id.in_(ids.columns(column('rowid')))
+
+    consulta = ' & '.join(f"{termo}:*" for termo in termos)
+    return text(f"{EXPRESSAO_TSVECTOR} @@ to_tsquery('simple', :busca)").bindparams(busca=consulta)
+
+def _filtro_like(termos):
+    """Filtro LIKE equivalente à busca textual: todos os termos em algum dos campos"""
+    return and_(*[
+        or_(*[getattr(MovimentacaoBancaria, campo).ilike(f"%{termo}%") for campo in CAMPOS_BUSCA])
+        for termo in termos
+    ])
@@ -0,0 +1,127 @@
+import io
+
+import pandas as pd
+from sqlalchemy import delete, insert
+
+from busca_textual import sincronizar_indice_textual
+from dados_financeiros import registrar_importacao
+from models import MovimentacaoBancaria
+
+# Colunas gravadas pela importação, na ordem usada pelo COPY
+COLUNAS_CARGA = ['filial', 'data', 'banco', 'agencia', 'conta', 'natureza', 'nome_natureza', 'documento',
+                 'entrada', 'saida', 'historico', 'categoria', 'tipo_custo', 'entidade', 'documento_ref']
+
+# Linhas por lote (executemany no SQLite, bloco de CSV enviado ao COPY no PostgreSQL)
+LOTE_CARGA = 10000
+
+# Tabela temporária que recebe o COPY antes da troca dos dados
+TABELA_CARGA = 'movimentacoes_carga'
+
+# Representação de NULL no CSV enviado ao COPY (campos vazios continuam sendo texto vazio)
+NULO_COPY = r'\N'
+
+
+def preparar_carga(carga):
+    """Ordena as colunas, converte as datas para date e os valores ausentes para None"""
+    carga = carga.reindex(columns=COLUNAS_CARGA)
+    carga['data'] = pd.to_datetime(carga['data']).dt.date
+    return carga.astype(object).where(carga.notna(), None)
+
+
+class _FluxoCsv:
+    """
+    Arquivo somente leitura que gera o CSV da carga sob demanda, em lotes.
+
+    O COPY lê o arquivo aos poucos, de modo que apenas um lote do CSV fica em
+    memória por vez, qualquer que seja o tamanho da importação.
+    """
+    def __init__(self, carga, tamanho_lote=LOTE_CARGA):
+        self._lotes = (carga.iloc[i:i + tamanho_lote] for i in range(0, len(carga), tamanho_lote))
+        self._lote_atual = io.StringIO()
+
+    def read(self, tamanho=-1):
+        # Cada leitura avança no CSV do lote atual (sem recopiar o restante do lote)
+        partes = []
+        restante = tamanho
+        while restante != 0:
+            bloco = self._lote_atual.read(restante)
+            if bloco:
+                partes.append(bloco)
+                if restante > 0:
+                    restante -= len(bloco)
+                continue
+            lote = next(self._lotes, None)
+            if lote is None:
+                break
+            self._lote_atual = io.StringIO(lote.to_csv(index=False, header=False, na_rep=NULO_COPY))
+        return ''.join(partes)
+
+
+def _copiar_postgresql(db, carga):
+    """Envia a carga por COPY para uma tabela temporária e troca as movimentações a partir dela"""
+    colunas = ', '.join(COLUNAS_CARGA)
+    conexao = db.connection()
+    conexao.exec_driver_sql(
+        f"CREATE TEMP TABLE {TABELA_CARGA} ON COMMIT DROP AS "
+        f"SELECT {colunas} FROM {MovimentacaoBancaria.__tablename__} WITH NO DATA"
+    )
+
+    # A conexão do driver participa da transação da sessão
+    cursor = conexao.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {TABELA_CARGA} ({colunas}) FROM STDIN WITH (FORMAT csv, NULL '{NULO_COPY}')",
+            _FluxoCsv(carga)
+        )
+    finally:
+        cursor.close()
+
+    conexao.exec_driver_sql(f"DELETE FROM {MovimentacaoBancaria.__tablename__}")
+    conexao.exec_driver_sql(
+        f"INSERT INTO {MovimentacaoBancaria.__tablename__} ({colunas}) SELECT {colunas} FROM {TABELA_CARGA}"
+    )
+
+def _inserir_em_lotes(db, carga):
+    """Troca as movimentações com inserts em lote (executemany)"""
+    db.execute(delete(MovimentacaoBancaria))
+    registros = carga.to_dict('records')
+    for i in range(0, len(registros), LOTE_CARGA):
+        db.execute(insert(MovimentacaoBancaria), registros[i:i + LOTE_CARGA])
+
+def _apos_alterar_movimentacoes(db):
+    """Mantém o índice textual e a versão dos dados em dia após apagar ou substituir as movimentações"""
+    sincronizar_indice_textual(db)
+    registrar_importacao(db)
+
+def limpar_movimentacoes(db):
+    """
+    Apaga todas as movimentações, na transação da sessão.
+
+    Toda remoção ou troca em massa das movimentações deve passar por aqui ou por
+    substituir_movimentacoes, que reconstroem o índice textual e registram a importação.
+    """
+    db.execute(delete(MovimentacaoBancaria))
+    _apos_alterar_movimentacoes(db)
+
+def substituir_movimentacoes(db, carga):
+    """
+    Substitui todas as movimentações pelas linhas da carga, em uma única transação.
+
+    No PostgreSQL as linhas são enviadas por COPY ... FROM STDIN (CSV) para uma
+    tabela temporária e copiadas de lá para movimentacoes; no SQLite são gravadas
+    com executemany em lotes de LOTE_CARGA linhas.
+
+    Args:
+        db (Session): Sessão de escrita (o commit fica a cargo do escopo da sessão)
+        carga (DataFrame): Movimentações já transformadas, com as colunas de COLUNAS_CARGA
+
+    Returns:
+        int: Quantidade de movimentações gravadas
+    """
+    carga = preparar_carga(carga)
+    if db.get_bind().dialect.name == 'postgresql':
+        _copiar_postgresql(db, carga)
+    else:
+        _inserir_em_lotes(db, carga)
+    _apos_alterar_movimentacoes(db)
+    return len(carga)
@@ -0,0 +1,106 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+from dados_financeiros import get_month_name
+
+# Modos de comparação disponíveis no dashboard
+MODOS_COMPARACAO = {
+    'ano_anterior': 'Mesmo período do ano anterior',
+    'periodo_anterior': 'Período imediatamente anterior'
+}
+
+# Janelas agregadas lado a lado
+JANELAS = ['atual', 'anterior']
+
+
+def janela_comparacao(periodo_inicio, periodo_fim, modo):
+    """
+    Calcula o período de comparação.
+
+    Args:
+        periodo_inicio (date): Início do período selecionado
+        periodo_fim (date): Fim do período selecionado
+        modo (str): 'ano_anterior' ou 'periodo_anterior'
+
+    Returns:
+        tuple: (início, fim) do período de comparação
+    """
+    if modo == 'ano_anterior':
+        return periodo_inicio - relativedelta(years=1), periodo_fim - relativedelta(years=1)
+
+    # Período de mesma duração, terminando no dia anterior ao início selecionado
+    dias = (periodo_fim - periodo_inicio).days
+    fim_anterior = periodo_inicio - timedelta(days=1)
+    return fim_anterior - timedelta(days=dias), fim_anterior
+
+def comparar_mensal(df, coluna_data, colunas_valor, atual, anterior):
+    """
+    Agrega o período atual e o de comparação por mês em um único agrupamento.
+
+    As linhas das duas janelas são rotuladas e agrupadas juntas por (posição do
+    mês na janela, janela), de modo que o 1º mês do período atual fica ao lado
+    do 1º mês do período de comparação.
+
+    Args:
+        df (DataFrame): Dados com a coluna de data (datetime64) e as colunas de valor
+        coluna_data (str): Coluna usada para o recorte e o agrupamento mensal
+        colunas_valor (list): Colunas somadas
+        atual (tuple): (início, fim) do período selecionado
+        anterior (tuple): (início, fim) do período de comparação
+
+    Returns:
+        DataFrame: Uma linha por posição de mês (da janela com mais meses), com mes_ano,
+            mes_ano_anterior e as colunas '<valor>_atual' e '<valor>_anterior'; as somas
+            de cada janela cobrem todos os seus meses
+    """
+    colunas = ['mes_ano', 'mes_ano_anterior'] + [f"{c}_{j}" for c in colunas_valor for j in JANELAS]
+    if df.empty or coluna_data not in df.columns or not all(c in df.columns for c in colunas_valor):
+        return pd.DataFrame(columns=colunas)
+
+    datas = df[coluna_data]
+    partes = []
+    for janela, (inicio, fim) in zip(JANELAS, (atual, anterior)):
+        mascara = (datas >= pd.Timestamp(inicio)) & (datas <= pd.Timestamp(fim))
+        parte = df.loc[mascara, [coluna_data] + colunas_valor]
+        # Posição do mês em relação ao primeiro mês da janela
+        meses = parte[coluna_data].dt.year.to_numpy() * 12 + parte[coluna_data].dt.month.to_numpy()
+        partes.append(parte[colunas_valor].assign(
+            posicao=meses - (inicio.year * 12 + inicio.month),
+            janela=janela
+        ))
+
+    valores = pd.concat(partes, ignore_index=True)
+    if valores.empty:
+        return pd.DataFrame(columns=colunas)
+
+    # Um único agrupamento para as duas janelas
+    agrupado = valores.groupby(['posicao', 'janela'])[colunas_valor].sum().unstack('janela')
+    agrupado = agrupado.reindex(columns=pd.MultiIndex.from_product([colunas_valor, JANELAS]), fill_value=0.0)
+    agrupado.columns = [f"{c}_{j}" for c, j in agrupado.columns]
+
+    # Todos os meses das duas janelas, mesmo sem lançamentos: quando as janelas cobrem
+    # quantidades diferentes de meses, a mais longa define as linhas
+    meses_janela = [(fim.year * 12 + fim.month) - (inicio.year * 12 + inicio.month) + 1
+                    for inicio, fim in (atual, anterior)]
+    agrupado = agrupado.reindex(np.arange(max(meses_janela))).fillna(0.0)
+
+    def rotulos(inicio, n_meses):
+        # Posições além do último mês da janela recebem apenas o número do mês
+        base = pd.Period(inicio, freq='M')
+        return [
+            f"{get_month_name((base + int(i)).month)}/{(base + int(i)).year}" if i < n_meses else f"{int(i) + 1}º mês"
+            for i in agrupado.index
+        ]
+
+    agrupado.insert(0, 'mes_ano', rotulos(atual[0], meses_janela[0]))
+    agrupado.insert(1, 'mes_ano_anterior', rotulos(anterior[0], meses_janela[1]))
+    return agrupado.reset_index(drop=True)
+
+def delta_percentual(atual, anterior):
+    """Variação percentual formatada para o delta de st.metric (None se não houver base)"""
+    if not anterior:
+        return None
+    return f"{(atual / anterior - 1) * 100:+.1f}%"
@@ -0,0 +1,168 @@
+import pandas as pd
+from sqlalchemy import func, case, tuple_
+from models import Despesa, Fatura, MovimentacaoBancaria
+from busca_textual import filtro_busca_textual
+from leitura_em_lotes import TAMANHO_LOTE_LEITURA, ler_em_lotes
+
+# Quantidade de lançamentos exibidos por página no explorador
+TAMANHO_PAGINA = 50
+
+# Filtros aplicados no banco de dados (entidade é filtrada pelo prefixo)
+FILTROS_LANCAMENTOS = ['filial', 'categoria', 'tipo_custo', 'natureza', 'entidade']
+
+# Colunas retornadas para a listagem de lançamentos
+COLUNAS_LANCAMENTOS = ['id', 'data', 'natureza', 'nome_natureza', 'categoria', 'tipo_custo',
+                       'entidade', 'documento', 'historico', 'entrada', 'saida']
+
+
+def _escapar_like(valor):
+    """Escapa os curingas do LIKE para buscar o texto literal"""
+    return valor.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def _filtrar_movimentacoes(consulta, periodo_inicio, periodo_fim, filtros=None, busca=None):
+    """Aplica o período, os filtros e a busca textual do explorador de lançamentos"""
+    consulta = consulta.filter(
+        MovimentacaoBancaria.data >= periodo_inicio,
+        MovimentacaoBancaria.data <= periodo_fim
+    )
+
+    for campo, valor in (filtros or {}).items():
+        if campo not in FILTROS_LANCAMENTOS or valor in (None, ''):
+            continue
+        coluna = getattr(MovimentacaoBancaria, campo)
+        if campo == 'entidade':
+            consulta = consulta.filter(coluna.like(f"{_escapar_like(valor)}%", escape='\\'))
+        else:
+            consulta = consulta.filter(coluna == valor)
+
+    # Busca textual pelo índice FTS5 (SQLite) ou tsvector (PostgreSQL)
+    filtro_texto = filtro_busca_textual(busca)
+    if filtro_texto is not None:
+        consulta = consulta.filter(filtro_texto)
+    return consulta
+
+def consultar_pagina_movimentacoes(db, periodo_inicio, periodo_fim, filtros=None, cursor=None,
+                                   tamanho_pagina=TAMANHO_PAGINA, busca=None):
+    """
+    Busca uma página de movimentações usando paginação por chave (data, id).
+
+    Em vez de OFFSET, a consulta continua a partir do último (data, id) exibido,
+    de modo que cada página lê apenas as linhas visíveis pelo índice (data, id),
+    independentemente da profundidade da navegação.
+
+    Args:
+        db (Session): Sessão do banco de dados
+        periodo_inicio (date): Data de início do período (inclusiva)
+        periodo_fim (date): Data de fim do período (inclusiva)
+        filtros (dict, optional): Valores de filial, categoria, tipo_custo, natureza e entidade
+        cursor (tuple, optional): (data, id) do último lançamento da página anterior
+        tamanho_pagina (int): Quantidade de lançamentos por página
+        busca (str, optional): Texto procurado em historico, nome_natureza e entidade
+
+    Returns:
+        tuple: (DataFrame com a página, cursor da próxima página ou None se for a última)
+    """
+    colunas = [getattr(MovimentacaoBancaria, coluna) for coluna in COLUNAS_LANCAMENTOS]
+    consulta = _filtrar_movimentacoes(db.query(*colunas), periodo_inicio, periodo_fim, filtros, busca)
+
+    if cursor is not None:
+        consulta = consulta.filter(
+            tuple_(MovimentacaoBancaria.data, MovimentacaoBancaria.id) > tuple_(cursor[0], cursor[1])
+        )
+
+    # Busca uma linha a mais para saber se existe próxima página
+    linhas = (consulta
+              .order_by(MovimentacaoBancaria.data, MovimentacaoBancaria.id)
+              .limit(tamanho_pagina + 1)
+              .all())
+
+    proximo_cursor = None
+    if len(linhas) > tamanho_pagina:
+        linhas = linhas[:tamanho_pagina]
+        proximo_cursor = (linhas[-1].data, linhas[-1].id)
+
+    pagina = pd.DataFrame([tuple(linha) for linha in linhas], columns=COLUNAS_LANCAMENTOS)
+    return pagina, proximo_cursor
+
+def lotes_movimentacoes(db, periodo_inicio, periodo_fim, filtros=None, busca=None,
+                        tamanho_lote=TAMANHO_LOTE_LEITURA):
+    """
+    Todas as movimentações do período e dos filtros do explorador, lidas em lotes.
+
+    Usada nas exportações, que podem abranger todo o histórico: os lotes chegam em
+    ordem de (data, id) e podem ser gravados um a um, sem acumular o resultado.
+
+    Args:
+        db (Session): Sessão do banco de dados (deve ficar aberta enquanto os lotes são consumidos)
+        periodo_inicio (date): Data de início do período (inclusiva)
+        periodo_fim (date): Data de fim do período (inclusiva)
+        filtros (dict, optional): Valores de filial, categoria, tipo_custo, natureza e entidade
+        busca (str, optional): Texto procurado em historico, nome_natureza e entidade
+        tamanho_lote (int): Quantidade de linhas por lote
+
+    Returns:
+        generator: Lotes (DataFrames) com as colunas de COLUNAS_LANCAMENTOS
+    """
+    colunas = [getattr(MovimentacaoBancaria, coluna) for coluna in COLUNAS_LANCAMENTOS]
+    consulta = _filtrar_movimentacoes(db.query(*colunas), periodo_inicio, periodo_fim, filtros, busca)
+    consulta = consulta.order_by(MovimentacaoBancaria.data, MovimentacaoBancaria.id)
+    return ler_em_lotes(db, consulta.statement, tamanho_lote)
+
+def limites_datas(db):
+    """
+    Primeira e última data com dados, usando apenas agregações no banco.
+
+    Usa as movimentações ou, na falta delas, as despesas ou as faturas.
+
+    Returns:
+        tuple: (data mínima, data máxima), ou None se não houver dados
+    """
+    for coluna in (MovimentacaoBancaria.data, Despesa.data_despesa, Fatura.mes_referencia):
+        data_min, data_max = db.query(func.min(coluna), func.max(coluna)).one()
+        if data_min is not None:
+            return pd.Timestamp(data_min).date(), pd.Timestamp(data_max).date()
+    return None
+
+def listar_filiais(db):
+    """Códigos das filiais com movimentações, em ordem"""
+    filiais = db.query(MovimentacaoBancaria.filial).distinct().all()
+    return sorted(str(filial) for (filial,) in filiais if filial)
+
+def resumo_kpis(db, periodos, filial=None):
+    """
+    Receitas e despesas de um ou mais períodos em uma única consulta agregada.
+
+    Usada para exibir os indicadores principais antes de carregar os lançamentos.
+
+    Args:
+        db (Session): Sessão do banco de dados
+        periodos (dict): Nome -> (início, fim) de cada período
+        filial (str, optional): Restringe a uma filial
+
+    Returns:
+        dict: Nome -> {'total_receitas', 'total_despesas'}
+    """
+    colunas = []
+    for nome, (inicio, fim) in periodos.items():
+        no_periodo = MovimentacaoBancaria.data.between(inicio, fim)
+        colunas += [
+            func.coalesce(func.sum(case((no_periodo, MovimentacaoBancaria.entrada), else_=0)), 0).label(f'receitas_{nome}'),
+            func.coalesce(func.sum(case((no_periodo, MovimentacaoBancaria.saida), else_=0)), 0).label(f'despesas_{nome}')
+        ]
+
+    # Restringe a varredura ao intervalo que cobre todos os períodos
+    consulta = db.query(*colunas).filter(
+        MovimentacaoBancaria.data >= min(inicio for inicio, _ in periodos.values()),
+        MovimentacaoBancaria.data <= max(fim for _, fim in periodos.values())
+    )
+    if filial:
+        consulta = consulta.filter(MovimentacaoBancaria.filial == filial)
+
+    linha = consulta.one()._mapping
+    return {
+        nome: {
+            'total_receitas': float(linha[f'receitas_{nome}']),
+            'total_despesas': float(linha[f'despesas_{nome}'])
+        }
+        for nome in periodos
+    }
@@ -0,0 +1,205 @@
+import pandas as pd
+from sqlalchemy import func, inspect, select, update
+from models import ControleDados, Despesa, Fatura, MovimentacaoBancaria
+from leitura_em_lotes import concatenar_lotes, ler_em_lotes
+
+# Nomes dos meses em português
+MESES = {
+    1: 'Janeiro', 2: 'Fevereiro', 3: 'Março', 4: 'Abril',
+    5: 'Maio', 6: 'Junho', 7: 'Julho', 8: 'Agosto',
+    9: 'Setembro', 10: 'Outubro', 11: 'Novembro', 12: 'Dezembro'
+}
+
+# Colunas de rótulos com baixa cardinalidade, armazenadas como categorias
+COLUNAS_CATEGORICAS = {
+    'movimentacoes': ['filial', 'natureza', 'nome_natureza', 'categoria', 'tipo_custo'],
+    'despesas': ['categoria', 'tipo'],
+    'faturas': ['status'],
+}
+
+def get_month_name(month_number):
+    """Retorna o nome do mês em português"""
+    return MESES.get(month_number, '')
+
+def rotulos_mes_ano(datas):
+    """Gera os rótulos 'Mês/Ano' como categoria ordenada cronologicamente"""
+    periodos = datas.dt.to_period('M')
+    codigos, unicos = pd.factorize(periodos, sort=True)
+    rotulos = [f"{get_month_name(p.month)}/{p.year}" for p in unicos]
+    return pd.Categorical.from_codes(codigos, categories=rotulos, ordered=True)
+
+def adicionar_colunas_periodo(df, coluna_data):
+    """Adiciona as colunas mes, ano e mes_ano derivadas de uma coluna datetime64"""
+    df['mes'] = df[coluna_data].dt.month.astype('int8')
+    df['ano'] = df[coluna_data].dt.year.astype('int16')
+    df['mes_ano'] = rotulos_mes_ano(df[coluna_data])
+    return df
+
+# Indica se a tabela controle_dados já foi encontrada no banco (bancos antigos não a têm)
+_controle_existe = False
+
+def geracao_dados(db):
+    """Geração das importações gravada em controle_dados (0 se ainda não houve nenhuma)"""
+    global _controle_existe
+    if not _controle_existe:
+        _controle_existe = inspect(db.connection()).has_table(ControleDados.__tablename__)
+        if not _controle_existe:
+            return 0
+    return db.scalar(select(ControleDados.geracao).where(ControleDados.id == 1)) or 0
+
+def registrar_importacao(db):
+    """
+    Incrementa a geração dos dados, na transação da importação.
+
+    Contagens e somas não mudam quando uma importação altera apenas os rótulos
+    (categoria, tipo de custo, natureza, filial), e o SQLite reutiliza os ids
+    após apagar todas as linhas; a geração garante uma nova versão dos dados.
+    """
+    ControleDados.__table__.create(bind=db.connection(), checkfirst=True)
+    alteradas = db.execute(
+        update(ControleDados).where(ControleDados.id == 1).values(geracao=ControleDados.geracao + 1)
+    ).rowcount
+    if not alteradas:
+        db.add(ControleDados(id=1, geracao=1))
+        db.flush()
+
+def versao_dados(db):
+    """Calcula uma impressão digital barata dos dados, usada para versionar caches"""
+    movimentacoes = db.query(
+        func.count(MovimentacaoBancaria.id),
+        func.max(MovimentacaoBancaria.id),
+        func.min(MovimentacaoBancaria.data),
+        func.max(MovimentacaoBancaria.data),
+        func.sum(MovimentacaoBancaria.entrada),
+        func.sum(MovimentacaoBancaria.saida)
+    ).one()
+    despesas = db.query(func.count(Despesa.id), func.max(Despesa.id), func.sum(Despesa.valor)).one()
+    faturas = db.query(func.count(Fatura.id), func.max(Fatura.id), func.sum(Fatura.valor)).one()
+    return tuple(str(v) for v in (geracao_dados(db), *movimentacoes, *despesas, *faturas))
+
+def compactar_dataframe(df, colunas_categoricas=(), colunas_data=()):
+    """Converte rótulos repetidos em categorias e datas em datetime64"""
+    for col in colunas_data:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col])
+    for col in colunas_categoricas:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+# Colunas lidas de cada tabela pelos carregadores
+COLUNAS_MOVIMENTACOES = ['data', 'filial', 'natureza', 'nome_natureza', 'categoria', 'tipo_custo',
+                         'entrada', 'saida', 'historico']
+COLUNAS_DESPESAS = ['data_despesa', 'descricao', 'categoria', 'tipo', 'valor']
+COLUNAS_FATURAS = ['data_emissao', 'mes_referencia', 'valor', 'status']
+
+def _compactar_lote_movimentacoes(lote):
+    """Preenche os valores padrão de um lote de movimentações e o compacta"""
+    lote['filial'] = lote['filial'].where(lote['filial'].notna() & (lote['filial'] != ''), '1')
+    lote['entrada'] = lote['entrada'].fillna(0.0).astype('float64')
+    lote['saida'] = lote['saida'].fillna(0.0).astype('float64')
+    return compactar_dataframe(lote, COLUNAS_CATEGORICAS['movimentacoes'], ['data'])
+
+def create_movimentacoes_df(lotes):
+    """
+    Cria DataFrame compacto para análise de movimentações.
+
+    Cada lote é compactado assim que chega, de modo que os valores em texto de
+    apenas um lote ficam em memória por vez.
+
+    Args:
+        lotes (iterable): DataFrames com as colunas de COLUNAS_MOVIMENTACOES
+    """
+    df = concatenar_lotes((_compactar_lote_movimentacoes(lote) for lote in lotes),
+                          COLUNAS_CATEGORICAS['movimentacoes'])
+    if df.empty:
+        return df
+
+    df['valor_liquido'] = df['entrada'] - df['saida']
+    adicionar_colunas_periodo(df, 'data')
+
+    # Mantém a ordem de colunas original
+    return df[['data', 'mes', 'ano', 'mes_ano', 'filial', 'natureza', 'nome_natureza', 'categoria',
+               'tipo_custo', 'entrada', 'saida', 'valor_liquido', 'historico']]
+
+def create_despesas_df(lotes):
+    """Cria DataFrame compacto para análise de despesas a partir dos lotes de COLUNAS_DESPESAS"""
+    lotes = (compactar_dataframe(lote.rename(columns={'data_despesa': 'data'}),
+                                 COLUNAS_CATEGORICAS['despesas'], ['data'])
+             for lote in lotes)
+    df = concatenar_lotes(lotes, COLUNAS_CATEGORICAS['despesas'])
+    if df.empty:
+        return df
+
+    adicionar_colunas_periodo(df, 'data')
+    return df[['data', 'mes', 'ano', 'mes_ano', 'descricao', 'categoria', 'tipo', 'valor']]
+
+def create_faturas_df(lotes):
+    """Cria DataFrame compacto para análise de faturas a partir dos lotes de COLUNAS_FATURAS"""
+    lotes = (compactar_dataframe(lote, COLUNAS_CATEGORICAS['faturas'], ['data_emissao', 'mes_referencia'])
+             for lote in lotes)
+    df = concatenar_lotes(lotes, COLUNAS_CATEGORICAS['faturas'])
+    if df.empty:
+        return df
+
+    adicionar_colunas_periodo(df, 'mes_referencia')
+    return df[['data_emissao', 'mes_referencia', 'mes', 'ano', 'mes_ano', 'valor', 'status']]
+
+def _colunas(modelo, nomes):
+    return select(*(getattr(modelo, nome) for nome in nomes))
+
+def carregar_movimentacoes(db):
+    """DataFrame compacto das movimentações, lido em lotes"""
+    consulta = _colunas(MovimentacaoBancaria, COLUNAS_MOVIMENTACOES)
+    return create_movimentacoes_df(ler_em_lotes(db, consulta))
+
+def carregar_despesas(db):
+    """DataFrame compacto das despesas, lido em lotes"""
+    consulta = _colunas(Despesa, COLUNAS_DESPESAS).where(Despesa.data_despesa.isnot(None))
+    return create_despesas_df(ler_em_lotes(db, consulta))
+
+def carregar_faturas(db):
+    """DataFrame compacto das faturas, lido em lotes"""
+    consulta = _colunas(Fatura, COLUNAS_FATURAS).where(Fatura.mes_referencia.isnot(None))
+    return create_faturas_df(ler_em_lotes(db, consulta))
+
+# Consultas independentes que compõem os dados do dashboard (nome -> função que recebe a sessão)
+CONSULTAS_DATAFRAMES = {
+    'versao': versao_dados,
+    'df_movimentacoes': carregar_movimentacoes,
+    'df_despesas': carregar_despesas,
+    'df_faturas': carregar_faturas
+}
+
+def carregar_dataframes(db):
+    """Carrega as tabelas e monta os DataFrames compactos usados nas análises"""
+    return {nome: consulta(db) for nome, consulta in CONSULTAS_DATAFRAMES.items()}
+
+def expandir_dataframe(df):
+    """Reconstrói a representação antiga (strings e objetos date) para comparação"""
+    legado = df.copy()
+    for col in legado.columns:
+        if isinstance(legado[col].dtype, pd.CategoricalDtype):
+            legado[col] = legado[col].astype(object)
+        elif pd.api.types.is_datetime64_any_dtype(legado[col]):
+            legado[col] = pd.Series(legado[col].dt.date, index=legado.index, dtype=object)
+        elif pd.api.types.is_integer_dtype(legado[col]):
+            legado[col] = legado[col].astype('int64')
+    return legado
+
+def relatorio_memoria(dataframes):
+    """Compara o uso de memória antes/depois da compactação de cada DataFrame"""
+    linhas = []
+    for nome, df in dataframes.items():
+        if df is None or df.empty:
+            continue
+        antes = expandir_dataframe(df).memory_usage(deep=True).sum()
+        depois = df.memory_usage(deep=True).sum()
+        linhas.append({
+            'Tabela': nome,
+            'Registros': len(df),
+            'Antes (KB)': round(antes / 1024, 1),
+            'Depois (KB)': round(depois / 1024, 1),
+            'Redução': f"{antes / depois:.1f}x" if depois else '-'
+        })
+    return pd.DataFrame(linhas)
@@ -1,5 +1,8 @@
 import os
-from sqlalchemy import create_engine, text
+import functools
+import threading
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker
 import time
 
@@ -18,25 +21,263 @@ if DATABASE_URL.startswith("postgres://"):
 
 # Configura o engine do SQLAlchemy com as opções corretas para cada banco
 is_sqlite = DATABASE_URL.startswith('sqlite')
-connect_args = {'check_same_thread': False} if is_sqlite else {'connect_timeout': 10}
 
-# Cria o engine com as configurações apropriadas
-engine = create_engine(
-    DATABASE_URL,
-    echo=False,  # Não mostra queries no console (mude para True para debugging)
-    pool_pre_ping=True,  # Verifica se a conexão está ativa
-    pool_recycle=3600,  # Recicla conexões após 1 hora
-    connect_args=connect_args
-)
+# Perfis de PRAGMAs do SQLite aplicados a cada nova conexão
+PERFIS_SQLITE = {
+    # Comportamento padrão do SQLite (fsync a cada commit). O journal_mode WAL fica
+    # gravado no arquivo: um banco já convertido continua em WAL
+    'padrao': {},
+    # WAL: leitores não bloqueiam durante a importação e os commits não fazem fsync
+    # (apenas os checkpoints); a base continua consistente após uma queda de energia
+    'desempenho': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,       # ms aguardando um lock antes de falhar
+        'cache_size': -65536,       # 64 MB (valores negativos são em KiB)
+        'mmap_size': 268435456,     # 256 MB lidos via memória mapeada
+        'temp_store': 'MEMORY'
+    },
+    # WAL com fsync a cada commit
+    'seguro': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'busy_timeout': 5000
+    }
+}
 
-# Cria uma fábrica de sessões
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Nomes dos valores numéricos retornados pelos PRAGMAs
+NOMES_PRAGMAS_SQLITE = {
+    'synchronous': {0: 'OFF', 1: 'NORMAL', 2: 'FULL', 3: 'EXTRA'},
+    'temp_store': {0: 'DEFAULT', 1: 'FILE', 2: 'MEMORY'}
+}
+
+# Perfil em uso, selecionado pela variável de ambiente SQLITE_PERFIL
+SQLITE_PERFIL = os.getenv('SQLITE_PERFIL', 'desempenho')
+if SQLITE_PERFIL not in PERFIS_SQLITE:
+    print(f"⚠️ Perfil SQLite desconhecido '{SQLITE_PERFIL}'; usando 'desempenho'")
+    SQLITE_PERFIL = 'desempenho'
+
+# URL das leituras do dashboard: no PostgreSQL pode apontar para uma réplica
+DATABASE_READ_URL = os.getenv('DATABASE_READ_URL', DATABASE_URL)
+if DATABASE_READ_URL.startswith("postgres://"):
+    DATABASE_READ_URL = DATABASE_READ_URL.replace("postgres://", "postgresql://", 1)
+if is_sqlite:
+    # No SQLite leitura e escrita usam sempre o mesmo arquivo
+    DATABASE_READ_URL = DATABASE_URL
+
+# Conexões do pool de leitura (sessões simultâneas do dashboard), mais o mesmo número de conexões extras
+POOL_LEITURA = int(os.getenv('DB_POOL_LEITURA', '10'))
+
+# Tempo (s) a partir do qual uma conexão ou sessão aberta é sinalizada como retida
+LIMITE_RETENCAO = float(os.getenv('DB_LIMITE_RETENCAO', '10'))
+
+# Contadores de uso de cada pool e sessões abertas pelos escopos de sessão
+_estatisticas_pool = {}
+_sessoes_abertas = {}
+_monitor_lock = threading.Lock()
+
+def monitorar_pool(engine_monitorado, nome):
+    """Conta os checkouts do pool do engine e sinaliza conexões retidas além de LIMITE_RETENCAO"""
+    estatisticas = _estatisticas_pool.setdefault(nome, {
+        'checkouts': 0, 'em_uso': 0, 'retencoes_longas': 0, 'maior_retencao': 0.0
+    })
+    
+    @event.listens_for(engine_monitorado, "checkout")
+    def registrar_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info['checkout_em'] = time.perf_counter()
+        with _monitor_lock:
+            estatisticas['checkouts'] += 1
+            estatisticas['em_uso'] += 1
+    
+    @event.listens_for(engine_monitorado, "checkin")
+    def registrar_checkin(dbapi_connection, connection_record):
+        inicio = connection_record.info.pop('checkout_em', None)
+        if inicio is None:
+            return
+        retencao = time.perf_counter() - inicio
+        with _monitor_lock:
+            estatisticas['em_uso'] -= 1
+            estatisticas['maior_retencao'] = max(estatisticas['maior_retencao'], retencao)
+            if retencao > LIMITE_RETENCAO:
+                estatisticas['retencoes_longas'] += 1
+        if retencao > LIMITE_RETENCAO:
+            print(f"⚠️ Conexão do pool de {nome} retida por {retencao:.1f}s")
+
+def _connect_args(somente_leitura):
+    """Argumentos de conexão de cada banco"""
+    if is_sqlite:
+        return {'check_same_thread': False}
+    connect_args = {'connect_timeout': 10}
+    if somente_leitura:
+        # Transações somente leitura por padrão (também aceitas por réplicas)
+        connect_args['options'] = '-c default_transaction_read_only=on'
+    return connect_args
+
+def registrar_perfil_sqlite(engine_sqlite, somente_leitura):
+    """Aplica os PRAGMAs do perfil selecionado em cada nova conexão do engine"""
+    pragmas = dict(PERFIS_SQLITE[SQLITE_PERFIL])
+    if somente_leitura:
+        # Conexões de leitura rejeitam qualquer escrita
+        pragmas['query_only'] = 'ON'
+    
+    @event.listens_for(engine_sqlite, "connect")
+    def aplicar_perfil_sqlite(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma, valor in pragmas.items():
+                cursor.execute(f"PRAGMA {pragma}={valor}")
+        finally:
+            cursor.close()
+
+def _criar_engine(nome, url, somente_leitura, pool_size, max_overflow):
+    """Cria um engine com as configurações apropriadas e, no SQLite, o perfil de PRAGMAs"""
+    novo_engine = create_engine(
+        url,
+        echo=False,  # Não mostra queries no console (mude para True para debugging)
+        pool_pre_ping=True,  # Verifica se a conexão está ativa
+        pool_recycle=3600,  # Recicla conexões após 1 hora
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        connect_args=_connect_args(somente_leitura)
+    )
+    
+    if is_sqlite:
+        registrar_perfil_sqlite(novo_engine, somente_leitura)
+    monitorar_pool(novo_engine, nome)
+    return novo_engine
+
+# Engine de escrita: um único escritor para as importações (o SQLite aceita apenas
+# um escritor por vez, e no PostgreSQL as importações não concorrem entre si)
+engine_escrita = _criar_engine('escrita', DATABASE_URL, somente_leitura=False, pool_size=1, max_overflow=0)
+
+# Engine de leitura: pool próprio para o dashboard, que não disputa conexões com a
+# importação (no SQLite em WAL, as leituras também não aguardam a transação de escrita)
+engine_leitura = _criar_engine('leitura', DATABASE_READ_URL, somente_leitura=True,
+                               pool_size=POOL_LEITURA, max_overflow=POOL_LEITURA)
+
+# Compatibilidade: engine é o engine de escrita (criação de tabelas e índices)
+engine = engine_escrita
+
+# Cria as fábricas de sessões
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine_escrita)
+SessionLeitura = sessionmaker(autocommit=False, autoflush=False, bind=engine_leitura)
+
+@event.listens_for(SessionLeitura, "before_flush")
+def bloquear_escrita(session, flush_context, instances):
+    """Sessões de leitura não gravam: a falha ocorre antes de chegar ao banco"""
+    raise PermissionError("Sessão somente leitura: use sessao(somente_leitura=False) para gravar")
 
 def get_db():
-    """Função para obter uma sessão do banco de dados"""
+    """
+    Função para obter uma sessão do banco de dados (escrita, usada pelas importações).
+    
+    Quem chama precisa fechar a sessão; prefira o escopo sessao().
+    """
     db = SessionLocal()
     return db
 
+def get_db_leitura():
+    """Sessão somente leitura, usada pelas consultas do dashboard (prefira o escopo sessao())"""
+    return SessionLeitura()
+
+@contextmanager
+def sessao(somente_leitura=True, descricao=None):
+    """
+    Escopo de sessão com liberação garantida da conexão.
+    
+    Escopos de escrita fazem commit ao final; em caso de erro é feito rollback.
+    A sessão é sempre fechada, devolvendo a conexão ao pool.
+    
+    Args:
+        somente_leitura (bool): Usa o engine de leitura e rejeita alterações
+        descricao (str, optional): Identificação do escopo nos avisos de retenção
+    
+    Yields:
+        Session: Sessão do banco de dados
+    """
+    db = (SessionLeitura if somente_leitura else SessionLocal)()
+    db.info['somente_leitura'] = somente_leitura
+    registro = {
+        'descricao': descricao or 'sessão',
+        'somente_leitura': somente_leitura,
+        'inicio': time.perf_counter()
+    }
+    with _monitor_lock:
+        _sessoes_abertas[id(registro)] = registro
+    try:
+        yield db
+        if not somente_leitura:
+            db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+        with _monitor_lock:
+            _sessoes_abertas.pop(id(registro), None)
+        duracao = time.perf_counter() - registro['inicio']
+        if duracao > LIMITE_RETENCAO:
+            print(f"⚠️ Sessão '{registro['descricao']}' mantida aberta por {duracao:.1f}s")
+
+def com_sessao(somente_leitura=True):
+    """
+    Decorador que abre um escopo de sessão e o passa à função no argumento db.
+    
+    Se a chamada já informar db, a sessão recebida é usada sem abrir outro escopo.
+    """
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envoltorio(*args, db=None, **kwargs):
+            if db is not None:
+                return funcao(*args, db=db, **kwargs)
+            with sessao(somente_leitura, descricao=funcao.__qualname__) as db:
+                return funcao(*args, db=db, **kwargs)
+        return envoltorio
+    return decorador
+
+def estatisticas_pool():
+    """
+    Uso dos pools de conexões e sessões abertas há mais de LIMITE_RETENCAO.
+    
+    Returns:
+        dict: 'pools' (nome -> checkouts, em_uso, retencoes_longas, maior_retencao)
+            e 'sessoes_retidas' (lista de descrição, modo e tempo aberto)
+    """
+    agora = time.perf_counter()
+    with _monitor_lock:
+        pools = {nome: dict(valores) for nome, valores in _estatisticas_pool.items()}
+        retidas = [
+            {
+                'descricao': registro['descricao'],
+                'somente_leitura': registro['somente_leitura'],
+                'aberta_ha': agora - registro['inicio']
+            }
+            for registro in _sessoes_abertas.values()
+            if agora - registro['inicio'] > LIMITE_RETENCAO
+        ]
+    return {'pools': pools, 'sessoes_retidas': retidas}
+
+def configuracoes_sqlite():
+    """
+    Valores efetivos dos PRAGMAs de desempenho, lidos de uma conexão do pool de leitura.
+
+    Returns:
+        dict: PRAGMA -> {'configurado': valor do perfil (ou None), 'efetivo': valor atual}
+    """
+    if not is_sqlite:
+        return {}
+    
+    configurados = PERFIS_SQLITE[SQLITE_PERFIL]
+    configuracoes = {}
+    with engine_leitura.connect() as conn:
+        for pragma in PERFIS_SQLITE['desempenho']:
+            efetivo = conn.exec_driver_sql(f"PRAGMA {pragma}").scalar()
+            configuracoes[pragma] = {
+                'configurado': configurados.get(pragma),
+                'efetivo': NOMES_PRAGMAS_SQLITE.get(pragma, {}).get(efetivo, efetivo)
+            }
+    return configuracoes
+
 def test_connection():
     """Função para testar a conexão com o banco"""
     max_attempts = 3
@@ -44,7 +285,7 @@ def test_connection():
         try:
             print(f"Tentativa {attempt+1} de {max_attempts} - Conectando ao banco usando: {DATABASE_URL}")
             # Usando text() para criar uma consulta SQL com SQLAlchemy 2.0
-            with engine.connect() as conn:
+            with engine_leitura.connect() as conn:
                 result = conn.execute(text("SELECT 1"))
                 # Verificando se há resultado
                 row = result.fetchone()
@@ -70,4 +311,7 @@ IS_SQLITE = is_sqlite
 DB_TYPE = "SQLite" if is_sqlite else "PostgreSQL"
 
 # Exporta as entidades principais
-__all__ = ['engine', 'DATABASE_URL', 'get_db', 'test_connection', 'IS_SQLITE', 'DB_TYPE']
\ No newline at end of file
+__all__ = ['engine', 'engine_escrita', 'engine_leitura', 'DATABASE_URL', 'DATABASE_READ_URL',
+           'get_db', 'get_db_leitura', 'sessao', 'com_sessao', 'estatisticas_pool', 'LIMITE_RETENCAO',
+           'test_connection', 'IS_SQLITE', 'DB_TYPE',
+           'SQLITE_PERFIL', 'PERFIS_SQLITE', 'POOL_LEITURA', 'configuracoes_sqlite']
\ No newline at end of file
@@ -0,0 +1,111 @@
+import asyncio
+import importlib.util
+import os
+import threading
+
+from database import DATABASE_READ_URL, IS_SQLITE, POOL_LEITURA, monitorar_pool, registrar_perfil_sqlite, sessao
+
+# Driver assíncrono de cada banco
+DRIVER_ASYNC = 'aiosqlite' if IS_SQLITE else 'asyncpg'
+
+# A camada assíncrona depende do driver e do greenlet (usado pelo SQLAlchemy asyncio);
+# sem eles, as consultas são executadas em sequência na sessão de leitura
+ASYNC_DISPONIVEL = all(importlib.util.find_spec(modulo) for modulo in (DRIVER_ASYNC, 'greenlet'))
+
+# Consultas do SQLite rodam no próprio processo e disputam a CPU: só há ganho em
+# executá-las ao mesmo tempo com mais de um núcleo. No PostgreSQL o tempo é de espera
+# pela rede e pelo servidor, e a concorrência sempre compensa
+CONSULTAS_CONCORRENTES = ASYNC_DISPONIVEL and (not IS_SQLITE or (os.cpu_count() or 1) > 1)
+
+engine_async = None
+SessionAsync = None
+
+if ASYNC_DISPONIVEL:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+    if IS_SQLITE:
+        url_async = DATABASE_READ_URL.replace('sqlite://', 'sqlite+aiosqlite://', 1)
+        connect_args = {}
+    else:
+        url_async = DATABASE_READ_URL.replace('postgresql://', 'postgresql+asyncpg://', 1)
+        # Mesmas garantias do engine de leitura síncrono
+        connect_args = {'timeout': 10, 'server_settings': {'default_transaction_read_only': 'on'}}
+
+    engine_async = create_async_engine(
+        url_async,
+        echo=False,
+        # No SQLite não há conexão de rede a verificar; cada verificação custaria uma ida à thread do aiosqlite
+        pool_pre_ping=not IS_SQLITE,
+        pool_recycle=3600,
+        # O aiosqlite usa NullPool por padrão; o pool reaproveita as conexões (e seus PRAGMAs)
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=POOL_LEITURA,
+        max_overflow=POOL_LEITURA,
+        connect_args=connect_args
+    )
+    if IS_SQLITE:
+        registrar_perfil_sqlite(engine_async.sync_engine, somente_leitura=True)
+    monitorar_pool(engine_async.sync_engine, 'leitura (async)')
+
+    SessionAsync = async_sessionmaker(engine_async, expire_on_commit=False)
+
+# Laço de eventos do processo, executado em uma thread própria: as conexões do pool
+# assíncrono ficam presas ao laço em que foram abertas, e os scripts do Streamlit
+# são síncronos (cada rerun criaria um laço novo com asyncio.run)
+_laco = None
+_laco_lock = threading.Lock()
+
+
+def _obter_laco():
+    """Inicia (uma única vez) o laço de eventos compartilhado"""
+    global _laco
+    with _laco_lock:
+        if _laco is None:
+            _laco = asyncio.new_event_loop()
+            threading.Thread(target=_laco.run_forever, name='consultas-async', daemon=True).start()
+        return _laco
+
+async def consultar(funcao, *args):
+    """
+    Executa uma consulta em uma sessão assíncrona própria.
+
+    A função é a mesma usada com a sessão síncrona (recebe a Session como primeiro
+    argumento): o SQLAlchemy a executa sobre a conexão assíncrona, liberando o laço
+    de eventos enquanto o banco responde.
+
+    Args:
+        funcao (callable): Consulta no formato funcao(db, *args)
+        *args: Argumentos adicionais da consulta
+
+    Returns:
+        Resultado da função
+    """
+    async with SessionAsync() as sessao:
+        return await sessao.run_sync(funcao, *args)
+
+async def reunir_consultas(consultas):
+    """Executa as consultas ao mesmo tempo, cada uma na sua conexão"""
+    resultados = await asyncio.gather(*(consultar(funcao, *args) for funcao, *args in consultas.values()))
+    return dict(zip(consultas, resultados))
+
+def executar_em_paralelo(consultas):
+    """
+    Executa consultas independentes de forma concorrente.
+
+    O tempo total se aproxima do da consulta mais lenta, em vez da soma de todas.
+    Sem driver assíncrono instalado (ou com SQLite em um único núcleo), executa em
+    sequência na sessão de leitura.
+
+    Args:
+        consultas (dict): Nome -> (função, *argumentos); cada função recebe a
+            sessão do banco como primeiro argumento
+
+    Returns:
+        dict: Nome -> resultado de cada consulta
+    """
+    if not CONSULTAS_CONCORRENTES:
+        with sessao(descricao='executar_em_paralelo') as db:
+            return {nome: funcao(db, *args) for nome, (funcao, *args) in consultas.items()}
+
+    return asyncio.run_coroutine_threadsafe(reunir_consultas(consultas), _obter_laco()).result()
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+from dados_financeiros import get_month_name
+
+# Estatísticas calculadas para receitas e despesas de cada mês
+ESTATISTICAS = ['qtd', 'total', 'media', 'mediana', 'p90', 'maior']
+
+# Títulos das colunas da tabela formatada
+TITULOS = {
+    'receitas': {
+        'qtd': 'Qtd. Receitas', 'total': 'Total Receitas (R$)', 'media': 'Média Receitas (R$)',
+        'mediana': 'Mediana Receitas (R$)', 'p90': 'P90 Receitas (R$)', 'maior': 'Maior Receita (R$)'
+    },
+    'despesas': {
+        'qtd': 'Qtd. Despesas', 'total': 'Total Despesas (R$)', 'media': 'Média Despesas (R$)',
+        'mediana': 'Mediana Despesas (R$)', 'p90': 'P90 Despesas (R$)', 'maior': 'Maior Despesa (R$)'
+    }
+}
+
+
+def calcular_estatisticas_mensais(df_movimentacoes):
+    """
+    Calcula as estatísticas mensais de receitas e despesas em um único agrupamento.
+
+    Os lançamentos de entrada e de saída são empilhados em uma só série e agrupados
+    por (mês, tipo), indexados por período mensal em ordem cronológica. As estatísticas
+    consideram apenas os lançamentos do respectivo tipo (valores maiores que zero).
+
+    Args:
+        df_movimentacoes (DataFrame): Movimentações com as colunas data, entrada e saida
+
+    Returns:
+        DataFrame: Indexado por período mensal, com a coluna mes_ano e as colunas
+            '<tipo>_<estatística>' (ex.: receitas_total, despesas_p90)
+    """
+    colunas = ['mes_ano'] + [f"{tipo}_{estat}" for tipo in TITULOS for estat in ESTATISTICAS]
+
+    if df_movimentacoes.empty or not all(col in df_movimentacoes.columns for col in ['data', 'entrada', 'saida']):
+        return pd.DataFrame(columns=colunas)
+
+    periodo = df_movimentacoes['data'].dt.to_period('M')
+    entradas = df_movimentacoes['entrada'] > 0
+    saidas = df_movimentacoes['saida'] > 0
+
+    # Empilha entradas e saídas em uma única série de valores
+    valores = pd.DataFrame({
+        'periodo': pd.concat([periodo[entradas], periodo[saidas]], ignore_index=True),
+        'tipo': np.repeat(['receitas', 'despesas'], [entradas.sum(), saidas.sum()]),
+        'valor': np.concatenate([df_movimentacoes['entrada'].to_numpy()[entradas.to_numpy()],
+                                 df_movimentacoes['saida'].to_numpy()[saidas.to_numpy()]])
+    })
+
+    if valores.empty:
+        return pd.DataFrame(columns=colunas)
+
+    agrupado = valores.groupby(['periodo', 'tipo'], sort=True)['valor']
+    stats = agrupado.agg(['count', 'sum', 'mean', 'median', 'max'])
+    stats['p90'] = agrupado.quantile(0.9)
+    stats = stats.rename(columns={
+        'count': 'qtd', 'sum': 'total', 'mean': 'media', 'median': 'mediana', 'max': 'maior'
+    })
+
+    # Uma linha por mês, com as estatísticas de cada tipo lado a lado
+    stats = stats.unstack('tipo')
+    stats.columns = [f"{tipo}_{estat}" for estat, tipo in stats.columns]
+    stats = stats.reindex(columns=colunas[1:])
+    for tipo in TITULOS:
+        stats[f"{tipo}_qtd"] = stats[f"{tipo}_qtd"].fillna(0).astype('int64')
+        stats[f"{tipo}_total"] = stats[f"{tipo}_total"].fillna(0.0)
+
+    stats = stats.sort_index()
+    stats.insert(0, 'mes_ano', [f"{get_month_name(p.month)}/{p.year}" for p in stats.index])
+    stats.index.name = 'periodo'
+    return stats
+
+def formatar_numero_br(valores, casas=2):
+    """Formata números no padrão brasileiro (1.234,56) com operações vetorizadas"""
+    serie = pd.Series(valores, dtype='float64')
+    escala = 10 ** casas
+    unidades = np.rint(serie.abs().fillna(0).to_numpy() * escala).astype('int64')
+
+    inteiros = pd.Series(unidades // escala, index=serie.index).astype(str)
+    inteiros = inteiros.str.replace(r'\B(?=(\d{3})+(?!\d))', '.', regex=True)
+
+    if casas > 0:
+        decimais = pd.Series(unidades % escala, index=serie.index).astype(str).str.zfill(casas)
+        texto = inteiros + ',' + decimais
+    else:
+        texto = inteiros
+
+    texto = pd.Series(np.where(serie < 0, '-', ''), index=serie.index) + texto
+    return texto.where(serie.notna(), '-')
+
+def tabela_estatisticas_mensais(estatisticas, colunas=None):
+    """
+    Monta a tabela de exibição com os valores formatados no padrão brasileiro.
+
+    Args:
+        estatisticas (DataFrame): Resultado de calcular_estatisticas_mensais
+        colunas (list, optional): Colunas '<tipo>_<estatística>' a exibir (padrão: todas)
+
+    Returns:
+        DataFrame: Tabela com a coluna 'Mês/Ano' e as colunas formatadas
+    """
+    colunas = colunas or [f"{tipo}_{estat}" for tipo in TITULOS for estat in ESTATISTICAS]
+    tabela = {'Mês/Ano': estatisticas['mes_ano'].to_numpy()}
+
+    for coluna in colunas:
+        tipo, estat = coluna.split('_', 1)
+        casas = 0 if estat == 'qtd' else 2
+        tabela[TITULOS[tipo][estat]] = formatar_numero_br(estatisticas[coluna], casas).to_numpy()
+
+    return pd.DataFrame(tabela)
@@ -0,0 +1,68 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from indice_acumulado import IndiceAcumulado
+
+# Opção do seletor que reúne todas as filiais
+FILIAL_CONSOLIDADO = 'Consolidado'
+
+
+class ParticoesFiliais:
+    """
+    Movimentações particionadas por filial, com um índice de somas acumuladas por filial.
+
+    Os índices das filiais são construídos em paralelo e combinados no índice
+    consolidado. Tudo é feito uma única vez por versão dos dados: a cada rerun,
+    os totais consolidados custam uma consulta ao índice combinado, qualquer que
+    seja o número de filiais.
+    """
+    def __init__(self, df_movimentacoes, max_workers=None):
+        """
+        Particiona as movimentações e constrói os índices.
+
+        Args:
+            df_movimentacoes (DataFrame): Movimentações com a coluna filial
+            max_workers (int, optional): Número máximo de threads (padrão: CPUs disponíveis)
+        """
+        self.movimentacoes = {}
+        self.indices = {}
+
+        if not df_movimentacoes.empty and 'filial' in df_movimentacoes.columns:
+            self.movimentacoes = {
+                str(filial): particao
+                for filial, particao in df_movimentacoes.groupby('filial', observed=True, sort=True)
+            }
+
+        if self.movimentacoes:
+            workers = min(len(self.movimentacoes), max_workers or os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                indices = executor.map(IndiceAcumulado, self.movimentacoes.values())
+                self.indices = dict(zip(self.movimentacoes, indices))
+            self.consolidado = IndiceAcumulado.combinar(self.indices.values())
+        else:
+            self.consolidado = IndiceAcumulado(df_movimentacoes)
+
+    @property
+    def filiais(self):
+        """Códigos das filiais, em ordem"""
+        return list(self.movimentacoes)
+
+    def totais_por_filial(self, periodo_inicio, periodo_fim):
+        """
+        Totais do período de cada filial, obtidos dos índices parciais.
+
+        Returns:
+            DataFrame: Colunas filial, total_receitas, total_despesas e resultado
+        """
+        linhas = []
+        for filial, indice in self.indices.items():
+            totais = indice.totais(periodo_inicio, periodo_fim)
+            linhas.append({
+                'filial': filial,
+                'total_receitas': totais['total_receitas'],
+                'total_despesas': totais['total_despesas'],
+                'resultado': totais['total_receitas'] - totais['total_despesas']
+            })
+        return pd.DataFrame(linhas, columns=['filial', 'total_receitas', 'total_despesas', 'resultado'])
@@ -0,0 +1,482 @@
+import functools
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from dados_financeiros import get_month_name
+
+# Granularidades de agregação disponíveis (da mais fina para a mais grossa)
+GRANULARIDADES = {'D': 'Diária', 'W': 'Semanal', 'M': 'Mensal'}
+
+# Número máximo de pontos por série enviados ao navegador
+ORCAMENTO_PONTOS = 1500
+
+# A partir deste número de pontos as séries usam traços WebGL (Scattergl)
+LIMIAR_WEBGL = 500
+
+# Número máximo de barras no gráfico de análise vertical
+MAX_CATEGORIAS = 15
+
+# Número máximo de figuras mantidas no cache (LRU)
+MAX_FIGURAS = 64
+
+
+def impressao_digital(valor):
+    """Calcula um hash estável das entradas de um gráfico (DataFrames, séries e valores simples)"""
+    h = hashlib.sha1()
+    
+    def atualizar(v):
+        if isinstance(v, pd.DataFrame):
+            h.update(b'DataFrame')
+            h.update(repr([(str(c), str(t)) for c, t in v.dtypes.items()]).encode('utf-8'))
+            h.update(pd.util.hash_pandas_object(v, index=True).to_numpy().tobytes())
+        elif isinstance(v, pd.Series):
+            h.update(b'Series')
+            h.update(repr((v.name, str(v.dtype))).encode('utf-8'))
+            h.update(pd.util.hash_pandas_object(v, index=True).to_numpy().tobytes())
+        elif isinstance(v, (list, tuple)):
+            h.update(f'{type(v).__name__}{len(v)}'.encode('utf-8'))
+            for item in v:
+                atualizar(item)
+        elif isinstance(v, dict):
+            h.update(f'dict{len(v)}'.encode('utf-8'))
+            for chave in sorted(v, key=repr):
+                atualizar(chave)
+                atualizar(v[chave])
+        else:
+            h.update(repr((type(v).__name__, v)).encode('utf-8'))
+    
+    atualizar(valor)
+    return h.hexdigest()
+
+
+class CacheFiguras:
+    """
+    Cache LRU de figuras Plotly, compartilhado por todas as sessões.
+    
+    As figuras são indexadas pelo nome da função de plotagem e pela impressão
+    digital das entradas agregadas e opções do gráfico.
+    """
+    def __init__(self, max_itens=MAX_FIGURAS):
+        self.max_itens = max_itens
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+    
+    def obter(self, chave):
+        """Retorna (encontrado, figura) e marca o item como usado recentemente"""
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return True, self._itens[chave]
+            self.falhas += 1
+            return False, None
+    
+    def guardar(self, chave, figura):
+        """Armazena uma figura, descartando as menos usadas recentemente"""
+        with self._lock:
+            self._itens[chave] = figura
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+    
+    def estatisticas(self):
+        """Retorna o número de itens, acertos e falhas do cache"""
+        with self._lock:
+            return {'itens': len(self._itens), 'acertos': self.acertos, 'falhas': self.falhas}
+
+
+cache_figuras = CacheFiguras()
+
+def cache_figura(funcao):
+    """Decorador que memoiza a figura retornada por uma função de plotagem"""
+    @functools.wraps(funcao)
+    def wrapper(*args, **kwargs):
+        chave = (funcao.__name__, impressao_digital((args, kwargs)))
+        encontrado, figura = cache_figuras.obter(chave)
+        if not encontrado:
+            figura = funcao(*args, **kwargs)
+            cache_figuras.guardar(chave, figura)
+        return figura
+    return wrapper
+
+def escolher_granularidade(periodo_inicio, periodo_fim, desejada='D', orcamento_pontos=ORCAMENTO_PONTOS):
+    """Escolhe a granularidade mais fina (a partir da desejada) que cabe no orçamento de pontos"""
+    inicio = pd.Timestamp(periodo_inicio)
+    fim = pd.Timestamp(periodo_fim)
+    dias = max((fim - inicio).days + 1, 1)
+    pontos = {
+        'D': dias,
+        'W': math.ceil(dias / 7) + 1,
+        'M': (fim.year - inicio.year) * 12 + fim.month - inicio.month + 1
+    }
+    
+    ordem = list(GRANULARIDADES)
+    for granularidade in ordem[ordem.index(desejada):]:
+        if pontos[granularidade] <= orcamento_pontos:
+            return granularidade
+    return 'M'
+
+def agregar_serie_temporal(mov_periodo, granularidade):
+    """Agrega entradas, saídas e saldo das movimentações por dia, semana ou mês"""
+    colunas = ['periodo', 'rotulo', 'entrada', 'saida', 'valor_liquido']
+    if mov_periodo.empty or not all(col in mov_periodo.columns for col in ['data', 'entrada', 'saida', 'valor_liquido']):
+        return pd.DataFrame(columns=colunas)
+    
+    chave = mov_periodo['data'].dt.to_period(granularidade)
+    serie = mov_periodo.groupby(chave)[['entrada', 'saida', 'valor_liquido']].sum().sort_index()
+    
+    periodos = serie.index
+    serie.index = periodos.to_timestamp()
+    serie.index.name = 'periodo'
+    serie = serie.reset_index()
+    
+    if granularidade == 'M':
+        serie.insert(1, 'rotulo', [f"{get_month_name(p.month)}/{p.year}" for p in periodos])
+    else:
+        serie.insert(1, 'rotulo', serie['periodo'].dt.strftime('%d/%m/%Y'))
+    
+    return serie
+
+def usa_webgl(fig):
+    """Indica se a figura possui traços WebGL"""
+    return any(trace.type == 'scattergl' for trace in fig.data)
+
+def contar_pontos(fig):
+    """Conta os pontos enviados ao navegador em todos os traços da figura"""
+    total = 0
+    for trace in fig.data:
+        for atributo in ('x', 'values', 'y'):
+            valores = getattr(trace, atributo, None)
+            if valores is not None:
+                total += len(valores)
+                break
+    return total
+
+def tamanho_payload(fig):
+    """Tamanho, em bytes, do JSON da figura enviado ao navegador"""
+    return len(fig.to_json().encode('utf-8'))
+
+@cache_figura
+def plot_receitas_despesas(receitas_despesas_mes, granularidade='M'):
+    """Gráfico de Receitas vs Despesas por dia, semana ou mês"""
+    # Séries diárias/semanais usam eixo de datas; a mensal usa os rótulos Mês/Ano
+    eixo_x = 'periodo' if 'periodo' in receitas_despesas_mes.columns else 'mes_ano'
+    
+    # Verifica se há dados para plotar
+    if receitas_despesas_mes.empty or eixo_x not in receitas_despesas_mes.columns:
+        return None
+        
+    fig = go.Figure()
+    x = receitas_despesas_mes[eixo_x]
+    
+    # Séries grandes são desenhadas como linhas WebGL em vez de barras SVG
+    if len(receitas_despesas_mes) > LIMIAR_WEBGL:
+        series = [('entrada', 'Receitas', '#2E8B57', 1), ('saida', 'Despesas', '#CD5C5C', 1),
+                  ('valor_liquido', 'Saldo', '#4682B4', 2)]
+        for coluna, nome, cor, largura in series:
+            if coluna in receitas_despesas_mes.columns:
+                fig.add_trace(go.Scattergl(
+                    x=x,
+                    y=receitas_despesas_mes[coluna],
+                    name=nome,
+                    mode='lines',
+                    line=dict(color=cor, width=largura)
+                ))
+    else:
+        if 'entrada' in receitas_despesas_mes.columns:
+            fig.add_trace(go.Bar(
+                x=x,
+                y=receitas_despesas_mes['entrada'],
+                name='Receitas',
+                marker_color='#2E8B57'  # Verde
+            ))
+        
+        if 'saida' in receitas_despesas_mes.columns:
+            fig.add_trace(go.Bar(
+                x=x,
+                y=receitas_despesas_mes['saida'],
+                name='Despesas',
+                marker_color='#CD5C5C'  # Vermelho
+            ))
+        
+        if 'valor_liquido' in receitas_despesas_mes.columns:
+            fig.add_trace(go.Scatter(
+                x=x,
+                y=receitas_despesas_mes['valor_liquido'],
+                name='Saldo',
+                mode='lines+markers',
+                line=dict(color='#4682B4', width=3)  # Azul
+            ))
+    
+    unidade = {'D': 'Dia', 'W': 'Semana', 'M': 'Mês'}[granularidade]
+    
+    fig.update_layout(
+        title=f'Receitas vs Despesas por {unidade}',
+        xaxis_title='Mês/Ano' if granularidade == 'M' else 'Data',
+        yaxis_title='Valor (R$)',
+        barmode='group',
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+    
+    return fig
+
+@cache_figura
+def plot_despesas_categoria(despesas_por_categoria):
+    """Gráfico de Despesas por Categoria"""
+    if despesas_por_categoria.empty or 'categoria' not in despesas_por_categoria.columns or 'valor' not in despesas_por_categoria.columns:
+        return None
+        
+    fig = px.pie(
+        despesas_por_categoria, 
+        values='valor', 
+        names='categoria',
+        title='Distribuição de Despesas por Categoria',
+        color_discrete_sequence=px.colors.sequential.Viridis
+    )
+    
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    
+    return fig
+
+@cache_figura
+def plot_custos_fixos_variaveis(custos_fixos, custos_variaveis):
+    """Gráfico de distribuição de custos fixos vs variáveis"""
+    # Verifica se há valores para plotar
+    if custos_fixos == 0 and custos_variaveis == 0:
+        return None
+        
+    labels = ['Custos Fixos', 'Custos Variáveis']
+    values = [custos_fixos, custos_variaveis]
+    
+    fig = px.pie(
+        values=values,
+        names=labels,
+        title='Custos Fixos vs Variáveis (Martins, 2018)',
+        color_discrete_sequence=['#1E88E5', '#FFC107']
+    )
+    
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    
+    return fig
+
+@cache_figura
+def plot_faturamento_mensal(faturamento_mensal):
+    """Gráfico de Faturamento Mensal"""
+    if faturamento_mensal.empty or 'mes_ano' not in faturamento_mensal.columns or 'valor' not in faturamento_mensal.columns:
+        return None
+    
+    if len(faturamento_mensal) > LIMIAR_WEBGL:
+        # Série grande: traço WebGL sem marcadores
+        fig = go.Figure(go.Scattergl(
+            x=faturamento_mensal['mes_ano'],
+            y=faturamento_mensal['valor'],
+            mode='lines'
+        ))
+        fig.update_layout(title='Faturamento Mensal')
+    else:
+        fig = px.line(
+            faturamento_mensal,
+            x='mes_ano',
+            y='valor',
+            title='Faturamento Mensal',
+            markers=True
+        )
+    
+    fig.update_layout(
+        xaxis_title='Mês/Ano',
+        yaxis_title='Valor Faturado (R$)',
+        xaxis_tickangle=-45
+    )
+    
+    return fig
+
+@cache_figura
+def plot_comparacao_mensal(comparacao_mensal, series, titulo, rotulo_anterior):
+    """
+    Gráfico de barras do período atual lado a lado com o período de comparação.
+    
+    Args:
+        comparacao_mensal (DataFrame): Resultado de comparar_mensal
+        series (list): Tuplas (coluna, nome, cor) com as colunas sem o sufixo da janela
+        titulo (str): Título do gráfico
+        rotulo_anterior (str): Nome do período de comparação na legenda
+    """
+    if comparacao_mensal.empty or 'mes_ano' not in comparacao_mensal.columns:
+        return None
+    
+    fig = go.Figure()
+    x = comparacao_mensal['mes_ano']
+    
+    for coluna, nome, cor in series:
+        if f'{coluna}_atual' not in comparacao_mensal.columns:
+            continue
+        fig.add_trace(go.Bar(
+            x=x,
+            y=comparacao_mensal[f'{coluna}_atual'],
+            name=nome,
+            marker_color=cor
+        ))
+        fig.add_trace(go.Bar(
+            x=x,
+            y=comparacao_mensal[f'{coluna}_anterior'],
+            name=f'{nome} ({rotulo_anterior})',
+            marker_color=cor,
+            opacity=0.45,
+            customdata=comparacao_mensal['mes_ano_anterior'],
+            hovertemplate='%{customdata}: R$ %{y:,.2f}<extra></extra>'
+        ))
+    
+    fig.update_layout(
+        title=titulo,
+        xaxis_title='Mês/Ano',
+        yaxis_title='Valor (R$)',
+        barmode='group',
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+    
+    return fig
+
+@cache_figura
+def plot_ponto_equilibrio_mensal(serie):
+    """Gráfico da receita mensal contra o ponto de equilíbrio e a margem de segurança"""
+    if serie.empty or 'ponto_equilibrio' not in serie.columns:
+        return None
+    
+    fig = go.Figure()
+    x = serie['mes_ano']
+    
+    fig.add_trace(go.Bar(
+        x=x,
+        y=serie['receitas'],
+        name='Receitas',
+        marker_color='#2E8B57'
+    ))
+    
+    fig.add_trace(go.Scatter(
+        x=x,
+        y=serie['ponto_equilibrio'],
+        name='Ponto de Equilíbrio',
+        mode='lines+markers',
+        line=dict(color='#CD5C5C', width=3, dash='dash')
+    ))
+    
+    fig.add_trace(go.Scatter(
+        x=x,
+        y=serie['margem_seguranca'],
+        name='Margem de Segurança (%)',
+        mode='lines+markers',
+        line=dict(color='#4682B4', width=2),
+        yaxis='y2'
+    ))
+    
+    fig.update_layout(
+        title='Ponto de Equilíbrio Mensal (Martins, 2018)',
+        xaxis_title='Mês/Ano',
+        yaxis_title='Valor (R$)',
+        yaxis2=dict(title='Margem de Segurança (%)', overlaying='y', side='right', showgrid=False),
+        xaxis_tickangle=-45,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+    
+    return fig
+
+@cache_figura
+def plot_sensibilidade(grade, titulo, rotulo_valor):
+    """Mapa de calor dos cenários de variação de receita (linhas) e custos fixos (colunas)"""
+    if grade.empty:
+        return None
+    
+    fig = go.Figure(go.Heatmap(
+        z=grade.to_numpy(),
+        x=[f"{v:+.0f}%" for v in grade.columns],
+        y=[f"{v:+.0f}%" for v in grade.index],
+        colorscale='RdYlGn',
+        zmid=0,
+        colorbar=dict(title=rotulo_valor),
+        hovertemplate='Receita %{y} · Custos fixos %{x}<br>' + rotulo_valor + ': %{z:,.2f}<extra></extra>'
+    ))
+    
+    fig.update_layout(
+        title=titulo,
+        xaxis_title='Variação dos Custos Fixos',
+        yaxis_title='Variação da Receita'
+    )
+    
+    return fig
+
+def limitar_categorias(despesas_categoria, max_categorias=MAX_CATEGORIAS):
+    """Mantém as maiores categorias e agrupa as demais em 'Outras'"""
+    if len(despesas_categoria) <= max_categorias:
+        return despesas_categoria
+    
+    principais = despesas_categoria.nlargest(max_categorias - 1, 'saida')
+    demais = despesas_categoria.drop(principais.index)
+    outras = pd.DataFrame({
+        'categoria': ['Outras'],
+        'saida': [demais['saida'].sum()],
+        'percentual': [round(demais['percentual'].sum(), 1)]
+    })
+    principais = principais.astype({'categoria': object})
+    return pd.concat([principais, outras], ignore_index=True)
+
+@cache_figura
+def plot_analise_vertical(despesas_categoria):
+    """Cria gráfico de análise vertical conforme Pereira da Silva (2017)"""
+    # Verifica se há saídas agregadas por categoria para analisar
+    if despesas_categoria.empty or 'percentual' not in despesas_categoria.columns:
+        return None
+    
+    # Prepara dados para o gráfico de análise vertical de despesas
+    if 'categoria' in despesas_categoria.columns:
+        # Limita o número de barras enviadas ao navegador
+        despesas_categoria = limitar_categorias(despesas_categoria)
+        
+        # Cria o gráfico de barras
+        fig = px.bar(
+            despesas_categoria,
+            x='categoria',
+            y='percentual',
+            text='percentual',
+            title='Análise Vertical de Despesas (Pereira da Silva, 2017)',
+            color='saida',
+            color_continuous_scale=px.colors.sequential.Reds
+        )
+        
+        fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+        
+        fig.update_layout(
+            xaxis_title='Categoria',
+            yaxis_title='% do Total de Despesas',
+            xaxis_tickangle=-45,
+            yaxis=dict(range=[0, max(despesas_categoria['percentual']) * 1.1])
+        )
+        
+        return fig
+    
+    return None
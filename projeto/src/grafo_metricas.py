@@ -0,0 +1,358 @@
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from indice_acumulado import TERMOS_FIXOS_HISTORICO
+from estatisticas_mensais import calcular_estatisticas_mensais
+from graficos import GRANULARIDADES, agregar_serie_temporal
+from comparacao import MODOS_COMPARACAO, janela_comparacao, comparar_mensal
+from ponto_equilibrio import custos_mensais, serie_ponto_equilibrio
+from motor_analitico import agrupar_somas
+
+
+def calcular_custos_fixos_variaveis(df_movimentacoes):
+    """Calcula custos fixos e variáveis"""
+    # Verifica se há dados suficientes
+    if df_movimentacoes.empty or 'saida' not in df_movimentacoes.columns:
+        return pd.DataFrame(columns=['tipo_custo', 'saida'])
+
+    # Verifica se há saídas
+    eh_saida = df_movimentacoes['saida'] > 0
+    if not eh_saida.any():
+        return pd.DataFrame(columns=['tipo_custo', 'saida'])
+
+    # Agrega as saídas por tipo de custo (sem a coluna, todas ficam sem classificação)
+    if 'tipo_custo' in df_movimentacoes.columns:
+        custos_tipo = agrupar_somas(df_movimentacoes, ['tipo_custo'], ['saida'], positivos='saida')
+    else:
+        custos_tipo = pd.DataFrame({'tipo_custo': ['Não classificado'],
+                                    'saida': [df_movimentacoes.loc[eh_saida, 'saida'].sum()]})
+
+    # Se não houver classificação, cria uma básica
+    if len(custos_tipo) == 1 and custos_tipo.iloc[0]['tipo_custo'] == 'Não classificado':
+        # Verifica se tem a coluna historico
+        if 'historico' in df_movimentacoes.columns:
+            df_custos = df_movimentacoes[eh_saida].copy()
+
+            # Classifica com base no histórico
+            df_custos['tipo_custo'] = df_custos['historico'].apply(
+                lambda x: 'Fixo' if any(termo in str(x).lower() for termo in TERMOS_FIXOS_HISTORICO) else 'Variável'
+            )
+
+            # Reagrupa
+            custos_tipo = df_custos.groupby('tipo_custo', observed=True)['saida'].sum().reset_index()
+
+    return custos_tipo
+
+def calcular_ponto_equilibrio(total_receitas, custos_fixos, custos_variaveis):
+    """
+    Calcula o ponto de equilíbrio (Martins, 2018).
+
+    Returns:
+        dict: margem_contribuicao, indice_mc, ponto_equilibrio e folga (negativa quando
+            há déficit), ou None se não houver receitas suficientes para o cálculo
+    """
+    if not (total_receitas > 0 and custos_variaveis < total_receitas):
+        return None
+
+    # Margem de contribuição e seu índice
+    margem_contribuicao = total_receitas - custos_variaveis
+    indice_mc = margem_contribuicao / total_receitas
+
+    # Ponto de equilíbrio
+    pe = custos_fixos / indice_mc if indice_mc > 0 else 0
+
+    return {
+        'margem_contribuicao': margem_contribuicao,
+        'indice_mc': indice_mc,
+        'ponto_equilibrio': pe,
+        'folga': total_receitas - pe
+    }
+
+
+# --- Nós do grafo ------------------------------------------------------------
+# Cada nó recebe o grafo (para acessar as entradas) e os valores de suas dependências.
+
+def _no_periodo(grafo):
+    """Recorte do período nas três tabelas"""
+    inicio = pd.Timestamp(grafo.periodo_inicio)
+    fim = pd.Timestamp(grafo.periodo_fim)
+
+    def recortar(df, coluna):
+        if not df.empty and coluna in df.columns:
+            return df[(df[coluna] >= inicio) & (df[coluna] <= fim)]
+        return df.copy()
+
+    return {
+        'movimentacoes': recortar(grafo.df_movimentacoes, 'data'),
+        'despesas': recortar(grafo.df_despesas, 'data'),
+        'faturas': recortar(grafo.df_faturas, 'mes_referencia')
+    }
+
+def _no_custos_tipo(grafo, periodo):
+    """Saídas agregadas por tipo de custo"""
+    return calcular_custos_fixos_variaveis(periodo['movimentacoes'])
+
+def _no_totais(grafo, periodo):
+    """Receitas, despesas e divisão de custos fixos/variáveis do período"""
+    if grafo.indice is not None and not grafo.indice.vazio:
+        # Totais obtidos do índice de somas acumuladas, sem varrer o período
+        return grafo.indice.totais(grafo.periodo_inicio, grafo.periodo_fim)
+
+    mov_periodo = periodo['movimentacoes']
+    total_receitas = mov_periodo['entrada'].sum() if 'entrada' in mov_periodo.columns else 0
+    total_despesas = mov_periodo['saida'].sum() if 'saida' in mov_periodo.columns else 0
+
+    custos_tipo = grafo.obter('custos_tipo')
+    custos_fixos = 0
+    custos_variaveis = 0
+
+    if not custos_tipo.empty:
+        custos_fixos = custos_tipo[custos_tipo['tipo_custo'] == 'Fixo']['saida'].sum() if 'Fixo' in custos_tipo['tipo_custo'].values else 0
+        custos_variaveis = custos_tipo[custos_tipo['tipo_custo'] == 'Variável']['saida'].sum() if 'Variável' in custos_tipo['tipo_custo'].values else 0
+
+    return {
+        'total_receitas': total_receitas,
+        'total_despesas': total_despesas,
+        'custos_fixos': custos_fixos,
+        'custos_variaveis': custos_variaveis
+    }
+
+def _no_agregados_categoria(grafo, periodo):
+    """Saídas das movimentações por categoria, com percentual sobre o total (análise vertical)"""
+    mov_periodo = periodo['movimentacoes']
+    if mov_periodo.empty or 'saida' not in mov_periodo.columns or 'categoria' not in mov_periodo.columns:
+        return pd.DataFrame(columns=['categoria', 'saida', 'percentual'])
+
+    saidas = mov_periodo['saida'][mov_periodo['saida'] > 0]
+    if saidas.empty:
+        return pd.DataFrame(columns=['categoria', 'saida', 'percentual'])
+
+    despesas_categoria = agrupar_somas(mov_periodo, ['categoria'], ['saida'], positivos='saida')
+    despesas_categoria['percentual'] = (despesas_categoria['saida'] / saidas.sum() * 100).round(1)
+    return despesas_categoria.sort_values(by='saida', ascending=False)
+
+def _no_despesas_por_categoria(grafo, periodo, agregados_categoria):
+    """Despesas por categoria (tabela de despesas ou, na falta dela, saídas das movimentações)"""
+    despesas_periodo = periodo['despesas']
+
+    if not despesas_periodo.empty and 'categoria' in despesas_periodo.columns and 'valor' in despesas_periodo.columns:
+        return agrupar_somas(despesas_periodo, ['categoria'], ['valor'])
+
+    if not agregados_categoria.empty:
+        return (agregados_categoria[['categoria', 'saida']]
+                .rename(columns={'saida': 'valor'})
+                .sort_values(by='categoria')
+                .reset_index(drop=True))
+
+    return pd.DataFrame(columns=['categoria', 'valor'])
+
+def _no_agregados_mensais(grafo, periodo):
+    """Receitas, despesas e saldo por mês"""
+    mov_periodo = periodo['movimentacoes']
+    colunas = ['ano', 'mes', 'mes_ano', 'entrada', 'saida', 'valor_liquido']
+
+    if mov_periodo.empty or not all(col in mov_periodo.columns for col in colunas):
+        return pd.DataFrame(columns=colunas)
+
+    receitas_despesas_mes = agrupar_somas(mov_periodo, ['ano', 'mes', 'mes_ano'], ['entrada', 'saida', 'valor_liquido'])
+    return receitas_despesas_mes.sort_values(by=['ano', 'mes'])
+
+def _no_faturamento_mensal(grafo, periodo):
+    """Faturamento por mês (faturas ou, na falta delas, entradas das movimentações)"""
+    faturas_periodo = periodo['faturas']
+    mov_periodo = periodo['movimentacoes']
+    faturamento_mensal = pd.DataFrame(columns=['ano', 'mes', 'mes_ano', 'valor'])
+
+    if not faturas_periodo.empty and 'valor' in faturas_periodo.columns:
+        if 'ano' in faturas_periodo.columns and 'mes' in faturas_periodo.columns and 'mes_ano' in faturas_periodo.columns:
+            faturamento_mensal = agrupar_somas(faturas_periodo, ['ano', 'mes', 'mes_ano'], ['valor'])
+            faturamento_mensal = faturamento_mensal.sort_values(by=['ano', 'mes'])
+    elif not mov_periodo.empty and 'entrada' in mov_periodo.columns:
+        # Se não houver faturas, tenta usar as entradas de movimentações
+        tem_entradas = (mov_periodo['entrada'] > 0).any()
+        if tem_entradas and 'ano' in mov_periodo.columns and 'mes' in mov_periodo.columns and 'mes_ano' in mov_periodo.columns:
+            faturamento_mensal = agrupar_somas(mov_periodo, ['ano', 'mes', 'mes_ano'], ['entrada'], positivos='entrada')
+            faturamento_mensal.rename(columns={'entrada': 'valor'}, inplace=True)
+            faturamento_mensal = faturamento_mensal.sort_values(by=['ano', 'mes'])
+
+    return faturamento_mensal
+
+def _no_estatisticas_mensais(grafo, periodo):
+    """Quantidade, total, média, mediana, P90 e máximo mensais de receitas e despesas"""
+    return calcular_estatisticas_mensais(periodo['movimentacoes'])
+
+def _no_serie_temporal(granularidade):
+    """Cria o nó da série temporal (entradas, saídas e saldo) na granularidade informada"""
+    def no(grafo, periodo):
+        return agregar_serie_temporal(periodo['movimentacoes'], granularidade)
+    return no
+
+def _no_comparacao(modo):
+    """Cria o nó de comparação do período com o período anterior ou o mesmo período do ano anterior"""
+    def no(grafo):
+        atual = (grafo.periodo_inicio, grafo.periodo_fim)
+        anterior = janela_comparacao(grafo.periodo_inicio, grafo.periodo_fim, modo)
+
+        # Totais do período de comparação: consulta ao índice ou apenas o nó de totais
+        if grafo.indice is not None and not grafo.indice.vazio:
+            totais_anteriores = grafo.indice.totais(*anterior)
+        else:
+            totais_anteriores = GrafoMetricas(grafo.df_movimentacoes, grafo.df_despesas, grafo.df_faturas,
+                                              *anterior).obter('totais')
+
+        movimentacoes_mensal = comparar_mensal(grafo.df_movimentacoes, 'data',
+                                               ['entrada', 'saida', 'valor_liquido'], atual, anterior)
+
+        # Faturamento: faturas ou, na falta delas, entradas das movimentações
+        if not grafo.df_faturas.empty:
+            faturamento_mensal = comparar_mensal(grafo.df_faturas, 'mes_referencia', ['valor'], atual, anterior)
+        else:
+            faturamento_mensal = movimentacoes_mensal[['mes_ano', 'mes_ano_anterior', 'entrada_atual', 'entrada_anterior']].rename(
+                columns={'entrada_atual': 'valor_atual', 'entrada_anterior': 'valor_anterior'}
+            )
+
+        return {
+            'modo': modo,
+            'periodo_inicio': anterior[0],
+            'periodo_fim': anterior[1],
+            'totais': totais_anteriores,
+            'movimentacoes_mensal': movimentacoes_mensal,
+            'faturamento_mensal': faturamento_mensal
+        }
+    return no
+
+def _no_ponto_equilibrio(grafo, totais):
+    """Ponto de equilíbrio do período"""
+    return calcular_ponto_equilibrio(totais['total_receitas'], totais['custos_fixos'], totais['custos_variaveis'])
+
+def _no_ponto_equilibrio_mensal(grafo, periodo):
+    """Ponto de equilíbrio, margem de contribuição e margem de segurança de cada mês"""
+    return serie_ponto_equilibrio(custos_mensais(periodo['movimentacoes']))
+
+def _no_metricas(grafo, totais, despesas_por_categoria, faturamento_mensal, agregados_mensais, ponto_equilibrio,
+                 estatisticas_mensais):
+    """Pacote de métricas consumido pelo dashboard e pelo relatório em PDF"""
+    total_receitas = totais['total_receitas']
+    total_despesas = totais['total_despesas']
+    custos_fixos = totais['custos_fixos']
+
+    # KPIs
+    margem_lucro = 0 if total_receitas == 0 else (total_receitas - total_despesas) / total_receitas * 100
+
+    # Índice de fixação de despesas (Martins, 2018)
+    indice_fixacao = 0 if total_despesas == 0 else (custos_fixos / total_despesas) * 100
+
+    return {
+        'total_receitas': total_receitas,
+        'total_despesas': total_despesas,
+        'custos_fixos': custos_fixos,
+        'custos_variaveis': totais['custos_variaveis'],
+        'indice_fixacao': indice_fixacao,
+        'saldo': total_receitas - total_despesas,
+        'margem_lucro': margem_lucro,
+        'despesas_por_categoria': despesas_por_categoria,
+        'faturamento_mensal': faturamento_mensal,
+        'receitas_despesas_mes': agregados_mensais,
+        'ponto_equilibrio': ponto_equilibrio,
+        'estatisticas_mensais': estatisticas_mensais
+    }
+
+
+# Nome do nó -> (função, dependências)
+NOS = {
+    'periodo': (_no_periodo, []),
+    'custos_tipo': (_no_custos_tipo, ['periodo']),
+    'totais': (_no_totais, ['periodo']),
+    'agregados_categoria': (_no_agregados_categoria, ['periodo']),
+    'despesas_por_categoria': (_no_despesas_por_categoria, ['periodo', 'agregados_categoria']),
+    'agregados_mensais': (_no_agregados_mensais, ['periodo']),
+    'faturamento_mensal': (_no_faturamento_mensal, ['periodo']),
+    'estatisticas_mensais': (_no_estatisticas_mensais, ['periodo']),
+    'ponto_equilibrio': (_no_ponto_equilibrio, ['totais']),
+    'ponto_equilibrio_mensal': (_no_ponto_equilibrio_mensal, ['periodo']),
+    'metricas': (_no_metricas, ['totais', 'despesas_por_categoria', 'faturamento_mensal',
+                                'agregados_mensais', 'ponto_equilibrio', 'estatisticas_mensais']),
+}
+
+# Séries temporais por granularidade: serie_D, serie_W e serie_M
+for _granularidade in GRANULARIDADES:
+    NOS[f'serie_{_granularidade}'] = (_no_serie_temporal(_granularidade), ['periodo'])
+
+# Comparações: comparacao_ano_anterior e comparacao_periodo_anterior
+for _modo in MODOS_COMPARACAO:
+    NOS[f'comparacao_{_modo}'] = (_no_comparacao(_modo), [])
+
+
+class GrafoMetricas:
+    """
+    Grafo de métricas nomeadas com memoização.
+
+    Cada nó é calculado no máximo uma vez por grafo; gráficos, tabelas e o relatório
+    em PDF consultam os mesmos nós, evitando recortes e agrupamentos repetidos.
+    """
+    def __init__(self, df_movimentacoes, df_despesas, df_faturas, periodo_inicio, periodo_fim, indice=None):
+        """
+        Inicializa o grafo para um período.
+
+        Args:
+            df_movimentacoes (DataFrame): Movimentações bancárias
+            df_despesas (DataFrame): Despesas
+            df_faturas (DataFrame): Faturas
+            periodo_inicio (date): Data de início do período
+            periodo_fim (date): Data de fim do período
+            indice (IndiceAcumulado, optional): Índice de somas acumuladas para os totais
+        """
+        self.df_movimentacoes = df_movimentacoes
+        self.df_despesas = df_despesas
+        self.df_faturas = df_faturas
+        self.periodo_inicio = periodo_inicio
+        self.periodo_fim = periodo_fim
+        self.indice = indice
+        self._valores = {}
+        self._lock = threading.RLock()
+
+    def obter(self, nome):
+        """Retorna o valor de um nó, calculando-o (e suas dependências) apenas uma vez"""
+        with self._lock:
+            if nome not in self._valores:
+                funcao, dependencias = NOS[nome]
+                argumentos = [self.obter(dep) for dep in dependencias]
+                self._valores[nome] = funcao(self, *argumentos)
+            return self._valores[nome]
+
+    def calculados(self):
+        """Lista os nós já calculados"""
+        return list(self._valores)
+
+
+# Grafos memoizados por (versão dos dados, início, fim), compartilhados entre sessões
+_grafos = OrderedDict()
+_grafos_lock = threading.Lock()
+MAX_GRAFOS = 32
+
+def obter_grafo(versao, df_movimentacoes, df_despesas, df_faturas, periodo_inicio, periodo_fim, indice=None):
+    """Retorna o grafo memoizado para (versão, período), criando-o se necessário"""
+    chave = (versao, periodo_inicio, periodo_fim)
+    with _grafos_lock:
+        grafo = _grafos.get(chave)
+        if grafo is None:
+            grafo = GrafoMetricas(df_movimentacoes, df_despesas, df_faturas, periodo_inicio, periodo_fim, indice)
+            _grafos[chave] = grafo
+            # Descarta os grafos menos usados recentemente
+            while len(_grafos) > MAX_GRAFOS:
+                _grafos.popitem(last=False)
+        else:
+            _grafos.move_to_end(chave)
+    return grafo
+
+def descartar_grafos_versao(versao):
+    """Remove do cache os grafos de uma versão dos dados (inclusive os recortes por filial)"""
+    with _grafos_lock:
+        for chave in [chave for chave in _grafos if tuple(chave[0])[:len(versao)] == tuple(versao)]:
+            del _grafos[chave]
+
+def calcular_metricas(df_movimentacoes, df_despesas, df_faturas, periodo_inicio, periodo_fim, indice=None):
+    """Calcula as principais métricas financeiras para o período selecionado"""
+    return GrafoMetricas(df_movimentacoes, df_despesas, df_faturas, periodo_inicio, periodo_fim, indice).obter('metricas')
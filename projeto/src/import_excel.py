@@ -4,7 +4,10 @@ from datetime import datetime
 import re
 from sqlalchemy.orm import Session
 from models import PlanoContas, MovimentacaoBancaria
-from database import get_db
+from database import sessao
+from carga_movimentacoes import limpar_movimentacoes, substituir_movimentacoes
+from periodos import iniciar_aquecimento
+from snapshot_parquet import atualizar_em_segundo_plano
 import os
 import streamlit as st
 
@@ -163,20 +166,19 @@ def importar_plano_contas(arquivo_csv):
                     }
             
             # Limpa as tabelas - IMPORTANTE: primeiro movimentações, depois plano de contas
-            db = get_db()
-            db.query(MovimentacaoBancaria).delete()  # Primeiro limpa movimentações
-            db.query(PlanoContas).delete()           # Depois limpa plano de contas
-            
-            # Insere todos os registros do dicionário
-            for codigo, dados in codigos_plano.items():
-                conta = PlanoContas(
-                    codigo=codigo,
-                    descricao=dados['descricao'],
-                    categoria=dados['categoria']
-                )
-                db.add(conta)
+            with sessao(somente_leitura=False, descricao='importar_plano_contas') as db:
+                limpar_movimentacoes(db)                 # Primeiro limpa movimentações
+                db.query(PlanoContas).delete()           # Depois limpa plano de contas
+                
+                # Insere todos os registros do dicionário
+                for codigo, dados in codigos_plano.items():
+                    conta = PlanoContas(
+                        codigo=codigo,
+                        descricao=dados['descricao'],
+                        categoria=dados['categoria']
+                    )
+                    db.add(conta)
             
-            db.commit()
             return True, f"Importados {len(codigos_plano)} registros do plano de contas com sucesso!"
         else:
             return False, "Arquivo CSV não contém as colunas necessárias (Natureza, Nome Natureza)"
@@ -184,13 +186,7 @@ def importar_plano_contas(arquivo_csv):
     except Exception as e:
         import traceback
         traceback.print_exc()
-        if 'db' in locals():
-            db.rollback()
         return False, f"Erro ao importar plano de contas: {str(e)}"
-    
-    finally:
-        if 'db' in locals():
-            db.close()
 
 def importar_movimentacoes(arquivo_csv):
     """Importa as movimentações bancárias do CSV para o banco de dados"""
@@ -223,66 +219,39 @@ def importar_movimentacoes(arquivo_csv):
             axis=1
         )
         
-        # Limpa a tabela de movimentações
-        db = get_db()
-        db.query(MovimentacaoBancaria).delete()
+        # Movimentações no formato da tabela, com entidade e documento extraídos do histórico
+        info_historico = df['Historico'].map(extrair_info_historico)
+        carga = pd.DataFrame({
+            'filial': df['Filial Orig'].astype(str),
+            'data': df['Data'],
+            'banco': df['Banco'].astype(str),
+            'agencia': df['Agencia'].astype(str),
+            'conta': df['Conta Banco'].astype(str),
+            'natureza': df['Natureza'].astype(str),
+            'nome_natureza': df['Nome Natureza'].astype(str),
+            'documento': df['Documento'].astype(str),
+            'entrada': df['Entrada'],
+            'saida': df['Saida'],
+            'historico': df['Historico'].astype(str),
+            'categoria': df['Categoria'],
+            'tipo_custo': df['Tipo'],
+            'entidade': info_historico.map(lambda info: info.get('entidade', '')),
+            'documento_ref': info_historico.map(lambda info: info.get('documento_ref', ''))
+        })
         
-        # Adiciona os registros em lotes
-        registros = []
-        count = 0
+        # Substitui as movimentações (COPY no PostgreSQL, inserts em lote no SQLite)
+        with sessao(somente_leitura=False, descricao='importar_movimentacoes') as db:
+            count = substituir_movimentacoes(db, carga)
         
-        for _, row in df.iterrows():
-            try:
-                # Verifica se é uma linha válida com data
-                if pd.isna(row['Data']):
-                    continue
-                
-                # Extrai informações do histórico
-                info_extra = extrair_info_historico(row['Historico'])
-                
-                mov = MovimentacaoBancaria(
-                    filial=str(row['Filial Orig']),
-                    data=row['Data'],
-                    banco=str(row['Banco']),
-                    agencia=str(row['Agencia']),
-                    conta=str(row['Conta Banco']),
-                    natureza=str(row['Natureza']),
-                    nome_natureza=str(row['Nome Natureza']),
-                    documento=str(row['Documento']),
-                    entrada=row['Entrada'] if not pd.isna(row['Entrada']) else None,
-                    saida=row['Saida'] if not pd.isna(row['Saida']) else None,
-                    historico=str(row['Historico']),
-                    categoria=str(row.get('Categoria', 'Não categorizado')),
-                    tipo_custo=str(row.get('Tipo', 'Não classificado')),
-                    entidade=info_extra.get('entidade', ''),
-                    documento_ref=info_extra.get('documento_ref', '')
-                )
-                registros.append(mov)
-                count += 1
-                
-                # Commit a cada 50 registros
-                if len(registros) >= 50:
-                    db.add_all(registros)
-                    db.commit()
-                    registros = []
-            except Exception as e:
-                print(f"Erro ao processar linha {_}: {e}")
-                continue  # Pula para a próxima linha em caso de erro
+        # Pré-calcula em segundo plano as métricas dos períodos predefinidos
+        iniciar_aquecimento()
         
-        # Adiciona registros restantes
-        if registros:
-            db.add_all(registros)
-            db.commit()
+        # Atualiza em segundo plano as partições alteradas do snapshot em Parquet, se houver um
+        atualizar_em_segundo_plano()
             
         return True, f"Importados {count} registros de movimentações bancárias"
     
     except Exception as e:
         import traceback
         traceback.print_exc()
-        if 'db' in locals():
-            db.rollback()
-        return False, f"Erro ao importar movimentações: {str(e)}"
-    
-    finally:
-        if 'db' in locals():
-            db.close()
\ No newline at end of file
+        return False, f"Erro ao importar movimentações: {str(e)}"
\ No newline at end of file
@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+
+# Termos usados para classificar saídas quando não há tipo de custo definido
+TERMOS_FIXOS_HISTORICO = ['aluguel', 'salário', 'salario', 'folha', 'condomínio', 'condominio',
+                          'internet', 'telefone', 'água', 'agua', 'luz', 'energia']
+
+# Colunas do índice: valores em centavos e contagens de lançamentos de saída
+COLUNAS_INDICE = [
+    'entrada', 'saida',
+    'saida_fixo', 'saida_variavel',              # Classificação do tipo_custo
+    'saida_hist_fixo', 'saida_hist_variavel',    # Classificação pelo histórico
+    'n_fixo', 'n_variavel', 'n_nao_classificado', 'n_outros'
+]
+
+
+def para_centavos(valores):
+    """Converte valores monetários em inteiros de centavos (soma exata)"""
+    return np.rint(np.nan_to_num(np.asarray(valores, dtype='float64')) * 100).astype('int64')
+
+
+class IndiceAcumulado:
+    """
+    Índice de somas acumuladas por dia das movimentações bancárias.
+
+    Construído uma vez por versão dos dados, permite obter os totais de qualquer
+    período com duas buscas binárias e uma subtração, sem varrer o DataFrame.
+    """
+    def __init__(self, df_movimentacoes):
+        """
+        Constrói o índice a partir do DataFrame de movimentações.
+
+        Args:
+            df_movimentacoes (DataFrame): Movimentações com as colunas data, entrada,
+                saida, tipo_custo e historico
+        """
+        self.dias = np.array([], dtype='datetime64[D]')
+        self.acumulado = np.zeros((1, len(COLUNAS_INDICE)), dtype='int64')
+
+        if df_movimentacoes.empty or 'data' not in df_movimentacoes.columns:
+            return
+
+        df = df_movimentacoes
+        entrada = para_centavos(df['entrada'])
+        saida = para_centavos(df['saida'])
+        eh_saida = saida > 0
+
+        tipo = df['tipo_custo'].astype(object) if 'tipo_custo' in df.columns else pd.Series('Não classificado', index=df.index)
+        eh_fixo = (tipo == 'Fixo').to_numpy()
+        eh_variavel = (tipo == 'Variável').to_numpy()
+        eh_nao_classificado = (tipo == 'Não classificado').to_numpy()
+        eh_outro = (tipo.notna().to_numpy() & ~eh_fixo & ~eh_variavel & ~eh_nao_classificado)
+
+        # Classificação alternativa pelo histórico (mesma regra de calcular_custos_fixos_variaveis)
+        if 'historico' in df.columns:
+            padrao = '|'.join(TERMOS_FIXOS_HISTORICO)
+            hist_fixo = df['historico'].astype(str).str.lower().str.contains(padrao, regex=True).to_numpy()
+        else:
+            hist_fixo = np.zeros(len(df), dtype=bool)
+
+        valores = pd.DataFrame({
+            'entrada': entrada,
+            'saida': saida,
+            'saida_fixo': np.where(eh_fixo, saida, 0),
+            'saida_variavel': np.where(eh_variavel, saida, 0),
+            'saida_hist_fixo': np.where(hist_fixo, saida, 0),
+            'saida_hist_variavel': np.where(~hist_fixo, saida, 0),
+            'n_fixo': (eh_saida & eh_fixo).astype('int64'),
+            'n_variavel': (eh_saida & eh_variavel).astype('int64'),
+            'n_nao_classificado': (eh_saida & eh_nao_classificado).astype('int64'),
+            'n_outros': (eh_saida & eh_outro).astype('int64'),
+        }, index=df['data'].to_numpy().astype('datetime64[D]'))
+
+        # Agrega por dia e acumula (com uma linha de zeros no início)
+        por_dia = valores.groupby(level=0).sum().sort_index()
+        self.dias = por_dia.index.to_numpy().astype('datetime64[D]')
+        self.acumulado = np.vstack([
+            np.zeros((1, len(COLUNAS_INDICE)), dtype='int64'),
+            np.cumsum(por_dia[COLUNAS_INDICE].to_numpy(dtype='int64'), axis=0)
+        ])
+
+    @classmethod
+    def combinar(cls, indices):
+        """
+        Combina índices de partições disjuntas (ex.: filiais) em um único índice.
+
+        As somas diárias de cada partição são alinhadas na união dos dias e
+        acumuladas novamente, sem reprocessar os lançamentos.
+
+        Args:
+            indices (list): Índices construídos sobre partições sem lançamentos em comum
+
+        Returns:
+            IndiceAcumulado: Índice equivalente ao construído sobre todas as partições
+        """
+        combinado = cls(pd.DataFrame())
+        indices = [indice for indice in indices if not indice.vazio]
+        if not indices:
+            return combinado
+
+        dias = np.unique(np.concatenate([indice.dias for indice in indices]))
+        por_dia = np.zeros((len(dias), len(COLUNAS_INDICE)), dtype='int64')
+        for indice in indices:
+            posicoes = np.searchsorted(dias, indice.dias)
+            por_dia[posicoes] += np.diff(indice.acumulado, axis=0)
+
+        combinado.dias = dias
+        combinado.acumulado = np.vstack([
+            np.zeros((1, len(COLUNAS_INDICE)), dtype='int64'),
+            np.cumsum(por_dia, axis=0)
+        ])
+        return combinado
+
+    @property
+    def vazio(self):
+        """Indica se o índice não possui nenhum dia"""
+        return len(self.dias) == 0
+
+    def somas(self, periodo_inicio, periodo_fim):
+        """Retorna as somas brutas (centavos e contagens) de cada coluna no período"""
+        i = np.searchsorted(self.dias, np.datetime64(periodo_inicio, 'D'), side='left')
+        j = np.searchsorted(self.dias, np.datetime64(periodo_fim, 'D'), side='right')
+        j = max(i, j)
+        return dict(zip(COLUNAS_INDICE, (self.acumulado[j] - self.acumulado[i]).tolist()))
+
+    def totais(self, periodo_inicio, periodo_fim):
+        """
+        Calcula os totais do período em O(log n).
+
+        Args:
+            periodo_inicio (date): Data de início do período (inclusiva)
+            periodo_fim (date): Data de fim do período (inclusiva)
+
+        Returns:
+            dict: total_receitas, total_despesas, custos_fixos e custos_variaveis
+        """
+        s = self.somas(periodo_inicio, periodo_fim)
+
+        # Sem classificação no período: usa o histórico, como em calcular_custos_fixos_variaveis
+        sem_classificacao = (s['n_nao_classificado'] > 0 and
+                             s['n_fixo'] == 0 and s['n_variavel'] == 0 and s['n_outros'] == 0)
+        if sem_classificacao:
+            custos_fixos, custos_variaveis = s['saida_hist_fixo'], s['saida_hist_variavel']
+        else:
+            custos_fixos, custos_variaveis = s['saida_fixo'], s['saida_variavel']
+
+        return {
+            'total_receitas': s['entrada'] / 100,
+            'total_despesas': s['saida'] / 100,
+            'custos_fixos': custos_fixos / 100,
+            'custos_variaveis': custos_variaveis / 100
+        }
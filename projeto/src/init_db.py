@@ -4,9 +4,10 @@ import sys
 # Adiciona o diretório atual ao path para poder importar os módulos
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from database import engine, test_connection, IS_SQLITE
+from database import engine, test_connection, com_sessao, IS_SQLITE
 from models import Base, Cliente, Servico, Despesa, Fatura, StatusServico
 from sqlalchemy import text
+from busca_textual import reconstruir_indice_textual
 
 def init_db():
     """Inicializa o banco de dados criando todas as tabelas definidas nos modelos"""
@@ -22,6 +23,9 @@ def init_db():
         Base.metadata.create_all(bind=engine)
         print("Tabelas criadas com sucesso!")
         
+        # Cria o índice de busca textual das movimentações
+        reconstruir_indice_textual()
+        
         # Verifica se as tabelas foram criadas
         with engine.connect() as conn:
             # Lista as tabelas no banco
@@ -42,12 +46,11 @@ def init_db():
         traceback.print_exc()
         return False
 
-def insert_sample_data():
+@com_sessao(somente_leitura=False)
+def insert_sample_data(db=None):
     """Insere dados de exemplo no banco para testes"""
-    from database import get_db
     from datetime import date, timedelta
     
-    db = get_db()
     try:
         # Verifica se já existem dados
         clientes = db.query(Cliente).all()
@@ -178,8 +181,6 @@ def insert_sample_data():
         import traceback
         traceback.print_exc()
         return False
-    finally:
-        db.close()
 
 if __name__ == "__main__":
     if init_db():
@@ -0,0 +1,103 @@
+import os
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Linhas lidas do banco por vez nas leituras em lotes
+TAMANHO_LOTE_LEITURA = int(os.getenv('DB_LOTE_LEITURA', '5000'))
+
+
+def ler_em_lotes(db, consulta, tamanho_lote=TAMANHO_LOTE_LEITURA):
+    """
+    Executa uma consulta de colunas e entrega o resultado em lotes de DataFrames.
+
+    No PostgreSQL, stream_results abre um cursor no servidor e as linhas só são
+    transferidas à medida que cada lote é pedido; no SQLite o cursor já avança sob
+    demanda e cada lote é lido com fetchmany. Em nenhum dos casos o resultado
+    inteiro fica no cliente, e nenhum objeto ORM é criado.
+
+    Args:
+        db (Session): Sessão do banco de dados
+        consulta (Select): Consulta das colunas desejadas (select(...) ou Query.statement)
+        tamanho_lote (int): Quantidade de linhas por lote
+
+    Yields:
+        DataFrame: Próximo lote, com as colunas da consulta
+    """
+    resultado = db.execute(consulta, execution_options={'stream_results': True, 'yield_per': tamanho_lote})
+    try:
+        colunas = list(resultado.keys())
+        for linhas in resultado.partitions():
+            yield pd.DataFrame.from_records([tuple(linha) for linha in linhas], columns=colunas)
+    finally:
+        resultado.close()
+
+def concatenar_lotes(lotes, colunas_categoricas=()):
+    """
+    Junta lotes já compactados em um único DataFrame.
+
+    As colunas categóricas de cada lote têm categorias próprias; elas são unidas
+    (em ordem alfabética, como em astype('category')) em vez de voltarem a texto.
+    """
+    lotes = list(lotes)
+    if not lotes:
+        return pd.DataFrame()
+
+    categoricas = [col for col in colunas_categoricas if col in lotes[0].columns]
+    unidas = {
+        col: union_categoricals([lote[col] for lote in lotes], sort_categories=True, ignore_order=True)
+        for col in categoricas
+    }
+    df = pd.concat([lote.drop(columns=categoricas) for lote in lotes], ignore_index=True)
+    for col, valores in unidas.items():
+        df[col] = valores
+    return df[list(lotes[0].columns)]
+
+def exportar_csv(lotes, destino, **opcoes):
+    """
+    Grava os lotes em CSV à medida que são lidos, com o cabeçalho apenas no primeiro.
+
+    Args:
+        lotes (iterable): DataFrames com as mesmas colunas
+        destino (file): Arquivo de texto aberto para escrita
+        **opcoes: Opções adicionais de DataFrame.to_csv (sep, decimal, date_format...)
+
+    Returns:
+        int: Quantidade de linhas gravadas
+    """
+    total = 0
+    for lote in lotes:
+        lote.to_csv(destino, index=False, header=total == 0, **opcoes)
+        total += len(lote)
+    return total
+
+def exportar_xlsx(lotes, destino, nome_planilha='Dados'):
+    """
+    Grava os lotes em uma planilha XLSX no modo somente escrita do openpyxl.
+
+    Nesse modo as linhas são enviadas ao arquivo à medida que são adicionadas, em
+    vez de a planilha inteira ser montada em memória.
+
+    Args:
+        lotes (iterable): DataFrames com as mesmas colunas
+        destino (str | file): Caminho ou arquivo binário aberto para escrita
+        nome_planilha (str): Nome da aba
+
+    Returns:
+        int: Quantidade de linhas gravadas
+    """
+    from openpyxl import Workbook
+
+    planilha = Workbook(write_only=True)
+    aba = planilha.create_sheet(nome_planilha)
+    total = 0
+    for lote in lotes:
+        if total == 0:
+            aba.append(list(lote.columns))
+        # Valores ausentes viram células vazias
+        lote = lote.astype(object).where(lote.notna(), None)
+        for linha in lote.itertuples(index=False, name=None):
+            aba.append(linha)
+        total += len(lote)
+    planilha.save(destino)
+    return total
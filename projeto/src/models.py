@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Enum, Text
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Enum, Text, Index
 from sqlalchemy.orm import declarative_base, relationship
 from datetime import date
 import enum
@@ -40,6 +40,10 @@ class Servico(Base):
 
 class Despesa(Base):
     __tablename__ = 'despesas'
+    __table_args__ = (
+        # Recorte das despesas por período
+        Index('ix_despesas_data_despesa', 'data_despesa'),
+    )
     
     id = Column(Integer, primary_key=True)
     descricao = Column(String(200), nullable=False)
@@ -54,6 +58,10 @@ class Despesa(Base):
 
 class Fatura(Base):
     __tablename__ = 'faturas'
+    __table_args__ = (
+        # Recorte do faturamento por mês de referência
+        Index('ix_faturas_mes_referencia', 'mes_referencia'),
+    )
     
     id = Column(Integer, primary_key=True)
     cliente_id = Column(Integer, ForeignKey('clientes.id'), nullable=False)
@@ -78,6 +86,18 @@ class PlanoContas(Base):
     
 class MovimentacaoBancaria(Base):
     __tablename__ = 'movimentacoes'
+    __table_args__ = (
+        # Recorte por período e paginação por chave (data, id) no explorador de lançamentos
+        Index('ix_movimentacoes_data_id', 'data', 'id'),
+        # Recorte do dashboard por filial e período
+        Index('ix_movimentacoes_filial_data', 'filial', 'data'),
+        # Filtros do explorador combinados com o período
+        Index('ix_movimentacoes_categoria_data', 'categoria', 'data'),
+        Index('ix_movimentacoes_tipo_custo_data', 'tipo_custo', 'data'),
+        Index('ix_movimentacoes_natureza', 'natureza'),
+        # No PostgreSQL, varchar_pattern_ops permite usar o índice na busca por prefixo (LIKE 'x%')
+        Index('ix_movimentacoes_entidade', 'entidade', postgresql_ops={'entidade': 'varchar_pattern_ops'}),
+    )
     
     id = Column(Integer, primary_key=True)
     filial = Column(String(10), nullable=False)
@@ -98,4 +118,11 @@ class MovimentacaoBancaria(Base):
     documento_ref = Column(String(50))  # Referência a NF ou documento extraído do histórico
     
     # Relacionamento
-    conta_natureza = relationship("PlanoContas")
\ No newline at end of file
+    conta_natureza = relationship("PlanoContas")
+
+class ControleDados(Base):
+    __tablename__ = 'controle_dados'
+    
+    id = Column(Integer, primary_key=True)
+    # Incrementada a cada importação; faz parte da versão dos dados usada pelos caches
+    geracao = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,117 @@
+import importlib.util
+import os
+import threading
+
+# O DuckDB é opcional: sem ele, as agregações continuam no pandas
+DUCKDB_DISPONIVEL = importlib.util.find_spec('duckdb') is not None
+
+# Motor das agregações do dashboard: 'auto' (DuckDB para tabelas grandes, quando
+# instalado), 'duckdb' (sempre que instalado) ou 'pandas'
+MOTOR_ANALITICO = os.getenv('MOTOR_ANALITICO', 'auto')
+if MOTOR_ANALITICO not in ('auto', 'duckdb', 'pandas'):
+    print(f"⚠️ Motor analítico desconhecido '{MOTOR_ANALITICO}'; usando 'auto'")
+    MOTOR_ANALITICO = 'auto'
+
+# No modo automático, tabelas menores que isto são agregadas no pandas: o custo fixo
+# de cada consulta no DuckDB (alguns ms) só compensa a partir de ~100 mil linhas em um
+# núcleo, e antes disso com mais threads (veja benchmarks/agregacoes_duckdb.py)
+LIMITE_LINHAS_DUCKDB = int(os.getenv('DUCKDB_LIMITE_LINHAS', '100000'))
+
+# Threads usadas pelo DuckDB em cada consulta
+THREADS_DUCKDB = int(os.getenv('DUCKDB_THREADS', str(os.cpu_count() or 1)))
+
+_conexao = None
+_conexao_lock = threading.Lock()
+_ultima_falha = None
+
+
+def usar_duckdb(linhas):
+    """Indica se uma tabela com esta quantidade de linhas deve ser agregada no DuckDB"""
+    if not DUCKDB_DISPONIVEL or MOTOR_ANALITICO == 'pandas':
+        return False
+    return MOTOR_ANALITICO == 'duckdb' or linhas >= LIMITE_LINHAS_DUCKDB
+
+def _cursor():
+    """
+    Nova conexão com o banco DuckDB em memória do processo.
+
+    Cada consulta usa a sua (cursor() duplica a conexão base), de modo que as
+    sessões do Streamlit podem consultar ao mesmo tempo.
+    """
+    global _conexao
+    with _conexao_lock:
+        if _conexao is None:
+            import duckdb
+            _conexao = duckdb.connect(config={'threads': THREADS_DUCKDB})
+        return _conexao.cursor()
+
+def _agrupar_duckdb(df, chaves, valores, positivos):
+    """Executa a agregação de agrupar_somas no DuckDB, lendo as colunas do DataFrame sem copiá-las"""
+    lista_chaves = ', '.join(f'"{coluna}"' for coluna in chaves)
+    somas = ', '.join(f'coalesce(fsum("{coluna}"), 0) AS "{coluna}"' for coluna in valores)
+
+    # Como no groupby do pandas, linhas com chave ausente ficam de fora
+    condicoes = [f'"{coluna}" IS NOT NULL' for coluna in chaves]
+    if positivos:
+        condicoes.append(f'"{positivos}" > 0')
+
+    # Registra apenas as colunas usadas: cada coluna categórica registrada vira um ENUM
+    colunas = list(dict.fromkeys([*chaves, *valores, *([positivos] if positivos else [])]))
+
+    cursor = _cursor()
+    try:
+        cursor.register('dados', df[colunas])
+        resultado = cursor.execute(
+            f"SELECT {lista_chaves}, {somas} FROM dados WHERE {' AND '.join(condicoes)} GROUP BY {lista_chaves}"
+        ).df()
+    finally:
+        cursor.close()
+
+    # Restaura os tipos das chaves (inclusive as categorias) e a ordem do groupby
+    for coluna in chaves:
+        resultado[coluna] = resultado[coluna].astype(df[coluna].dtype)
+    return resultado.sort_values(chaves).reset_index(drop=True)
+
+def agrupar_somas(df, chaves, valores, positivos=None):
+    """
+    Soma colunas por grupo, no DuckDB (vetorizado e com várias threads) ou no pandas.
+
+    Equivale a df.groupby(chaves, observed=True)[valores].sum().reset_index(): as
+    chaves mantêm seus tipos e os grupos saem na mesma ordem. Se o DuckDB falhar,
+    a agregação é refeita no pandas.
+
+    Args:
+        df (DataFrame): Tabela a agregar
+        chaves (list): Colunas de agrupamento
+        valores (list): Colunas somadas
+        positivos (str, optional): Considera apenas as linhas em que esta coluna é maior que zero
+
+    Returns:
+        DataFrame: Colunas das chaves seguidas das somas
+    """
+    global _ultima_falha
+    if usar_duckdb(len(df)):
+        try:
+            return _agrupar_duckdb(df, chaves, valores, positivos)
+        except Exception as e:
+            _ultima_falha = str(e)
+            print(f"⚠️ Falha na agregação pelo DuckDB; usando o pandas: {e}")
+
+    if positivos:
+        df = df[df[positivos] > 0]
+    return df.groupby(chaves, observed=True)[valores].sum().reset_index()
+
+def estado():
+    """Resumo da configuração do motor analítico para a página de diagnóstico"""
+    versao = None
+    if DUCKDB_DISPONIVEL:
+        import duckdb
+        versao = duckdb.__version__
+    return {
+        'motor': MOTOR_ANALITICO,
+        'duckdb_disponivel': DUCKDB_DISPONIVEL,
+        'versao_duckdb': versao,
+        'limite_linhas': LIMITE_LINHAS_DUCKDB,
+        'threads': THREADS_DUCKDB,
+        'ultima_falha': _ultima_falha
+    }
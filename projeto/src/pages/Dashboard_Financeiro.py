@@ -1,11 +1,15 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import calendar
 import sys
+import time
 import os
+import io
+import functools
 from dateutil.relativedelta import relativedelta
 from report_generator import gerar_relatorio_financeiro, criar_link_download
 
@@ -13,434 +17,781 @@ from report_generator import gerar_relatorio_financeiro, criar_link_download
 # Adiciona o diretório src ao path para poder importar os módulos
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database import get_db, test_connection
-from models import Despesa, Fatura, MovimentacaoBancaria, PlanoContas
+from database import sessao
+from saude_banco import saude_banco
+from database_async import executar_em_paralelo
+from dados_financeiros import relatorio_memoria, versao_dados
+from snapshots import SnapshotDados, ReferenciaSnapshot, armazem
+from filiais import FILIAL_CONSOLIDADO
+from grafo_metricas import obter_grafo
+from consultas import consultar_pagina_movimentacoes, limites_datas, listar_filiais, lotes_movimentacoes, resumo_kpis
+from leitura_em_lotes import exportar_csv, exportar_xlsx
+from comparacao import MODOS_COMPARACAO, janela_comparacao, delta_percentual
+from periodos import PERIODOS_PREDEFINIDOS, intervalos_predefinidos, iniciar_aquecimento, estado_aquecimento
+from ponto_equilibrio import grade_sensibilidade
+from estatisticas_mensais import tabela_estatisticas_mensais
+from graficos import (
+    plot_receitas_despesas, plot_despesas_categoria, plot_custos_fixos_variaveis,
+    plot_faturamento_mensal, plot_analise_vertical, plot_comparacao_mensal, plot_ponto_equilibrio_mensal,
+    plot_sensibilidade, escolher_granularidade,
+    GRANULARIDADES, ORCAMENTO_PONTOS, usa_webgl, contar_pontos, tamanho_payload, cache_figuras
+)
 
-def load_data():
+def obter_snapshot_sessao(versao):
+    """
+    Retorna o snapshot compartilhado da versão, mantendo uma referência por sessão.
+    
+    Ao passar para uma nova versão, a sessão libera a anterior; o armazém descarta
+    as versões antigas quando nenhuma sessão as usa mais.
+    """
+    referencia = st.session_state.get('referencia_snapshot')
+    if referencia is not None and referencia.versao == versao:
+        return referencia.snapshot
+    
+    nova = ReferenciaSnapshot(armazem, versao, functools.partial(SnapshotDados.carregar_versao, versao))
+    st.session_state['referencia_snapshot'] = nova
+    if referencia is not None:
+        referencia.liberar()
+    return nova.snapshot
+
+def load_data(versao):
     """Carrega todos os dados necessários para o dashboard"""
-    db = get_db()
     try:
-        # Carrega despesas
-        despesas = db.query(Despesa).all()
-        
-        # Carrega faturas
-        faturas = db.query(Fatura).all()
-        
-        # Carrega movimentações bancárias
-        movimentacoes = db.query(MovimentacaoBancaria).all()
-        
-        # Carrega plano de contas
-        plano_contas = db.query(PlanoContas).all()
-        
-        return {
-            'despesas': despesas,
-            'faturas': faturas,
-            'movimentacoes': movimentacoes,
-            'plano_contas': plano_contas
-        }
+        # Os DataFrames vêm do snapshot compartilhado por todas as sessões
+        snapshot = obter_snapshot_sessao(versao)
+        return {'versao': versao, 'particoes': snapshot.particoes, **snapshot.dataframes()}
     except Exception as e:
         st.error(f"Erro ao carregar dados: {e}")
         return None
-    finally:
-        db.close()
-
-def get_month_name(month_number):
-    """Retorna o nome do mês em português"""
-    months = {
-        1: 'Janeiro', 2: 'Fevereiro', 3: 'Março', 4: 'Abril',
-        5: 'Maio', 6: 'Junho', 7: 'Julho', 8: 'Agosto',
-        9: 'Setembro', 10: 'Outubro', 11: 'Novembro', 12: 'Dezembro'
-    }
-    return months.get(month_number, '')
 
-def create_movimentacoes_df(movimentacoes):
-    """Cria DataFrame para análise de movimentações"""
-    if not movimentacoes:
-        return pd.DataFrame()
+@st.fragment
+def consulta_rapida_periodo(indice, data_min, data_max, periodo_inicio, periodo_fim):
+    """Exibe totais instantâneos de um intervalo escolhido no controle deslizante"""
+    with st.expander("Consulta Rápida de Período"):
+        # O controle deslizante precisa de valores dentro dos limites dos dados
+        inicio = min(max(periodo_inicio, data_min), data_max)
+        fim = max(min(periodo_fim, data_max), inicio)
+        
+        intervalo = st.slider(
+            "Intervalo",
+            min_value=data_min,
+            max_value=data_max,
+            value=(inicio, fim),
+            format="DD/MM/YYYY"
+        )
         
-    data = []
-    for m in movimentacoes:
-        data.append({
-            'data': m.data,
-            'mes': m.data.month,
-            'ano': m.data.year,
-            'mes_ano': f"{get_month_name(m.data.month)}/{m.data.year}",
-            'natureza': m.natureza,
-            'nome_natureza': m.nome_natureza if hasattr(m, 'nome_natureza') else '',
-            'categoria': m.categoria if hasattr(m, 'categoria') else '',
-            'tipo_custo': m.tipo_custo if hasattr(m, 'tipo_custo') else 'Não classificado',
-            'entrada': m.entrada if m.entrada else 0,
-            'saida': m.saida if m.saida else 0,
-            'valor_liquido': (m.entrada if m.entrada else 0) - (m.saida if m.saida else 0),
-            'historico': m.historico
-        })
-    return pd.DataFrame(data)
+        totais = indice.totais(intervalo[0], intervalo[1])
+        st.metric("Receitas", f"R$ {totais['total_receitas']:,.2f}")
+        st.metric("Despesas", f"R$ {totais['total_despesas']:,.2f}")
+        st.metric("Resultado", f"R$ {totais['total_receitas'] - totais['total_despesas']:,.2f}")
 
-def create_despesas_df(despesas):
-    """Cria DataFrame para análise de despesas"""
-    if not despesas:
-        return pd.DataFrame()
-        
-    data = []
-    for d in despesas:
-        if hasattr(d, 'data_despesa') and d.data_despesa:
-            data.append({
-                'data': d.data_despesa,
-                'mes': d.data_despesa.month,
-                'ano': d.data_despesa.year,
-                'mes_ano': f"{get_month_name(d.data_despesa.month)}/{d.data_despesa.year}",
-                'descricao': d.descricao,
-                'categoria': d.categoria,
-                'tipo': d.tipo if hasattr(d, 'tipo') else 'Variável',
-                'valor': d.valor
-            })
-    return pd.DataFrame(data)
-
-def create_faturas_df(faturas):
-    """Cria DataFrame para análise de faturas"""
-    if not faturas:
-        return pd.DataFrame()
-        
-    data = []
-    for f in faturas:
-        try:
-            if hasattr(f, 'mes_referencia') and f.mes_referencia:
-                data.append({
-                    'data_emissao': f.data_emissao,
-                    'mes_referencia': f.mes_referencia,
-                    'mes': f.mes_referencia.month,
-                    'ano': f.mes_referencia.year,
-                    'mes_ano': f"{get_month_name(f.mes_referencia.month)}/{f.mes_referencia.year}",
-                    'valor': f.valor,
-                    'status': f.status
-                })
-        except Exception as e:
-            print(f"Erro ao processar fatura {f.id if hasattr(f, 'id') else 'desconhecido'}: {e}")
-    return pd.DataFrame(data)
-
-def calcular_custos_fixos_variaveis(df_movimentacoes):
-    """Calcula custos fixos e variáveis"""
-    # Verifica se há dados suficientes
-    if df_movimentacoes.empty or 'saida' not in df_movimentacoes.columns:
-        return pd.DataFrame(columns=['tipo_custo', 'saida'])
-    
-    # Filtra apenas as saídas
-    df_custos = df_movimentacoes[df_movimentacoes['saida'] > 0].copy()
-    
-    # Verifica se há saídas
-    if df_custos.empty:
-        return pd.DataFrame(columns=['tipo_custo', 'saida'])
-    
-    # Verifica se tem a coluna tipo_custo
-    if 'tipo_custo' not in df_custos.columns:
-        df_custos['tipo_custo'] = 'Não classificado'
-    
-    # Agrega por tipo de custo
-    custos_tipo = df_custos.groupby('tipo_custo')['saida'].sum().reset_index()
-    
-    # Se não houver classificação, cria uma básica
-    if len(custos_tipo) == 1 and custos_tipo.iloc[0]['tipo_custo'] == 'Não classificado':
-        # Verifica se tem a coluna historico
-        if 'historico' in df_custos.columns:
-            # Identifica custos fixos comuns
-            termos_fixos = ['aluguel', 'salário', 'salario', 'folha', 'condomínio', 'condominio', 
-                            'internet', 'telefone', 'água', 'agua', 'luz', 'energia']
-            
-            # Classifica com base no histórico
-            df_custos['tipo_custo'] = df_custos['historico'].apply(
-                lambda x: 'Fixo' if any(termo in str(x).lower() for termo in termos_fixos) else 'Variável'
-            )
-            
-            # Reagrupa
-            custos_tipo = df_custos.groupby('tipo_custo')['saida'].sum().reset_index()
-    
-    return custos_tipo
+SECOES = ["Visão Geral", "Análise de Custos", "Análise Temporal", "Lançamentos"]
 
-def calcular_metricas(df_movimentacoes, df_despesas, df_faturas, periodo_inicio, periodo_fim):
-    """Calcula as principais métricas financeiras para o período selecionado"""
-    # Verifica se os DataFrames têm as colunas necessárias
-    mov_periodo = pd.DataFrame()
-    despesas_periodo = pd.DataFrame()
-    faturas_periodo = pd.DataFrame()
-    
-    # Filtra movimentações pelo período
-    if not df_movimentacoes.empty and 'data' in df_movimentacoes.columns:
-        mov_periodo = df_movimentacoes[(df_movimentacoes['data'] >= periodo_inicio) & 
-                                      (df_movimentacoes['data'] <= periodo_fim)]
+# Filtros do explorador de lançamentos: (coluna, rótulo)
+FILTROS_EXPLORADOR = [
+    ('categoria', 'Categoria'),
+    ('tipo_custo', 'Tipo de Custo'),
+    ('natureza', 'Natureza')
+]
+
+# Títulos das colunas exibidas no explorador de lançamentos
+TITULOS_LANCAMENTOS = {
+    'data': 'Data', 'natureza': 'Natureza', 'nome_natureza': 'Nome da Natureza',
+    'categoria': 'Categoria', 'tipo_custo': 'Tipo de Custo', 'entidade': 'Entidade',
+    'documento': 'Documento', 'historico': 'Histórico', 'entrada': 'Entrada (R$)', 'saida': 'Saída (R$)'
+}
+
+# Formatos de exportação dos lançamentos: rótulo -> (extensão, tipo MIME)
+FORMATOS_EXPORTACAO = {
+    'CSV': ('csv', 'text/csv'),
+    'Excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+}
+
+def exibir_grafico(fig, nome, chave=None):
+    """
+    Exibe um gráfico Plotly e, no modo de depuração, o tamanho do payload enviado.
+    
+    Com uma chave, os pontos do gráfico podem ser selecionados e o evento de
+    seleção é retornado.
+    """
+    if chave:
+        evento = st.plotly_chart(fig, use_container_width=True, key=chave,
+                                 on_select="rerun", selection_mode="points")
     else:
-        mov_periodo = df_movimentacoes.copy()
+        evento = st.plotly_chart(fig, use_container_width=True)
     
-    # Filtra despesas pelo período
-    if not df_despesas.empty and 'data' in df_despesas.columns:
-        despesas_periodo = df_despesas[(df_despesas['data'] >= periodo_inicio) & 
-                                      (df_despesas['data'] <= periodo_fim)]
+    if st.session_state.get('depuracao_graficos'):
+        st.caption(
+            f"🔧 {nome}: {contar_pontos(fig):,} pontos · "
+            f"{tamanho_payload(fig) / 1024:,.1f} KB · "
+            f"{'WebGL' if usa_webgl(fig) else 'SVG'}"
+        )
+    
+    return evento
+
+def nova_selecao(evento, chave):
+    """Retorna o primeiro ponto selecionado no gráfico, apenas quando a seleção mudou"""
+    pontos = list(evento.get('selection', {}).get('points', [])) if evento else []
+    assinatura = repr(pontos)
+    if st.session_state.get(f'{chave}_processada') == assinatura:
+        return None
+    st.session_state[f'{chave}_processada'] = assinatura
+    return pontos[0] if pontos else None
+
+def intervalo_do_ponto(linha, granularidade, periodo_inicio, periodo_fim):
+    """Converte um ponto da série temporal no intervalo de datas que ele representa"""
+    if granularidade == 'M':
+        mes = pd.Period(year=int(linha['ano']), month=int(linha['mes']), freq='M')
+        inicio, fim = mes.start_time.date(), mes.end_time.date()
     else:
-        despesas_periodo = df_despesas.copy()
+        inicio = linha['periodo'].date()
+        fim = inicio + timedelta(days=6 if granularidade == 'W' else 0)
+    return max(inicio, periodo_inicio), min(fim, periodo_fim)
+
+def limpar_selecao_explorador():
+    """Remove o intervalo e a categoria escolhidos a partir dos gráficos"""
+    st.session_state.pop('explorador_intervalo', None)
+    st.session_state.pop('explorador_categoria', None)
+
+def avancar_pagina(cursor):
+    """Empilha o cursor da próxima página do explorador"""
+    st.session_state['explorador_cursores'].append(cursor)
+
+def voltar_pagina():
+    """Retorna à página anterior do explorador"""
+    if len(st.session_state['explorador_cursores']) > 1:
+        st.session_state['explorador_cursores'].pop()
+
+def formatar_lotes_exportacao(lotes):
+    """Prepara cada lote de lançamentos para a exportação (títulos das colunas e datas)"""
+    for lote in lotes:
+        lote = lote.drop(columns=['id'])
+        lote['data'] = pd.to_datetime(lote['data'])
+        yield lote.rename(columns=TITULOS_LANCAMENTOS)
+
+def exportar_lancamentos(inicio, fim, filtros, busca, formato):
+    """
+    Gera o arquivo com todos os lançamentos do período e dos filtros do explorador.
+
+    O banco é lido em lotes e cada lote é gravado assim que chega, de modo que
+    apenas o arquivo gerado cresce com o tamanho do histórico.
+
+    Returns:
+        tuple: (conteúdo do arquivo em bytes, quantidade de lançamentos)
+    """
+    destino = io.BytesIO()
+    with sessao(descricao='exportar_lancamentos') as db:
+        lotes = formatar_lotes_exportacao(lotes_movimentacoes(db, inicio, fim, filtros, busca))
+        if formato == 'CSV':
+            # Separadores do Excel em português; o BOM identifica o UTF-8
+            texto = io.TextIOWrapper(destino, encoding='utf-8-sig', newline='')
+            total = exportar_csv(lotes, texto, sep=';', decimal=',', date_format='%d/%m/%Y')
+            texto.flush()
+            texto.detach()
+        else:
+            total = exportar_xlsx(lotes, destino, nome_planilha='Lançamentos')
+    return destino.getvalue(), total
+
+@st.fragment
+def explorador_lancamentos(contexto):
+    """Lista paginada das movimentações do período, com filtros aplicados no banco de dados"""
+    df_movimentacoes = contexto['df_movimentacoes']
+    
+    # Intervalo escolhido em um gráfico ou, na falta dele, o período do dashboard
+    intervalo = st.session_state.get('explorador_intervalo')
+    inicio, fim = intervalo or (contexto['periodo_inicio'], contexto['periodo_fim'])
     
-    # Filtra faturas pelo período
-    if not df_faturas.empty and 'mes_referencia' in df_faturas.columns:
-        faturas_periodo = df_faturas[(df_faturas['mes_referencia'] >= periodo_inicio) & 
-                                    (df_faturas['mes_referencia'] <= periodo_fim)]
+    if intervalo:
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.caption(f"📅 Intervalo selecionado no gráfico: {inicio.strftime('%d/%m/%Y')} a {fim.strftime('%d/%m/%Y')}")
+        with col2:
+            st.button("Limpar seleção", on_click=limpar_selecao_explorador, key="explorador_limpar")
+    
+    # Filtros (os valores disponíveis vêm das categorias já carregadas em memória)
+    filtros = {'filial': None if contexto['filial'] == FILIAL_CONSOLIDADO else contexto['filial']}
+    colunas = st.columns(len(FILTROS_EXPLORADOR) + 1)
+    for (campo, rotulo), coluna in zip(FILTROS_EXPLORADOR, colunas):
+        opcoes = ['Todas']
+        if campo in df_movimentacoes.columns:
+            opcoes += sorted(str(v) for v in df_movimentacoes[campo].dropna().unique())
+        
+        chave = f'explorador_{campo}'
+        if st.session_state.get(chave) not in opcoes:
+            st.session_state.pop(chave, None)
+        
+        with coluna:
+            valor = st.selectbox(rotulo, opcoes, key=chave)
+        filtros[campo] = None if valor == 'Todas' else valor
+    
+    with colunas[-1]:
+        filtros['entidade'] = st.text_input("Entidade (início do nome)", key="explorador_entidade").strip()
+    
+    busca = st.text_input(
+        "Buscar no histórico",
+        key="explorador_busca",
+        placeholder="Cliente, fornecedor ou número da NF (ex.: NF 231 FIRST)"
+    ).strip()
+    
+    # Volta para a primeira página sempre que o intervalo, os filtros ou a busca mudam
+    assinatura = (contexto['versao'], inicio, fim, tuple(sorted(filtros.items())), busca)
+    if st.session_state.get('explorador_assinatura') != assinatura:
+        st.session_state['explorador_assinatura'] = assinatura
+        st.session_state['explorador_cursores'] = [None]
+        st.session_state.pop('explorador_exportacao', None)
+    cursores = st.session_state['explorador_cursores']
+    
+    try:
+        tempo_inicial = time.perf_counter()
+        with sessao(descricao='explorador_lancamentos') as db:
+            pagina, proximo_cursor = consultar_pagina_movimentacoes(db, inicio, fim, filtros, cursores[-1], busca=busca)
+        tempo_consulta = (time.perf_counter() - tempo_inicial) * 1000
+    except Exception as e:
+        st.error(f"Erro ao consultar lançamentos: {e}")
+        return
+    
+    if pagina.empty:
+        st.info("ℹ️ Nenhum lançamento encontrado para os filtros selecionados.")
     else:
-        faturas_periodo = df_faturas.copy()
-    
-    # Cálculo das métricas
-    total_receitas = 0
-    total_despesas = 0
-    
-    if 'entrada' in mov_periodo.columns:
-        total_receitas = mov_periodo['entrada'].sum()
-    
-    if 'saida' in mov_periodo.columns:
-        total_despesas = mov_periodo['saida'].sum()
-    
-    # Custos fixos e variáveis
-    custos_tipo = calcular_custos_fixos_variaveis(mov_periodo)
-    custos_fixos = 0
-    custos_variaveis = 0
-    
-    if not custos_tipo.empty:
-        custos_fixos = custos_tipo[custos_tipo['tipo_custo'] == 'Fixo']['saida'].sum() if 'Fixo' in custos_tipo['tipo_custo'].values else 0
-        custos_variaveis = custos_tipo[custos_tipo['tipo_custo'] == 'Variável']['saida'].sum() if 'Variável' in custos_tipo['tipo_custo'].values else 0
-    
-    # Categorias de despesas
-    despesas_por_categoria = pd.DataFrame(columns=['categoria', 'valor'])
-    
-    if not despesas_periodo.empty and 'categoria' in despesas_periodo.columns and 'valor' in despesas_periodo.columns:
-        despesas_por_categoria = despesas_periodo.groupby('categoria')['valor'].sum().reset_index()
-    elif not mov_periodo.empty and 'saida' in mov_periodo.columns and 'categoria' in mov_periodo.columns:
-        # Se não houver despesas registradas, tenta usar as movimentações
-        df_saidas = mov_periodo[mov_periodo['saida'] > 0].copy()
-        if not df_saidas.empty:
-            despesas_por_categoria = df_saidas.groupby('categoria')['saida'].sum().reset_index()
-            despesas_por_categoria.rename(columns={'saida': 'valor'}, inplace=True)
-    
-    # Faturamento mensal
-    faturamento_mensal = pd.DataFrame(columns=['ano', 'mes', 'mes_ano', 'valor'])
-    
-    if not faturas_periodo.empty and 'valor' in faturas_periodo.columns:
-        if 'ano' in faturas_periodo.columns and 'mes' in faturas_periodo.columns and 'mes_ano' in faturas_periodo.columns:
-            faturamento_mensal = faturas_periodo.groupby(['ano', 'mes', 'mes_ano'])['valor'].sum().reset_index()
-            faturamento_mensal = faturamento_mensal.sort_values(by=['ano', 'mes'])
-    elif not mov_periodo.empty and 'entrada' in mov_periodo.columns:
-        # Se não houver faturas, tenta usar as entradas de movimentações
-        entradas = mov_periodo[mov_periodo['entrada'] > 0]
-        if not entradas.empty and 'ano' in entradas.columns and 'mes' in entradas.columns and 'mes_ano' in entradas.columns:
-            faturamento_mensal = entradas.groupby(['ano', 'mes', 'mes_ano'])['entrada'].sum().reset_index()
-            faturamento_mensal.rename(columns={'entrada': 'valor'}, inplace=True)
-            faturamento_mensal = faturamento_mensal.sort_values(by=['ano', 'mes'])
-    
-    # Receitas vs Despesas por mês
-    receitas_despesas_mes = pd.DataFrame(columns=['ano', 'mes', 'mes_ano', 'entrada', 'saida', 'valor_liquido'])
-    
-    if not mov_periodo.empty and 'ano' in mov_periodo.columns and 'mes' in mov_periodo.columns and 'mes_ano' in mov_periodo.columns:
-        if 'entrada' in mov_periodo.columns and 'saida' in mov_periodo.columns and 'valor_liquido' in mov_periodo.columns:
-            receitas_despesas_mes = mov_periodo.groupby(['ano', 'mes', 'mes_ano']).agg({
-                'entrada': 'sum',
-                'saida': 'sum',
-                'valor_liquido': 'sum'
-            }).reset_index()
-            receitas_despesas_mes = receitas_despesas_mes.sort_values(by=['ano', 'mes'])
-    
-    # KPIs
-    margem_lucro = 0 if total_receitas == 0 else (total_receitas - total_despesas) / total_receitas * 100
-    
-    # Índice de fixação de despesas (Martins, 2018)
-    indice_fixacao = 0 if total_despesas == 0 else (custos_fixos / total_despesas) * 100
-    
-    return {
-        'total_receitas': total_receitas,
-        'total_despesas': total_despesas,
-        'custos_fixos': custos_fixos,
-        'custos_variaveis': custos_variaveis,
-        'indice_fixacao': indice_fixacao,
-        'saldo': total_receitas - total_despesas,
-        'margem_lucro': margem_lucro,
-        'despesas_por_categoria': despesas_por_categoria,
-        'faturamento_mensal': faturamento_mensal,
-        'receitas_despesas_mes': receitas_despesas_mes
-    }
+        pagina = pagina.drop(columns=['id'])
+        pagina['data'] = pd.to_datetime(pagina['data']).dt.strftime('%d/%m/%Y')
+        st.dataframe(pagina.rename(columns=TITULOS_LANCAMENTOS), use_container_width=True, hide_index=True)
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("← Anterior", on_click=voltar_pagina, disabled=len(cursores) == 1, key="explorador_anterior")
+    with col2:
+        st.caption(f"Página {len(cursores)} · {len(pagina)} lançamentos · {tempo_consulta:,.0f} ms")
+    with col3:
+        st.button("Próxima →", on_click=avancar_pagina, args=(proximo_cursor,),
+                  disabled=proximo_cursor is None, key="explorador_proxima")
+    
+    # Exportação de todos os lançamentos filtrados (não apenas da página exibida)
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        formato = st.selectbox("Formato", list(FORMATOS_EXPORTACAO), key="explorador_formato",
+                               label_visibility="collapsed")
+    with col2:
+        if st.button("Exportar lançamentos", key="explorador_exportar", disabled=pagina.empty):
+            try:
+                with st.spinner("Exportando lançamentos..."):
+                    dados, total = exportar_lancamentos(inicio, fim, filtros, busca, formato)
+                st.session_state['explorador_exportacao'] = (assinatura, formato, dados, total)
+            except Exception as e:
+                st.error(f"Erro ao exportar lançamentos: {e}")
+    
+    exportacao = st.session_state.get('explorador_exportacao')
+    if exportacao and exportacao[:2] == (assinatura, formato):
+        _, _, dados, total = exportacao
+        extensao, tipo = FORMATOS_EXPORTACAO[formato]
+        with col3:
+            st.download_button(f"⬇️ Baixar {total:,} lançamentos ({extensao.upper()})", dados,
+                               file_name=f"lancamentos_{inicio:%Y%m%d}_{fim:%Y%m%d}.{extensao}",
+                               mime=tipo, key="explorador_baixar")
 
-def plot_receitas_despesas(receitas_despesas_mes):
-    """Gráfico de Receitas vs Despesas por mês"""
-    # Verifica se há dados para plotar
-    if receitas_despesas_mes.empty or 'mes_ano' not in receitas_despesas_mes.columns:
-        return None
-        
-    fig = go.Figure()
-    
-    if 'entrada' in receitas_despesas_mes.columns:
-        fig.add_trace(go.Bar(
-            x=receitas_despesas_mes['mes_ano'],
-            y=receitas_despesas_mes['entrada'],
-            name='Receitas',
-            marker_color='#2E8B57'  # Verde
-        ))
-    
-    if 'saida' in receitas_despesas_mes.columns:
-        fig.add_trace(go.Bar(
-            x=receitas_despesas_mes['mes_ano'],
-            y=receitas_despesas_mes['saida'],
-            name='Despesas',
-            marker_color='#CD5C5C'  # Vermelho
-        ))
-    
-    if 'valor_liquido' in receitas_despesas_mes.columns:
-        fig.add_trace(go.Scatter(
-            x=receitas_despesas_mes['mes_ano'],
-            y=receitas_despesas_mes['valor_liquido'],
-            name='Saldo',
-            mode='lines+markers',
-            line=dict(color='#4682B4', width=3)  # Azul
-        ))
-    
-    fig.update_layout(
-        title='Receitas vs Despesas por Mês',
-        xaxis_title='Mês/Ano',
-        yaxis_title='Valor (R$)',
-        barmode='group',
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        )
+def obter_grafo_contexto(contexto):
+    """Retorna o grafo de métricas memoizado para a versão dos dados e o período do contexto"""
+    return obter_grafo(
+        contexto['versao'],
+        contexto['df_movimentacoes'],
+        contexto['df_despesas'],
+        contexto['df_faturas'],
+        contexto['periodo_inicio'],
+        contexto['periodo_fim'],
+        contexto['indice']
     )
-    
-    return fig
 
-def plot_despesas_categoria(despesas_por_categoria):
-    """Gráfico de Despesas por Categoria"""
-    if despesas_por_categoria.empty or 'categoria' not in despesas_por_categoria.columns or 'valor' not in despesas_por_categoria.columns:
+def obter_metricas(contexto):
+    """Retorna o pacote de métricas do período (calculado uma única vez por versão e período)"""
+    with st.spinner("Calculando métricas..."):
+        return obter_grafo_contexto(contexto).obter('metricas')
+
+def obter_comparacao(contexto):
+    """Retorna os totais e séries mensais do período de comparação (ou None sem comparação)"""
+    if not contexto['comparacao']:
         return None
-        
-    fig = px.pie(
-        despesas_por_categoria, 
-        values='valor', 
-        names='categoria',
-        title='Distribuição de Despesas por Categoria',
-        color_discrete_sequence=px.colors.sequential.Viridis
+    comparacao = obter_grafo_contexto(contexto).obter(f"comparacao_{contexto['comparacao']}")
+    st.caption(
+        f"📊 Comparando com {MODOS_COMPARACAO[comparacao['modo']].lower()}: "
+        f"{comparacao['periodo_inicio'].strftime('%d/%m/%Y')} a {comparacao['periodo_fim'].strftime('%d/%m/%Y')}"
     )
+    return comparacao
+
+def exibir_indicadores(resumo):
+    """
+    Exibe os indicadores principais (receitas, despesas e resultado).
+    
+    Os valores vêm de uma única consulta agregada no banco, o que permite exibi-los
+    antes de carregar os lançamentos e calcular as demais métricas.
+    """
+    atual = resumo['atual']
+    total_receitas = atual['total_receitas']
+    total_despesas = atual['total_despesas']
+    saldo = total_receitas - total_despesas
+    margem_lucro = 0 if total_receitas == 0 else saldo / total_receitas * 100
+    
+    # Variações em relação ao período de comparação
+    delta_receitas = delta_despesas = None
+    delta_resultado = f"{margem_lucro:.2f}%" if margem_lucro != 0 else None
+    if 'anterior' in resumo:
+        anterior = resumo['anterior']
+        delta_receitas = delta_percentual(total_receitas, anterior['total_receitas'])
+        delta_despesas = delta_percentual(total_despesas, anterior['total_despesas'])
+        delta_resultado = f"R$ {saldo - (anterior['total_receitas'] - anterior['total_despesas']):+,.2f}"
+    
+    st.subheader("Indicadores Financeiros")
+    
+    col1, col2, col3 = st.columns(3)
     
-    fig.update_traces(textposition='inside', textinfo='percent+label')
+    with col1:
+        st.metric(
+            label="Receitas Totais",
+            value=f"R$ {total_receitas:,.2f}",
+            delta=delta_receitas
+        )
+    
+    with col2:
+        st.metric(
+            label="Despesas Totais",
+            value=f"R$ {total_despesas:,.2f}",
+            delta=delta_despesas,
+            delta_color="inverse"
+        )
     
-    return fig
+    with col3:
+        st.metric(
+            label="Resultado do Período",
+            value=f"R$ {saldo:,.2f}",
+            delta=delta_resultado,
+            delta_color="normal"
+        )
 
-def plot_custos_fixos_variaveis(custos_fixos, custos_variaveis):
-    """Gráfico de distribuição de custos fixos vs variáveis"""
-    # Verifica se há valores para plotar
-    if custos_fixos == 0 and custos_variaveis == 0:
-        return None
-        
-    labels = ['Custos Fixos', 'Custos Variáveis']
-    values = [custos_fixos, custos_variaveis]
-    
-    fig = px.pie(
-        values=values,
-        names=labels,
-        title='Custos Fixos vs Variáveis (Martins, 2018)',
-        color_discrete_sequence=['#1E88E5', '#FFC107']
-    )
+def registrar_tempos(primeira_exibicao, completo):
+    """Guarda os tempos de renderização das últimas execuções da página"""
+    historico = st.session_state.setdefault('tempos_renderizacao', [])
+    historico.append({'primeira_exibicao': primeira_exibicao, 'completo': completo})
+    del historico[:-20]
+    return historico
+
+@st.fragment
+def secao_visao_geral(contexto):
+    """Seção Visão Geral: evolução mensal, resultado por filial e análise de despesas"""
+    metricas = obter_metricas(contexto)
+    comparacao = obter_comparacao(contexto)
+    
+    # Resultado de cada filial na visão consolidada (somas parciais dos índices por filial)
+    particoes = contexto['particoes']
+    if contexto['filial'] == FILIAL_CONSOLIDADO and len(particoes.filiais) > 1:
+        with st.expander("Resultado por Filial"):
+            por_filial = particoes.totais_por_filial(contexto['periodo_inicio'], contexto['periodo_fim'])
+            st.dataframe(
+                por_filial.rename(columns={
+                    'filial': 'Filial', 'total_receitas': 'Receitas (R$)',
+                    'total_despesas': 'Despesas (R$)', 'resultado': 'Resultado (R$)'
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
     
-    fig.update_traces(textposition='inside', textinfo='percent+label')
+    # Gráfico principal - Receitas vs Despesas
+    st.subheader("Evolução de Receitas e Despesas")
     
-    return fig
-
-def plot_faturamento_mensal(faturamento_mensal):
-    """Gráfico de Faturamento Mensal"""
-    if faturamento_mensal.empty or 'mes_ano' not in faturamento_mensal.columns or 'valor' not in faturamento_mensal.columns:
-        return None
-        
-    fig = px.line(
-        faturamento_mensal,
-        x='mes_ano',
-        y='valor',
-        title='Faturamento Mensal',
-        markers=True
+    opcoes_granularidade = {'Automática': 'D', 'Diária': 'D', 'Semanal': 'W', 'Mensal': 'M'}
+    desejada = st.selectbox(
+        "Granularidade",
+        list(opcoes_granularidade),
+        index=3,
+        key="granularidade_evolucao"
     )
     
-    fig.update_layout(
-        xaxis_title='Mês/Ano',
-        yaxis_title='Valor Faturado (R$)',
-        xaxis_tickangle=-45
+    # Escolhe a granularidade a partir do intervalo visível e do orçamento de pontos
+    granularidade = escolher_granularidade(
+        contexto['periodo_inicio'], contexto['periodo_fim'], opcoes_granularidade[desejada]
     )
+    if desejada != 'Automática' and granularidade != opcoes_granularidade[desejada]:
+        st.caption(
+            f"ℹ️ Granularidade ajustada para {GRANULARIDADES[granularidade].lower()} "
+            f"para manter no máximo {ORCAMENTO_PONTOS:,} pontos por série."
+        )
+    
+    if granularidade == 'M':
+        serie = metricas['receitas_despesas_mes']
+    else:
+        serie = obter_grafo_contexto(contexto).obter(f'serie_{granularidade}')
+    
+    if not serie.empty:
+        fig_receitas_despesas = plot_receitas_despesas(serie, granularidade)
+        if fig_receitas_despesas:
+            evento = exibir_grafico(fig_receitas_despesas, "Receitas vs Despesas", chave="grafico_receitas_despesas")
+            
+            # Clique em um mês (ou dia/semana): detalha os lançamentos do intervalo
+            ponto = nova_selecao(evento, "grafico_receitas_despesas")
+            if ponto is not None and 0 <= ponto.get('point_index', -1) < len(serie):
+                st.session_state['explorador_intervalo'] = intervalo_do_ponto(
+                    serie.iloc[ponto['point_index']], granularidade,
+                    contexto['periodo_inicio'], contexto['periodo_fim']
+                )
+            
+            st.info("""
+            **Análise Temporal (Pereira da Silva, 2017)**: Este gráfico demonstra a evolução 
+            mensal das receitas e despesas, permitindo identificar tendências e sazonalidades.
+            """)
+        else:
+            st.info("ℹ️ Não há dados suficientes para gerar o gráfico de evolução mensal.")
+    else:
+        st.info("ℹ️ Não há dados suficientes para gerar o gráfico de evolução mensal.")
+    
+    # Receitas e despesas de cada mês ao lado do mês correspondente do período de comparação
+    if comparacao:
+        fig_comparacao = plot_comparacao_mensal(
+            comparacao['movimentacoes_mensal'],
+            [('entrada', 'Receitas', '#2E8B57'), ('saida', 'Despesas', '#CD5C5C')],
+            'Receitas e Despesas: Período Atual vs Comparação',
+            'comparação'
+        )
+        if fig_comparacao:
+            exibir_grafico(fig_comparacao, "Comparação Mensal")
+    
+    # Distribuição de despesas por categoria
+    st.subheader("Análise de Despesas")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        if not metricas['despesas_por_categoria'].empty:
+            fig_categorias = plot_despesas_categoria(metricas['despesas_por_categoria'])
+            if fig_categorias:
+                exibir_grafico(fig_categorias, "Despesas por Categoria")
+            else:
+                st.info("ℹ️ Não há dados suficientes para gerar o gráfico de despesas por categoria.")
+        else:
+            st.info("ℹ️ Não há dados de despesas categorizadas para o período selecionado.")
+    
+    with col2:
+        # Análise Vertical
+        fig_analise_vertical = plot_analise_vertical(obter_grafo_contexto(contexto).obter('agregados_categoria'))
+        if fig_analise_vertical:
+            evento = exibir_grafico(fig_analise_vertical, "Análise Vertical", chave="grafico_analise_vertical")
+            
+            # Clique em uma categoria: detalha os lançamentos da categoria
+            ponto = nova_selecao(evento, "grafico_analise_vertical")
+            if ponto is not None and ponto.get('x') not in (None, 'Outras'):
+                st.session_state['explorador_categoria'] = ponto['x']
+        else:
+            st.info("ℹ️ Não há dados suficientes para gerar a análise vertical.")
     
-    return fig
+    # Detalhamento dos lançamentos a partir dos gráficos
+    st.subheader("Detalhamento dos Lançamentos")
+    st.caption("Clique em um mês do gráfico de evolução ou em uma categoria da análise vertical para ver os lançamentos correspondentes.")
+    explorador_lancamentos(contexto)
 
-def plot_analise_vertical(df_movimentacoes, periodo_inicio, periodo_fim):
-    """Cria gráfico de análise vertical conforme Pereira da Silva (2017)"""
-    # Verifica se há dados para análise
-    if df_movimentacoes.empty or 'data' not in df_movimentacoes.columns:
-        return None
-        
-    # Filtra os dados pelo período
-    mov_periodo = df_movimentacoes[(df_movimentacoes['data'] >= periodo_inicio) & 
-                                   (df_movimentacoes['data'] <= periodo_fim)]
+@st.fragment
+def secao_analise_custos(contexto):
+    """Seção Análise de Custos: custos fixos/variáveis e ponto de equilíbrio"""
+    metricas = obter_metricas(contexto)
     
-    # Verifica se tem dados após o filtro
-    if mov_periodo.empty:
-        return None
+    st.subheader("Análise de Custos (Martins, 2018)")
+    comparacao = obter_comparacao(contexto)
     
-    # Verifica se tem as colunas necessárias
-    if 'entrada' not in mov_periodo.columns or 'saida' not in mov_periodo.columns:
-        return None
+    delta_fixos = delta_variaveis = None
+    if comparacao:
+        delta_fixos = delta_percentual(metricas['custos_fixos'], comparacao['totais']['custos_fixos'])
+        delta_variaveis = delta_percentual(metricas['custos_variaveis'], comparacao['totais']['custos_variaveis'])
     
-    # Separa entradas e saídas
-    entradas = mov_periodo[mov_periodo['entrada'] > 0]
-    saidas = mov_periodo[mov_periodo['saida'] > 0]
+    # KPIs de custos
+    col1, col2, col3 = st.columns(3)
     
-    # Verifica se tem saídas para analisar
-    if saidas.empty:
-        return None
+    with col1:
+        st.metric(
+            label="Custos Fixos",
+            value=f"R$ {metricas['custos_fixos']:,.2f}",
+            delta=delta_fixos,
+            delta_color="inverse"
+        )
     
-    # Calcula o total de entradas e saídas
-    total_entradas = entradas['entrada'].sum()
-    total_saidas = saidas['saida'].sum()
+    with col2:
+        st.metric(
+            label="Custos Variáveis",
+            value=f"R$ {metricas['custos_variaveis']:,.2f}",
+            delta=delta_variaveis,
+            delta_color="inverse"
+        )
     
-    # Prepara dados para o gráfico de análise vertical de despesas
-    if 'categoria' in saidas.columns:
-        # Agrupa saídas por categoria
-        despesas_categoria = saidas.groupby('categoria')['saida'].sum().reset_index()
+    with col3:
+        st.metric(
+            label="Índice de Fixação de Despesas",
+            value=f"{metricas['indice_fixacao']:.2f}%",
+            help="% dos custos que são fixos (independem do volume de serviços)"
+        )
+    
+    # Gráfico de custos fixos vs variáveis
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        fig_custos = plot_custos_fixos_variaveis(metricas['custos_fixos'], metricas['custos_variaveis'])
+        if fig_custos:
+            exibir_grafico(fig_custos, "Custos Fixos vs Variáveis")
+        else:
+            st.info("ℹ️ Não há dados suficientes para gerar o gráfico de custos fixos vs variáveis.")
+    
+    with col2:
+        st.write("### Interpretação dos Custos")
+        st.info("""
+        **Segundo Martins (2018)**, os custos fixos são aqueles que não variam com o volume 
+        de produção ou serviços prestados, como aluguel e salários administrativos.
         
-        # Calcula o percentual sobre o total
-        despesas_categoria['percentual'] = (despesas_categoria['saida'] / total_saidas * 100).round(1)
+        Já os custos variáveis são diretamente proporcionais ao volume, como comissões 
+        e materiais consumidos.
         
-        # Ordena por valor (decrescente)
-        despesas_categoria = despesas_categoria.sort_values(by='saida', ascending=False)
+        O **Índice de Fixação de Despesas** indica a rigidez da estrutura de custos:
+        - Valores acima de 70%: estrutura rígida, maior risco operacional
+        - Valores abaixo de 30%: estrutura flexível, menor risco
+        """)
         
-        # Cria o gráfico de barras
-        fig = px.bar(
-            despesas_categoria,
-            x='categoria',
-            y='percentual',
-            text='percentual',
-            title='Análise Vertical de Despesas (Pereira da Silva, 2017)',
-            color='saida',
-            color_continuous_scale=px.colors.sequential.Reds
-        )
+        # Interpreta o índice de fixação
+        indice = metricas['indice_fixacao']
+        if indice > 70:
+            st.warning(f"**Índice de Fixação: {indice:.1f}%** - A agência possui uma estrutura de custos **rígida**, com alta proporção de custos fixos. Isso representa maior risco em períodos de baixa receita.")
+        elif indice < 30:
+            st.success(f"**Índice de Fixação: {indice:.1f}%** - A agência possui uma estrutura de custos **flexível**, com baixa proporção de custos fixos. Isso representa menor risco em períodos de baixa receita.")
+        else:
+            st.info(f"**Índice de Fixação: {indice:.1f}%** - A agência possui uma estrutura de custos **moderada**, com equilíbrio entre custos fixos e variáveis.")
+            
+    # Ponto de Equilíbrio (conceito de Martins)
+    st.subheader("Ponto de Equilíbrio")
+    
+    # Ponto de equilíbrio calculado pelo grafo de métricas
+    ponto_equilibrio = metricas['ponto_equilibrio']
+    if ponto_equilibrio is not None:
+        pe = ponto_equilibrio['ponto_equilibrio']
         
-        fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+        col1, col2 = st.columns(2)
         
-        fig.update_layout(
-            xaxis_title='Categoria',
-            yaxis_title='% do Total de Despesas',
-            xaxis_tickangle=-45,
-            yaxis=dict(range=[0, max(despesas_categoria['percentual']) * 1.1])
-        )
+        with col1:
+            st.metric(
+                label="Ponto de Equilíbrio",
+                value=f"R$ {pe:,.2f}",
+                help="Receita necessária para cobrir todos os custos"
+            )
+            
+            # Verifica se está acima do ponto de equilíbrio
+            if metricas['total_receitas'] > pe:
+                folga = metricas['total_receitas'] - pe
+                st.success(f"A agência está **acima** do ponto de equilíbrio, com folga de R$ {folga:,.2f}")
+            else:
+                deficit = pe - metricas['total_receitas']
+                st.error(f"A agência está **abaixo** do ponto de equilíbrio, com déficit de R$ {deficit:,.2f}")
         
-        return fig
+        with col2:
+            st.info("""
+            **Ponto de Equilíbrio (Martins, 2018)**: É o valor de receita necessário para 
+            cobrir exatamente todos os custos, sem gerar lucro ou prejuízo.
+            
+            PE = Custos Fixos ÷ Índice de Margem de Contribuição
+            
+            O Índice de Margem de Contribuição é calculado como:
+            (Receita - Custos Variáveis) ÷ Receita
+            """)
+    else:
+        st.warning("Não foi possível calcular o ponto de equilíbrio. É necessário ter receitas positivas e custos variáveis menores que as receitas.")
+    
+    # Ponto de equilíbrio mês a mês
+    st.write("### Evolução Mensal do Ponto de Equilíbrio")
+    serie_pe = obter_grafo_contexto(contexto).obter('ponto_equilibrio_mensal')
+    fig_pe = plot_ponto_equilibrio_mensal(serie_pe)
+    if fig_pe:
+        exibir_grafico(fig_pe, "Ponto de Equilíbrio Mensal")
+        meses_abaixo = int((serie_pe['margem_seguranca'] < 0).sum())
+        meses_sem_pe = int(serie_pe['ponto_equilibrio'].isna().sum())
+        st.caption(
+            f"Meses abaixo do ponto de equilíbrio: {meses_abaixo} de {len(serie_pe)}"
+            + (f" · {meses_sem_pe} sem ponto de equilíbrio (receita insuficiente para cobrir os custos variáveis)"
+               if meses_sem_pe else "")
+        )
+    else:
+        st.info("ℹ️ Não há dados suficientes para calcular o ponto de equilíbrio mensal.")
     
-    return None
+    # Sensibilidade: cenários de receita e custos fixos avaliados de uma só vez
+    st.write("### Análise de Sensibilidade")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        limite_receita = st.slider("Variação da receita (±%)", 5, 100, 30, step=5, key="sensibilidade_receita")
+    with col2:
+        limite_fixos = st.slider("Variação dos custos fixos (±%)", 5, 100, 30, step=5, key="sensibilidade_fixos")
+    with col3:
+        metricas_grade = {'Resultado (R$)': 'resultado', 'Margem de Segurança (%)': 'margem_seguranca'}
+        metrica_grade = st.selectbox("Indicador", list(metricas_grade), key="sensibilidade_indicador")
+    
+    grade = grade_sensibilidade(
+        metricas['total_receitas'], metricas['custos_fixos'], metricas['custos_variaveis'],
+        np.linspace(-limite_receita, limite_receita, 21),
+        np.linspace(-limite_fixos, limite_fixos, 21)
+    )[metricas_grade[metrica_grade]]
+    
+    fig_sensibilidade = plot_sensibilidade(grade, f"{metrica_grade} por Cenário", metrica_grade)
+    if fig_sensibilidade:
+        exibir_grafico(fig_sensibilidade, "Análise de Sensibilidade")
+        st.caption(
+            f"{grade.size} cenários. Os custos variáveis acompanham a variação da receita; "
+            "verde indica cenários lucrativos (ou com folga sobre o ponto de equilíbrio)."
+        )
+
+@st.fragment
+def secao_analise_temporal(contexto):
+    """Seção Análise Temporal: faturamento, tendência e estatísticas mensais"""
+    metricas = obter_metricas(contexto)
+    df_movimentacoes = contexto['df_movimentacoes']
+    
+    st.subheader("Análise Temporal (Pereira da Silva, 2017)")
+    comparacao = obter_comparacao(contexto)
+    
+    # Gráfico de Faturamento Mensal
+    st.write("### Evolução do Faturamento")
+    
+    if not metricas['faturamento_mensal'].empty:
+        fig_faturamento = plot_faturamento_mensal(metricas['faturamento_mensal'])
+        if fig_faturamento:
+            exibir_grafico(fig_faturamento, "Faturamento Mensal")
+            
+            # Cálculo de tendência
+            if len(metricas['faturamento_mensal']) >= 3:
+                valores = metricas['faturamento_mensal']['valor'].tolist()
+                primeiro_valor = valores[0]
+                ultimo_valor = valores[-1]
+                
+                variacao_percentual = ((ultimo_valor / primeiro_valor) - 1) * 100 if primeiro_valor > 0 else 0
+                
+                st.write("### Análise de Tendência")
+                
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    st.metric(
+                        label="Variação no Período",
+                        value=f"{variacao_percentual:.2f}%",
+                        delta=None
+                    )
+                
+                with col2:
+                    # Análise da tendência
+                    if variacao_percentual > 10:
+                        st.success("**Tendência de CRESCIMENTO** no faturamento ao longo do período analisado.")
+                    elif variacao_percentual < -10:
+                        st.error("**Tendência de QUEDA** no faturamento ao longo do período analisado.")
+                    else:
+                        st.info("**Tendência de ESTABILIDADE** no faturamento ao longo do período analisado.")
+        else:
+            st.info("ℹ️ Não há dados suficientes para gerar o gráfico de faturamento mensal.")
+    else:
+        st.info("ℹ️ Não há dados de faturamento para o período selecionado.")
+    
+    # Faturamento de cada mês ao lado do mês correspondente do período de comparação
+    if comparacao:
+        faturamento = comparacao['faturamento_mensal']
+        fig_comparacao = plot_comparacao_mensal(
+            faturamento, [('valor', 'Faturamento', '#4682B4')],
+            'Faturamento: Período Atual vs Comparação', 'comparação'
+        )
+        if fig_comparacao:
+            exibir_grafico(fig_comparacao, "Comparação do Faturamento")
+            st.metric(
+                label="Faturamento vs Período de Comparação",
+                value=f"R$ {faturamento['valor_atual'].sum():,.2f}",
+                delta=delta_percentual(faturamento['valor_atual'].sum(), faturamento['valor_anterior'].sum())
+            )
+    
+    # Dados de movimentações no período
+    st.write("### Movimentações no Período")
+    
+    # Verifica se há dados para mostrar
+    if not df_movimentacoes.empty and 'data' in df_movimentacoes.columns:
+        # Recorte do período compartilhado pelo grafo de métricas
+        grafo = obter_grafo_contexto(contexto)
+        mov_periodo = grafo.obter('periodo')['movimentacoes']
+        
+        if not mov_periodo.empty:
+            # Estatísticas mensais do grafo de métricas, em ordem cronológica
+            try:
+                mov_stats = grafo.obter('estatisticas_mensais')
+                
+                if not mov_stats.empty:
+                    stats_table = tabela_estatisticas_mensais(mov_stats)
+                    st.dataframe(stats_table, use_container_width=True, hide_index=True)
+                    
+                    st.info("""
+                    **Análise Estatística (Pereira da Silva, 2017)**: A tabela acima mostra a evolução mensal 
+                    da quantidade de lançamentos e dos valores totais, médios, medianos, do percentil 90 e 
+                    máximos de receitas e despesas. Estas informações são fundamentais para identificar 
+                    padrões e anomalias no fluxo financeiro da agência.
+                    """)
+                else:
+                    st.info("ℹ️ Os dados não contêm todas as colunas necessárias para a análise estatística.")
+            except Exception as e:
+                st.info(f"ℹ️ Não foi possível gerar as estatísticas mensais. Erro: {str(e)}")
+        else:
+            st.info("ℹ️ Não há movimentações para o período selecionado.")
+    else:
+        st.info("ℹ️ Não há movimentações para análise.")
+
+@st.fragment
+def secao_relatorio_pdf(contexto):
+    """Seção da barra lateral para exportação do relatório em PDF"""
+    df_movimentacoes = contexto['df_movimentacoes']
+    df_despesas = contexto['df_despesas']
+    df_faturas = contexto['df_faturas']
+    periodo_inicio = contexto['periodo_inicio']
+    periodo_fim = contexto['periodo_fim']
+    
+    st.subheader("Exportar Relatório")
+    st.caption("Relatório financeiro completo em PDF com os indicadores, análises e gráficos do período selecionado.")
+    
+    incluir_anexo = st.checkbox("Incluir anexo com os lançamentos do período", key="relatorio_anexo")
+    
+    if st.button("📄 Gerar Relatório PDF", type="primary"):
+        # Verifica se há dados suficientes
+        if not df_movimentacoes.empty or not df_despesas.empty or not df_faturas.empty:
+            with st.spinner("Gerando relatório financeiro..."):
+                try:
+                    # Gera um nome de arquivo baseado no período
+                    nome_arquivo = f"Relatorio_Financeiro_{periodo_inicio.strftime('%d%m%Y')}_a_{periodo_fim.strftime('%d%m%Y')}.pdf"
+                    
+                    dados_metricas = obter_metricas(contexto)
+                    
+                    # Chama a função para gerar o relatório; o anexo lê os lançamentos
+                    # em lotes enquanto o PDF é montado, com a sessão aberta
+                    with sessao(descricao='relatorio_pdf') as db:
+                        dados_adicionais = None
+                        if incluir_anexo:
+                            filial = None if contexto['filial'] == FILIAL_CONSOLIDADO else contexto['filial']
+                            dados_adicionais = {'lotes_lancamentos': lotes_movimentacoes(
+                                db, periodo_inicio, periodo_fim, {'filial': filial}
+                            )}
+                        base64_pdf = gerar_relatorio_financeiro(
+                            dados_metricas=dados_metricas,
+                            periodo_inicio=periodo_inicio,
+                            periodo_fim=periodo_fim,
+                            dados_adicionais=dados_adicionais
+                        )
+                    
+                    # Cria o link para download
+                    st.markdown(
+                        criar_link_download(base64_pdf, nome_arquivo),
+                        unsafe_allow_html=True
+                    )
+                    
+                    st.success(f"✅ Relatório gerado com sucesso!")
+                except Exception as e:
+                    st.error(f"❌ Erro ao gerar relatório: {str(e)}")
+        else:
+            st.warning("⚠️ Não há dados suficientes para gerar o relatório. Por favor, importe ou cadastre dados.")
+
 
 def main():
+    inicio_execucao = time.perf_counter()
     st.title("Dashboard Financeiro - Agência de Publicidade")
     
-    # Adiciona um diagnóstico da conexão com o banco
-    with st.spinner("Verificando conexão com o banco de dados..."):
-        connection_result = test_connection()
-    
-    if not connection_result:
+    # Estado da conexão com o banco (em cache, verificado em segundo plano)
+    if not saude_banco.disponivel():
         st.error("❌ Não foi possível conectar ao banco de dados!")
         st.info("Por favor, acesse a página de status do banco para diagnóstico ou importe dados primeiro.")
         if st.button("Verificar Status do Banco"):
@@ -449,26 +800,20 @@ def main():
             st.switch_page("pages/Importar_Dados.py")
         return
     
-    # Carrega os dados
-    with st.spinner("Carregando dados..."):
-        data = load_data()
-    
-    if not data:
-        st.error("❌ Não foi possível carregar os dados!")
+    # Etapa 1: limites de datas, filiais e versão dos dados por agregações concorrentes no banco
+    try:
+        consultas = executar_em_paralelo({
+            'limites': (limites_datas,),
+            'filiais': (listar_filiais,),
+            'versao': (versao_dados,)
+        })
+    except Exception as e:
+        st.error(f"Erro ao consultar o banco de dados: {e}")
         return
-    
-    # Extrai os dados carregados
-    despesas = data['despesas']
-    faturas = data['faturas']
-    movimentacoes = data['movimentacoes']
-    
-    # Cria DataFrames para análise
-    df_movimentacoes = create_movimentacoes_df(movimentacoes)
-    df_despesas = create_despesas_df(despesas)
-    df_faturas = create_faturas_df(faturas)
+    limites, filiais_banco = consultas['limites'], consultas['filiais']
     
     # Se não houver dados, exibe mensagem
-    if df_movimentacoes.empty and df_despesas.empty and df_faturas.empty:
+    if limites is None:
         st.warning("⚠️ Não há dados suficientes para gerar o dashboard. Por favor, importe ou cadastre dados.")
         
         # Botão para importar dados
@@ -477,379 +822,171 @@ def main():
         
         return
     
-    # Define data mín/máx para o filtro de período
-    data_min = datetime.now().date() - timedelta(days=180)  # Padrão: 6 meses atrás
-    data_max = datetime.now().date()  # Padrão: hoje
-    
-    # Tenta obter datas dos dados
-    if not df_movimentacoes.empty and 'data' in df_movimentacoes.columns:
-        data_min = df_movimentacoes['data'].min()
-        data_max = df_movimentacoes['data'].max()
-    elif not df_despesas.empty and 'data' in df_despesas.columns:
-        data_min = df_despesas['data'].min()
-        data_max = df_despesas['data'].max()
-    elif not df_faturas.empty and 'mes_referencia' in df_faturas.columns:
-        data_min = df_faturas['mes_referencia'].min()
-        data_max = df_faturas['mes_referencia'].max()
+    data_min, data_max = limites
     
     # Filtros de período na barra lateral
     st.sidebar.subheader("Filtros")
-    periodo_inicio = st.sidebar.date_input("Data Início", value=data_min)
-    periodo_fim = st.sidebar.date_input("Data Fim", value=data_max)
+    
+    # Períodos predefinidos, relativos à data do último lançamento
+    intervalos = intervalos_predefinidos(data_max)
+    opcoes_periodo = {'Personalizado': None, **{rotulo: chave for chave, rotulo in PERIODOS_PREDEFINIDOS.items()}}
+    st.session_state.setdefault('periodo_inicio', data_min)
+    st.session_state.setdefault('periodo_fim', data_max)
+    
+    def aplicar_periodo_predefinido():
+        chave = opcoes_periodo[st.session_state['periodo_predefinido']]
+        if chave:
+            st.session_state['periodo_inicio'], st.session_state['periodo_fim'] = intervalos[chave]
+    
+    def marcar_periodo_personalizado():
+        st.session_state['periodo_predefinido'] = 'Personalizado'
+    
+    st.sidebar.selectbox("Período", list(opcoes_periodo), key="periodo_predefinido", on_change=aplicar_periodo_predefinido)
+    periodo_inicio = st.sidebar.date_input("Data Início", key="periodo_inicio", on_change=marcar_periodo_personalizado)
+    periodo_fim = st.sidebar.date_input("Data Fim", key="periodo_fim", on_change=marcar_periodo_personalizado)
+    
+    # Modo de comparação (ano anterior ou período imediatamente anterior)
+    opcoes_comparacao = {'Sem comparação': None, **{rotulo: modo for modo, rotulo in MODOS_COMPARACAO.items()}}
+    comparacao = opcoes_comparacao[st.sidebar.selectbox("Comparar com", list(opcoes_comparacao), key="modo_comparacao")]
+    
+    filial = FILIAL_CONSOLIDADO
+    if filiais_banco:
+        filial = st.sidebar.selectbox("Filial", [FILIAL_CONSOLIDADO] + filiais_banco, key="filial")
     
     # Verifica se as datas são válidas
     if periodo_inicio > periodo_fim:
         st.error("❌ Data de início não pode ser posterior à data de fim!")
         return
     
-    # Calcula as métricas
-    with st.spinner("Calculando métricas..."):
-        metricas = calcular_metricas(df_movimentacoes, df_despesas, df_faturas, periodo_inicio, periodo_fim)
+    # Indicadores principais antes de carregar os lançamentos
+    periodos = {'atual': (periodo_inicio, periodo_fim)}
+    if comparacao:
+        periodos['anterior'] = janela_comparacao(periodo_inicio, periodo_fim, comparacao)
+    try:
+        with sessao(descricao='resumo_kpis') as db:
+            resumo = resumo_kpis(db, periodos, None if filial == FILIAL_CONSOLIDADO else filial)
+    except Exception as e:
+        st.error(f"Erro ao consultar o banco de dados: {e}")
+        st.stop()
+    exibir_indicadores(resumo)
+    tempo_primeira_exibicao = (time.perf_counter() - inicio_execucao) * 1000
     
-    # Tabs para organizar o dashboard
-    tab1, tab2, tab3 = st.tabs([
-        "Visão Geral", 
-        "Análise de Custos",
-        "Análise Temporal"
-    ])
+    # Etapa 2: carrega os lançamentos para gráficos e tabelas
+    with st.spinner("Carregando dados..."):
+        data = load_data(consultas['versao'])
     
-    with tab1:
-        st.subheader("Indicadores Financeiros")
-        
-        # KPIs principais - linha 1
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.metric(
-                label="Receitas Totais",
-                value=f"R$ {metricas['total_receitas']:,.2f}",
-                delta=None
-            )
-        
-        with col2:
-            st.metric(
-                label="Despesas Totais",
-                value=f"R$ {metricas['total_despesas']:,.2f}",
-                delta=None
-            )
-        
-        with col3:
-            st.metric(
-                label="Resultado do Período",
-                value=f"R$ {metricas['saldo']:,.2f}",
-                delta=f"{metricas['margem_lucro']:.2f}%" if metricas['margem_lucro'] != 0 else None,
-                delta_color="normal"
-            )
-        
-        # Gráfico principal - Receitas vs Despesas
-        st.subheader("Evolução Mensal de Receitas e Despesas")
-        
-        if not metricas['receitas_despesas_mes'].empty:
-            fig_receitas_despesas = plot_receitas_despesas(metricas['receitas_despesas_mes'])
-            if fig_receitas_despesas:
-                st.plotly_chart(fig_receitas_despesas, use_container_width=True)
-                
-                st.info("""
-                **Análise Temporal (Pereira da Silva, 2017)**: Este gráfico demonstra a evolução 
-                mensal das receitas e despesas, permitindo identificar tendências e sazonalidades.
-                """)
-            else:
-                st.info("ℹ️ Não há dados suficientes para gerar o gráfico de evolução mensal.")
-        else:
-            st.info("ℹ️ Não há dados suficientes para gerar o gráfico de evolução mensal.")
-        
-        # Distribuição de despesas por categoria
-        st.subheader("Análise de Despesas")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            if not metricas['despesas_por_categoria'].empty:
-                fig_categorias = plot_despesas_categoria(metricas['despesas_por_categoria'])
-                if fig_categorias:
-                    st.plotly_chart(fig_categorias, use_container_width=True)
-                else:
-                    st.info("ℹ️ Não há dados suficientes para gerar o gráfico de despesas por categoria.")
-            else:
-                st.info("ℹ️ Não há dados de despesas categorizadas para o período selecionado.")
-        
-        with col2:
-            # Análise Vertical
-            fig_analise_vertical = plot_analise_vertical(df_movimentacoes, periodo_inicio, periodo_fim)
-            if fig_analise_vertical:
-                st.plotly_chart(fig_analise_vertical, use_container_width=True)
-            else:
-                st.info("ℹ️ Não há dados suficientes para gerar a análise vertical.")
+    if not data:
+        st.error("❌ Não foi possível carregar os dados!")
+        return
     
-    with tab2:
-        st.subheader("Análise de Custos (Martins, 2018)")
-        
-        # KPIs de custos
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.metric(
-                label="Custos Fixos",
-                value=f"R$ {metricas['custos_fixos']:,.2f}",
-                delta=None
-            )
-        
-        with col2:
-            st.metric(
-                label="Custos Variáveis",
-                value=f"R$ {metricas['custos_variaveis']:,.2f}",
-                delta=None
-            )
-        
-        with col3:
-            st.metric(
-                label="Índice de Fixação de Despesas",
-                value=f"{metricas['indice_fixacao']:.2f}%",
-                help="% dos custos que são fixos (independem do volume de serviços)"
-            )
-        
-        # Gráfico de custos fixos vs variáveis
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            fig_custos = plot_custos_fixos_variaveis(metricas['custos_fixos'], metricas['custos_variaveis'])
-            if fig_custos:
-                st.plotly_chart(fig_custos, use_container_width=True)
-            else:
-                st.info("ℹ️ Não há dados suficientes para gerar o gráfico de custos fixos vs variáveis.")
-        
-        with col2:
-            st.write("### Interpretação dos Custos")
-            st.info("""
-            **Segundo Martins (2018)**, os custos fixos são aqueles que não variam com o volume 
-            de produção ou serviços prestados, como aluguel e salários administrativos.
-            
-            Já os custos variáveis são diretamente proporcionais ao volume, como comissões 
-            e materiais consumidos.
-            
-            O **Índice de Fixação de Despesas** indica a rigidez da estrutura de custos:
-            - Valores acima de 70%: estrutura rígida, maior risco operacional
-            - Valores abaixo de 30%: estrutura flexível, menor risco
-            """)
-            
-            # Interpreta o índice de fixação
-            indice = metricas['indice_fixacao']
-            if indice > 70:
-                st.warning(f"**Índice de Fixação: {indice:.1f}%** - A agência possui uma estrutura de custos **rígida**, com alta proporção de custos fixos. Isso representa maior risco em períodos de baixa receita.")
-            elif indice < 30:
-                st.success(f"**Índice de Fixação: {indice:.1f}%** - A agência possui uma estrutura de custos **flexível**, com baixa proporção de custos fixos. Isso representa menor risco em períodos de baixa receita.")
-            else:
-                st.info(f"**Índice de Fixação: {indice:.1f}%** - A agência possui uma estrutura de custos **moderada**, com equilíbrio entre custos fixos e variáveis.")
-                
-        # Ponto de Equilíbrio (conceito de Martins)
-        st.subheader("Ponto de Equilíbrio")
-        
-        # Calcula o ponto de equilíbrio
-        if metricas['total_receitas'] > 0 and metricas['custos_variaveis'] < metricas['total_receitas']:
-            # Calcula margem de contribuição
-            margem_contribuicao = metricas['total_receitas'] - metricas['custos_variaveis']
-            indice_mc = margem_contribuicao / metricas['total_receitas']
-            
-            # Ponto de equilíbrio
-            pe = metricas['custos_fixos'] / indice_mc if indice_mc > 0 else 0
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.metric(
-                    label="Ponto de Equilíbrio",
-                    value=f"R$ {pe:,.2f}",
-                    help="Receita necessária para cobrir todos os custos"
-                )
-                
-                # Verifica se está acima do ponto de equilíbrio
-                if metricas['total_receitas'] > pe:
-                    folga = metricas['total_receitas'] - pe
-                    st.success(f"A agência está **acima** do ponto de equilíbrio, com folga de R$ {folga:,.2f}")
-                else:
-                    deficit = pe - metricas['total_receitas']
-                    st.error(f"A agência está **abaixo** do ponto de equilíbrio, com déficit de R$ {deficit:,.2f}")
-            
-            with col2:
-                st.info("""
-                **Ponto de Equilíbrio (Martins, 2018)**: É o valor de receita necessário para 
-                cobrir exatamente todos os custos, sem gerar lucro ou prejuízo.
-                
-                PE = Custos Fixos ÷ Índice de Margem de Contribuição
-                
-                O Índice de Margem de Contribuição é calculado como:
-                (Receita - Custos Variáveis) ÷ Receita
-                """)
-        else:
-            st.warning("Não foi possível calcular o ponto de equilíbrio. É necessário ter receitas positivas e custos variáveis menores que as receitas.")
+    # DataFrames para análise
+    df_movimentacoes = data['df_movimentacoes']
+    df_despesas = data['df_despesas']
+    df_faturas = data['df_faturas']
     
-    with tab3:
-        st.subheader("Análise Temporal (Pereira da Silva, 2017)")
-        
-        # Gráfico de Faturamento Mensal
-        st.write("### Evolução do Faturamento")
-        
-        if not metricas['faturamento_mensal'].empty:
-            fig_faturamento = plot_faturamento_mensal(metricas['faturamento_mensal'])
-            if fig_faturamento:
-                st.plotly_chart(fig_faturamento, use_container_width=True)
-                
-                # Cálculo de tendência
-                if len(metricas['faturamento_mensal']) >= 3:
-                    valores = metricas['faturamento_mensal']['valor'].tolist()
-                    primeiro_valor = valores[0]
-                    ultimo_valor = valores[-1]
-                    
-                    variacao_percentual = ((ultimo_valor / primeiro_valor) - 1) * 100 if primeiro_valor > 0 else 0
-                    
-                    st.write("### Análise de Tendência")
-                    
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.metric(
-                            label="Variação no Período",
-                            value=f"{variacao_percentual:.2f}%",
-                            delta=None
-                        )
-                    
-                    with col2:
-                        # Análise da tendência
-                        if variacao_percentual > 10:
-                            st.success("**Tendência de CRESCIMENTO** no faturamento ao longo do período analisado.")
-                        elif variacao_percentual < -10:
-                            st.error("**Tendência de QUEDA** no faturamento ao longo do período analisado.")
-                        else:
-                            st.info("**Tendência de ESTABILIDADE** no faturamento ao longo do período analisado.")
-            else:
-                st.info("ℹ️ Não há dados suficientes para gerar o gráfico de faturamento mensal.")
-        else:
-            st.info("ℹ️ Não há dados de faturamento para o período selecionado.")
-        
-        # Dados de movimentações no período
-        st.write("### Movimentações no Período")
+    # Pré-calcula os períodos predefinidos em segundo plano, caso esta versão ainda não tenha sido aquecida
+    iniciar_aquecimento(data['versao'])
+
+    # Relatório de uso de memória (calculado apenas sob demanda)
+    if st.sidebar.checkbox("Mostrar uso de memória", value=False):
+        memoria = relatorio_memoria({
+            'Movimentações': df_movimentacoes,
+            'Despesas': df_despesas,
+            'Faturas': df_faturas
+        })
+        if not memoria.empty:
+            st.sidebar.dataframe(memoria, hide_index=True, use_container_width=True)
         
-        # Verifica se há dados para mostrar
-        if not df_movimentacoes.empty and 'data' in df_movimentacoes.columns:
-            # Filtra movimentações pelo período
-            mov_periodo = df_movimentacoes[(df_movimentacoes['data'] >= periodo_inicio) & 
-                                          (df_movimentacoes['data'] <= periodo_fim)]
-            
-            if not mov_periodo.empty:
-                # Verifica se temos as colunas necessárias para a tabela
-                colunas_necessarias = ['mes_ano', 'entrada', 'saida']
-                colunas_disponiveis = all(col in mov_periodo.columns for col in colunas_necessarias)
-                
-                if colunas_disponiveis:
-                    # Agrupar por mês/ano
-                    try:
-                        # Verifica quais colunas estão disponíveis para agregação
-                        agg_columns = {}
-                        if 'entrada' in mov_periodo.columns:
-                            agg_columns['entrada'] = ['sum', 'mean', 'max']
-                        if 'saida' in mov_periodo.columns:
-                            agg_columns['saida'] = ['sum', 'mean', 'max']
-                        
-                        # Realiza a agregação
-                        mov_stats = mov_periodo.groupby('mes_ano').agg(agg_columns)
-                        
-                        # Reinicia o índice para ter mes_ano como coluna
-                        mov_stats = mov_stats.reset_index()
-                        
-                        # Criação da tabela de estatísticas com segurança
-                        if 'mes_ano' in mov_stats.columns:
-                            # Cria tabela formatada com as colunas que existem
-                            stats_data = {'Mês/Ano': mov_stats['mes_ano']}
-                            
-                            # Adiciona as colunas de estatísticas que existem
-                            if ('entrada', 'sum') in mov_stats.columns:
-                                stats_data['Total Receitas (R$)'] = mov_stats[('entrada', 'sum')].apply(lambda x: f"{x:,.2f}")
-                            elif 'entrada_sum' in mov_stats.columns:
-                                stats_data['Total Receitas (R$)'] = mov_stats['entrada_sum'].apply(lambda x: f"{x:,.2f}")
-                            
-                            if ('entrada', 'mean') in mov_stats.columns:
-                                stats_data['Média Receitas (R$)'] = mov_stats[('entrada', 'mean')].apply(lambda x: f"{x:,.2f}")
-                            elif 'entrada_mean' in mov_stats.columns:
-                                stats_data['Média Receitas (R$)'] = mov_stats['entrada_mean'].apply(lambda x: f"{x:,.2f}")
-                            
-                            if ('entrada', 'max') in mov_stats.columns:
-                                stats_data['Maior Receita (R$)'] = mov_stats[('entrada', 'max')].apply(lambda x: f"{x:,.2f}")
-                            elif 'entrada_max' in mov_stats.columns:
-                                stats_data['Maior Receita (R$)'] = mov_stats['entrada_max'].apply(lambda x: f"{x:,.2f}")
-                            
-                            if ('saida', 'sum') in mov_stats.columns:
-                                stats_data['Total Despesas (R$)'] = mov_stats[('saida', 'sum')].apply(lambda x: f"{x:,.2f}")
-                            elif 'saida_sum' in mov_stats.columns:
-                                stats_data['Total Despesas (R$)'] = mov_stats['saida_sum'].apply(lambda x: f"{x:,.2f}")
-                            
-                            if ('saida', 'mean') in mov_stats.columns:
-                                stats_data['Média Despesas (R$)'] = mov_stats[('saida', 'mean')].apply(lambda x: f"{x:,.2f}")
-                            elif 'saida_mean' in mov_stats.columns:
-                                stats_data['Média Despesas (R$)'] = mov_stats['saida_mean'].apply(lambda x: f"{x:,.2f}")
-                            
-                            if ('saida', 'max') in mov_stats.columns:
-                                stats_data['Maior Despesa (R$)'] = mov_stats[('saida', 'max')].apply(lambda x: f"{x:,.2f}")
-                            elif 'saida_max' in mov_stats.columns:
-                                stats_data['Maior Despesa (R$)'] = mov_stats['saida_max'].apply(lambda x: f"{x:,.2f}")
-                            
-                            # Cria e exibe a tabela
-                            stats_table = pd.DataFrame(stats_data)
-                            st.dataframe(stats_table, use_container_width=True)
-                            
-                            st.info("""
-                            **Análise Estatística (Pereira da Silva, 2017)**: A tabela acima mostra a evolução mensal 
-                            dos valores totais, médios e máximos de receitas e despesas. Estas informações são 
-                            fundamentais para identificar padrões e anomalias no fluxo financeiro da agência.
-                            """)
-                        else:
-                            st.info("ℹ️ Erro na estrutura dos dados agregados. Não foi possível mostrar estatísticas.")
-                    except Exception as e:
-                        st.info(f"ℹ️ Não foi possível gerar as estatísticas mensais. Erro: {str(e)}")
-                else:
-                    st.info("ℹ️ Os dados não contêm todas as colunas necessárias para a análise estatística.")
-            else:
-                st.info("ℹ️ Não há movimentações para o período selecionado.")
-        else:
-            st.info("ℹ️ Não há movimentações para análise.")
+        armazenados = armazem.estatisticas()
+        st.sidebar.caption(
+            f"🗄️ Snapshots compartilhados: {armazenados['versoes']} versão(ões) · "
+            f"{armazenados['referencias']} sessão(ões) · {armazenados['memoria'] / 1024 ** 2:,.1f} MB"
+        )
 
-    st.write("---")
-    st.subheader("Exportar Relatório")
-    
-    col1, col2 = st.columns([3, 1])
+    # Painel de depuração: tamanho do payload, tipo de renderização e tempos da página
+    painel_tempos = None
+    if st.sidebar.checkbox("Depuração dos gráficos", value=False, key="depuracao_graficos"):
+        cache = cache_figuras.estatisticas()
+        st.sidebar.caption(
+            f"🔧 Cache de figuras: {cache['itens']} itens · "
+            f"{cache['acertos']} acertos · {cache['falhas']} falhas"
+        )
+        if estado_aquecimento['estado'] == 'concluido':
+            st.sidebar.caption(
+                f"🔥 {estado_aquecimento['periodos']} períodos predefinidos pré-calculados "
+                f"em {estado_aquecimento['duracao']:,.2f} s"
+            )
+        else:
+            st.sidebar.caption(f"🔥 Pré-cálculo dos períodos predefinidos: {estado_aquecimento['estado']}")
+        painel_tempos = st.sidebar.empty()
+    
+    # Partições por filial e índices de somas acumuladas (construídos uma vez por versão dos dados)
+    particoes = data['particoes']
+    if filial not in particoes.movimentacoes:
+        filial = FILIAL_CONSOLIDADO
+    
+    # A visão de uma filial usa sua partição e seu índice; a consolidada, o índice combinado
+    versao = data['versao']
+    if filial == FILIAL_CONSOLIDADO:
+        indice = particoes.consolidado
+    else:
+        df_movimentacoes = particoes.movimentacoes[filial]
+        indice = particoes.indices[filial]
+        versao = versao + (filial,)
+    
+    # Consulta rápida de totais com controle deslizante
+    if not indice.vazio:
+        with st.sidebar:
+            consulta_rapida_periodo(indice, data_min, data_max, periodo_inicio, periodo_fim)
+    
+    # Contexto compartilhado pelas seções (cada seção é um fragmento independente)
+    contexto = {
+        'versao': versao,
+        'filial': filial,
+        'particoes': particoes,
+        'df_movimentacoes': df_movimentacoes,
+        'df_despesas': df_despesas,
+        'df_faturas': df_faturas,
+        'indice': indice,
+        'comparacao': comparacao,
+        'periodo_inicio': periodo_inicio,
+        'periodo_fim': periodo_fim
+    }
     
-    with col1:
-        st.write("""
-        Gere um relatório financeiro completo em PDF com os dados do período selecionado.
-        O relatório incluirá todos os indicadores, análises e gráficos apresentados no dashboard.
-        """)
+    # Exportação do relatório na barra lateral
+    with st.sidebar:
+        st.write("---")
+        secao_relatorio_pdf(contexto)
+    
+    # Apenas a seção selecionada é calculada e renderizada
+    secao = st.radio(
+        "Seção",
+        SECOES,
+        horizontal=True,
+        label_visibility="collapsed",
+        key="secao_dashboard"
+    )
     
-    with col2:
-        if st.button("📄 Gerar Relatório PDF", type="primary"):
-            # Verifica se há dados suficientes
-            if not df_movimentacoes.empty or not df_despesas.empty or not df_faturas.empty:
-                with st.spinner("Gerando relatório financeiro..."):
-                    try:
-                        # Gera um nome de arquivo baseado no período
-                        nome_arquivo = f"Relatorio_Financeiro_{periodo_inicio.strftime('%d%m%Y')}_a_{periodo_fim.strftime('%d%m%Y')}.pdf"
-                        
-                        # Chama a função para gerar o relatório
-                        base64_pdf = gerar_relatorio_financeiro(
-                            dados_metricas=metricas,
-                            periodo_inicio=periodo_inicio,
-                            periodo_fim=periodo_fim
-                        )
-                        
-                        # Cria o link para download
-                        st.markdown(
-                            criar_link_download(base64_pdf, nome_arquivo),
-                            unsafe_allow_html=True
-                        )
-                        
-                        st.success(f"✅ Relatório gerado com sucesso!")
-                    except Exception as e:
-                        st.error(f"❌ Erro ao gerar relatório: {str(e)}")
-            else:
-                st.warning("⚠️ Não há dados suficientes para gerar o relatório. Por favor, importe ou cadastre dados.")
+    if secao == "Visão Geral":
+        secao_visao_geral(contexto)
+    elif secao == "Análise de Custos":
+        secao_analise_custos(contexto)
+    elif secao == "Análise Temporal":
+        secao_analise_temporal(contexto)
+    else:
+        st.subheader("Lançamentos")
+        explorador_lancamentos(contexto)
+    
+    # Tempo até os indicadores (primeira exibição útil) e até a página completa
+    historico = registrar_tempos(tempo_primeira_exibicao, (time.perf_counter() - inicio_execucao) * 1000)
+    if painel_tempos is not None:
+        mediana = pd.DataFrame(historico).median()
+        painel_tempos.caption(
+            f"⏱️ Indicadores em {historico[-1]['primeira_exibicao']:,.0f} ms · "
+            f"página completa em {historico[-1]['completo']:,.0f} ms "
+            f"(medianas de {len(historico)} execuções: {mediana['primeira_exibicao']:,.0f} ms / "
+            f"{mediana['completo']:,.0f} ms)"
+        )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -7,8 +7,14 @@ from datetime import datetime
 # Adiciona o diretório src ao path para poder importar os módulos
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database import engine, DATABASE_URL
+from database import (
+    engine_escrita, engine_leitura, DATABASE_URL, DATABASE_READ_URL, IS_SQLITE,
+    SQLITE_PERFIL, PERFIS_SQLITE, LIMITE_RETENCAO, configuracoes_sqlite, estatisticas_pool
+)
 from sqlalchemy import text, inspect
+from saude_banco import saude_banco, TTL_SAUDE, LIMITE_FALHAS, TEMPO_RECUPERACAO
+import motor_analitico
+import snapshot_parquet
 
 st.set_page_config(
     page_title="Diagnóstico de Banco de Dados",
@@ -38,6 +44,24 @@ with col2:
     st.write("**Data/Hora Atual:**")
     st.code(datetime.now().strftime("%d/%m/%Y %H:%M:%S"))
 
+# Estado da verificação de saúde usada pelas páginas
+st.subheader("Verificação de Saúde")
+
+saude_banco.verificar()
+estado_saude = saude_banco.estado()
+col1, col2, col3 = st.columns(3)
+col1.metric("Banco", {True: "Disponível", False: "Indisponível"}.get(estado_saude['disponivel'], "Verificando..."))
+col2.metric("Circuito", estado_saude['circuito'].replace('_', ' ').capitalize())
+col3.metric("Falhas Consecutivas", estado_saude['falhas_consecutivas'])
+if estado_saude['verificado_em']:
+    st.caption(
+        f"Última sondagem: {datetime.fromtimestamp(estado_saude['verificado_em']).strftime('%d/%m/%Y %H:%M:%S')} "
+        f"({(estado_saude['duracao'] or 0) * 1000:.0f} ms) · TTL {TTL_SAUDE:.0f}s · o circuito abre após "
+        f"{LIMITE_FALHAS} falhas e tenta novamente a cada {TEMPO_RECUPERACAO:.0f}s"
+    )
+if estado_saude['erro']:
+    st.code(estado_saude['erro'])
+
 # Teste de conexão
 st.subheader("Teste de Conexão")
 
@@ -45,7 +69,7 @@ if st.button("Testar Conexão"):
     with st.spinner("Testando conexão com o banco..."):
         try:
             start_time = time.time()
-            with engine.connect() as conn:
+            with engine_leitura.connect() as conn:
                 result = conn.execute(text("SELECT 1"))
                 row = result.fetchone()
             end_time = time.time()
@@ -58,6 +82,108 @@ if st.button("Testar Conexão"):
             st.error(f"❌ Erro ao conectar: {str(e)}")
             st.code(str(e))
 
+# Perfil de desempenho do SQLite
+st.subheader("Perfil de Desempenho")
+
+if IS_SQLITE:
+    st.write(f"**Perfil SQLite:** `{SQLITE_PERFIL}` (variável de ambiente SQLITE_PERFIL; "
+             f"opções: {', '.join(PERFIS_SQLITE)})")
+    try:
+        configuracoes = configuracoes_sqlite()
+        st.dataframe(
+            [
+                {
+                    'PRAGMA': pragma,
+                    'Configurado': '—' if valores['configurado'] is None else str(valores['configurado']),
+                    'Efetivo': str(valores['efetivo'])
+                }
+                for pragma, valores in configuracoes.items()
+            ],
+            hide_index=True,
+            use_container_width=True
+        )
+    except Exception as e:
+        st.error(f"❌ Erro ao ler as configurações do SQLite: {str(e)}")
+else:
+    st.info("ℹ️ Os perfis de desempenho se aplicam apenas ao SQLite.")
+
+# Pools de conexão de leitura (dashboard) e escrita (importações)
+st.subheader("Pools de Conexão")
+
+uso_pools = estatisticas_pool()
+st.dataframe(
+    [
+        {
+            'Engine': nome,
+            'Destino': engine_pool.url.render_as_string(hide_password=True),
+            'Status do Pool': engine_pool.pool.status()
+        }
+        for nome, engine_pool in (('Leitura', engine_leitura), ('Escrita', engine_escrita))
+    ],
+    hide_index=True,
+    use_container_width=True
+)
+st.dataframe(
+    [
+        {
+            'Pool': nome,
+            'Checkouts': uso['checkouts'],
+            'Em Uso': uso['em_uso'],
+            f'Retidas > {LIMITE_RETENCAO:.0f}s': uso['retencoes_longas'],
+            'Maior Retenção (s)': round(uso['maior_retencao'], 2)
+        }
+        for nome, uso in uso_pools['pools'].items()
+    ],
+    hide_index=True,
+    use_container_width=True
+)
+if uso_pools['sessoes_retidas']:
+    st.warning(f"⚠️ {len(uso_pools['sessoes_retidas'])} sessão(ões) aberta(s) há mais de {LIMITE_RETENCAO:.0f}s")
+    st.dataframe(uso_pools['sessoes_retidas'], hide_index=True, use_container_width=True)
+if DATABASE_READ_URL != DATABASE_URL:
+    st.info("ℹ️ As leituras do dashboard usam uma réplica (DATABASE_READ_URL).")
+
+# Motor das agregações do dashboard (DuckDB opcional)
+st.subheader("Motor Analítico")
+
+estado_motor = motor_analitico.estado()
+col1, col2, col3 = st.columns(3)
+col1.metric("Modo", estado_motor['motor'].capitalize())
+col2.metric("DuckDB", estado_motor['versao_duckdb'] or "Não instalado")
+col3.metric("Threads", estado_motor['threads'])
+if not estado_motor['duckdb_disponivel']:
+    st.info("ℹ️ Sem o DuckDB (pip install duckdb), as agregações do dashboard são feitas no pandas.")
+elif estado_motor['motor'] == 'auto':
+    st.caption(f"Tabelas a partir de {estado_motor['limite_linhas']:,} linhas são agregadas no DuckDB; "
+               "as menores, no pandas.")
+if estado_motor['ultima_falha']:
+    st.warning("⚠️ A última agregação pelo DuckDB falhou e foi refeita no pandas:")
+    st.code(estado_motor['ultima_falha'])
+
+# Snapshot em Parquet
+st.subheader("Snapshot em Parquet")
+
+manifesto = snapshot_parquet.ler_manifesto()
+if not snapshot_parquet.PARQUET_DISPONIVEL:
+    st.info("ℹ️ Sem o pyarrow (pip install pyarrow), o dashboard lê sempre do banco.")
+elif manifesto is None:
+    st.info(f"ℹ️ Nenhum snapshot em {snapshot_parquet.PASTA_PARQUET}; o dashboard lê do banco.")
+else:
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Gerado em", manifesto['gerado_em'].replace('T', ' '))
+    col2.metric("Partições", sum(len(particoes) for particoes in manifesto['tabelas'].values()))
+    col3.metric("Linhas", f"{sum(p['linhas'] for particoes in manifesto['tabelas'].values() for p in particoes.values()):,}")
+    st.caption(f"Pasta: {snapshot_parquet.PASTA_PARQUET}")
+
+if snapshot_parquet.PARQUET_DISPONIVEL and st.button("Atualizar Snapshot"):
+    with st.spinner("Exportando partições alteradas..."):
+        try:
+            resumo = snapshot_parquet.exportar_snapshot()
+            st.success("✅ Snapshot atualizado")
+            st.table({tabela: contagem for tabela, contagem in resumo.items()})
+        except Exception as e:
+            st.error(f"❌ Erro ao exportar o snapshot: {str(e)}")
+
 # Informações do banco
 st.subheader("Informações do Banco")
 
@@ -65,7 +191,7 @@ if st.button("Obter Metadados"):
     with st.spinner("Obtendo metadados do banco..."):
         try:
             # Tenta obter metadados do banco
-            inspector = inspect(engine)
+            inspector = inspect(engine_leitura)
             
             # Lista as tabelas
             tables = inspector.get_table_names()
@@ -102,7 +228,7 @@ if st.button("Obter Metadados"):
                         # Contagem de registros
                         try:
                             count_query = text(f"SELECT COUNT(*) FROM {table}")
-                            with engine.connect() as conn:
+                            with engine_leitura.connect() as conn:
                                 result = conn.execute(count_query)
                                 count = result.scalar()
                             st.write(f"**Total de registros:** {count}")
@@ -120,13 +246,15 @@ st.subheader("Verificação de Ambiente")
 # Verifica variáveis de ambiente
 env_vars = {
     "DATABASE_URL": os.environ.get("DATABASE_URL", "Não definido"),
+    "DATABASE_READ_URL": os.environ.get("DATABASE_READ_URL", "Não definido"),
+    "SQLITE_PERFIL": os.environ.get("SQLITE_PERFIL", "Não definido"),
     "PYTHONPATH": os.environ.get("PYTHONPATH", "Não definido"),
     "PWD": os.environ.get("PWD", "Não definido"),
 }
 
 st.write("**Variáveis de Ambiente:**")
 for key, value in env_vars.items():
-    if key == "DATABASE_URL" and value != "Não definido":
+    if key in ("DATABASE_URL", "DATABASE_READ_URL") and value != "Não definido":
         # Mascara a senha na URL
         if ":" in value and "@" in value:
             parts = value.split("@")
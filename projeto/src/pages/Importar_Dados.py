@@ -11,8 +11,13 @@ from io import StringIO
 # Adiciona o diretório src ao path para poder importar os módulos
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database import get_db, test_connection
+from database import sessao
+from saude_banco import saude_banco
+from sqlalchemy import func
 from models import MovimentacaoBancaria, PlanoContas
+from carga_movimentacoes import limpar_movimentacoes, substituir_movimentacoes
+from periodos import iniciar_aquecimento
+from snapshot_parquet import atualizar_em_segundo_plano
 
 def converter_data(data_str):
     """Converte string de data para objeto datetime"""
@@ -145,20 +150,19 @@ def importar_plano_contas(df):
                     }
             
             # Limpa as tabelas - IMPORTANTE: primeiro movimentações, depois plano de contas
-            db = get_db()
-            db.query(MovimentacaoBancaria).delete()  # Primeiro limpa movimentações
-            db.query(PlanoContas).delete()           # Depois limpa plano de contas
-            
-            # Insere todos os registros do dicionário
-            for codigo, dados in codigos_plano.items():
-                conta = PlanoContas(
-                    codigo=codigo,
-                    descricao=dados['descricao'],
-                    categoria=dados['categoria']
-                )
-                db.add(conta)
+            with sessao(somente_leitura=False, descricao='importar_plano_contas') as db:
+                limpar_movimentacoes(db)                 # Primeiro limpa movimentações
+                db.query(PlanoContas).delete()           # Depois limpa plano de contas
+                
+                # Insere todos os registros do dicionário
+                for codigo, dados in codigos_plano.items():
+                    conta = PlanoContas(
+                        codigo=codigo,
+                        descricao=dados['descricao'],
+                        categoria=dados['categoria']
+                    )
+                    db.add(conta)
             
-            db.commit()
             return True, f"Importados {len(codigos_plano)} registros do plano de contas com sucesso!"
         else:
             return False, "Arquivo CSV não contém as colunas necessárias (Natureza, Nome Natureza)"
@@ -166,13 +170,7 @@ def importar_plano_contas(df):
     except Exception as e:
         import traceback
         traceback.print_exc()
-        if 'db' in locals():
-            db.rollback()
         return False, f"Erro ao importar plano de contas: {str(e)}"
-    
-    finally:
-        if 'db' in locals():
-            db.close()
 
 def importar_movimentacoes(df):
     """Importa as movimentações bancárias do DataFrame para o banco de dados"""
@@ -183,7 +181,7 @@ def importar_movimentacoes(df):
         df['Saida'] = df['Saida'].apply(limpar_valor_monetario)
         
         # Converte códigos para string
-        for col in ['Agencia', 'Conta Banco', 'Natureza']:
+        for col in ['Filial Orig', 'Agencia', 'Conta Banco', 'Natureza']:
             if col in df.columns:
                 df[col] = df[col].astype(str).str.replace('.0', '')
                 df[col] = df[col].replace('nan', '')
@@ -202,76 +200,46 @@ def importar_movimentacoes(df):
             axis=1
         )
         
-        # Limpa a tabela de movimentações
-        db = get_db()
-        db.query(MovimentacaoBancaria).delete()
+        # Movimentações no formato da tabela (padrão: filial única "1")
+        filial = df['Filial Orig'].where(df['Filial Orig'] != '', '1') if 'Filial Orig' in df.columns else '1'
+        carga = pd.DataFrame({
+            'filial': filial,
+            'data': df['Data'],
+            'banco': df['Banco'].astype(str),
+            'agencia': df['Agencia'].astype(str),
+            'conta': df['Conta Banco'].astype(str),
+            'natureza': df['Natureza'].astype(str),
+            'nome_natureza': df['Nome Natureza'].astype(str),
+            'documento': df['Documento'].astype(str),
+            'entrada': df['Entrada'],
+            'saida': df['Saida'],
+            'historico': df['Historico'].astype(str),
+            'categoria': df['Categoria'],
+            'tipo_custo': df['Tipo']
+        })
         
-        # Adiciona os registros em lotes
-        registros = []
-        count = 0
+        # Substitui as movimentações (COPY no PostgreSQL, inserts em lote no SQLite)
+        with sessao(somente_leitura=False, descricao='importar_movimentacoes') as db:
+            count = substituir_movimentacoes(db, carga)
         
-        for _, row in df.iterrows():
-            try:
-                # Verifica se é uma linha válida com data
-                if pd.isna(row['Data']):
-                    continue
-                
-                # Padrão para uma filial única
-                filial = "1"  # Filial única
-                
-                mov = MovimentacaoBancaria(
-                    filial=filial,
-                    data=row['Data'],
-                    banco=str(row['Banco']),
-                    agencia=str(row['Agencia']),
-                    conta=str(row['Conta Banco']),
-                    natureza=str(row['Natureza']),
-                    nome_natureza=str(row['Nome Natureza']),
-                    documento=str(row['Documento']),
-                    entrada=row['Entrada'] if not pd.isna(row['Entrada']) else None,
-                    saida=row['Saida'] if not pd.isna(row['Saida']) else None,
-                    historico=str(row['Historico']),
-                    categoria=str(row.get('Categoria', 'Não categorizado')),
-                    tipo_custo=str(row.get('Tipo', 'Não classificado'))
-                )
-                registros.append(mov)
-                count += 1
-                
-                # Commit a cada 50 registros
-                if len(registros) >= 50:
-                    db.add_all(registros)
-                    db.commit()
-                    registros = []
-            except Exception as e:
-                print(f"Erro ao processar linha {_}: {e}")
-                continue  # Pula para a próxima linha em caso de erro
+        # Pré-calcula em segundo plano as métricas dos períodos predefinidos
+        iniciar_aquecimento()
         
-        # Adiciona registros restantes
-        if registros:
-            db.add_all(registros)
-            db.commit()
+        # Atualiza em segundo plano as partições alteradas do snapshot em Parquet, se houver um
+        atualizar_em_segundo_plano()
             
         return True, f"Importados {count} registros de movimentações bancárias"
     
     except Exception as e:
         import traceback
         traceback.print_exc()
-        if 'db' in locals():
-            db.rollback()
         return False, f"Erro ao importar movimentações: {str(e)}"
-    
-    finally:
-        if 'db' in locals():
-            db.close()
 
 def main():
     st.title("Importação de Dados")
     
-    # Verifica a conexão com o banco
-    with st.spinner("Verificando conexão com o banco de dados..."):
-        connection_result = test_connection()
-    
-    if not connection_result:
+    # Estado da conexão com o banco (em cache, verificado em segundo plano)
+    if not saude_banco.disponivel():
         st.error("❌ Não foi possível conectar ao banco de dados!")
         
         if st.button("Verificar Status do Banco"):
@@ -296,6 +264,7 @@ def main():
     - **Entrada**: Valores recebidos
     - **Saida**: Valores pagos
     - **Historico**: Descrição da movimentação
+    - **Filial Orig** (opcional): Código da filial de origem
     """)
     
     uploaded_file = st.file_uploader("Selecione o arquivo CSV", type=["csv"])
@@ -372,69 +341,67 @@ def main():
     # Exibe informações sobre os dados já importados
     st.subheader("Dados Atualmente Importados")
     
-    db = get_db()
     try:
-        # Conta registros nas tabelas
-        plano_contas_count = db.query(PlanoContas).count()
-        movimentacoes_count = db.query(MovimentacaoBancaria).count()
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.metric("Plano de Contas", f"{plano_contas_count} registros")
-        
-        with col2:
-            st.metric("Movimentações Bancárias", f"{movimentacoes_count} registros")
-        
-        # Se há movimentações, mostra um resumo
-        if movimentacoes_count > 0:
-            # Data da movimentação mais recente
-            ultima_mov = db.query(MovimentacaoBancaria).order_by(MovimentacaoBancaria.data.desc()).first()
-            primeira_mov = db.query(MovimentacaoBancaria).order_by(MovimentacaoBancaria.data.asc()).first()
-            
-            # Soma de entradas e saídas
-            totais = db.query(
-                db.func.sum(MovimentacaoBancaria.entrada).label("total_entradas"),
-                db.func.sum(MovimentacaoBancaria.saida).label("total_saidas")
-            ).one()
+        with sessao(descricao='dados_importados') as db:
+            # Conta registros nas tabelas
+            plano_contas_count = db.query(PlanoContas).count()
+            movimentacoes_count = db.query(MovimentacaoBancaria).count()
             
-            st.write("### Resumo das Movimentações")
-            
-            col1, col2, col3 = st.columns(3)
+            col1, col2 = st.columns(2)
             
             with col1:
-                st.metric("Período", f"{primeira_mov.data.strftime('%d/%m/%Y')} a {ultima_mov.data.strftime('%d/%m/%Y')}")
+                st.metric("Plano de Contas", f"{plano_contas_count} registros")
             
             with col2:
-                st.metric("Total de Entradas", f"R$ {totais.total_entradas:,.2f}")
-            
-            with col3:
-                st.metric("Total de Saídas", f"R$ {totais.total_saidas:,.2f}")
+                st.metric("Movimentações Bancárias", f"{movimentacoes_count} registros")
             
-            # Botão para ver dashboard
-            if st.button("Ver Dashboard Financeiro", type="primary"):
-                st.switch_page("pages/dashboard_financeiro.py")
-            
-        elif plano_contas_count > 0 or movimentacoes_count > 0:
-            # Aviso de dados inconsistentes
-            st.warning("⚠️ Dados podem estar inconsistentes. Considere reimportar os dados.")
-        else:
-            # Não há dados
-            st.info("ℹ️ Não há dados importados no sistema. Por favor, importe um arquivo CSV.")
-            
-            # Exibe exemplo
-            with st.expander("Ver exemplo de formato de arquivo CSV"):
-                st.write("""
-                ```
-                Data,Banco,Agencia,Conta Banco,Natureza,Nome Natureza,Documento,Entrada,Saida,Historico
-                01/01/2023,Banco X,1234,56789,1001,Receita de Vendas,NF-001,5000.00,0.00,Faturamento Cliente ABC
-                15/01/2023,Banco X,1234,56789,2001,Aluguel,BOL-123,0.00,1500.00,Pagamento aluguel sede
-                ```
-                """)
+            # Se há movimentações, mostra um resumo
+            if movimentacoes_count > 0:
+                # Data da movimentação mais recente
+                ultima_mov = db.query(MovimentacaoBancaria).order_by(MovimentacaoBancaria.data.desc()).first()
+                primeira_mov = db.query(MovimentacaoBancaria).order_by(MovimentacaoBancaria.data.asc()).first()
+                
+                # Soma de entradas e saídas
+                totais = db.query(
+                    func.sum(MovimentacaoBancaria.entrada).label("total_entradas"),
+                    func.sum(MovimentacaoBancaria.saida).label("total_saidas")
+                ).one()
+                
+                st.write("### Resumo das Movimentações")
+                
+                col1, col2, col3 = st.columns(3)
+                
+                with col1:
+                    st.metric("Período", f"{primeira_mov.data.strftime('%d/%m/%Y')} a {ultima_mov.data.strftime('%d/%m/%Y')}")
+                
+                with col2:
+                    st.metric("Total de Entradas", f"R$ {totais.total_entradas:,.2f}")
+                
+                with col3:
+                    st.metric("Total de Saídas", f"R$ {totais.total_saidas:,.2f}")
+                
+                # Botão para ver dashboard
+                if st.button("Ver Dashboard Financeiro", type="primary"):
+                    st.switch_page("pages/dashboard_financeiro.py")
+                
+            elif plano_contas_count > 0 or movimentacoes_count > 0:
+                # Aviso de dados inconsistentes
+                st.warning("⚠️ Dados podem estar inconsistentes. Considere reimportar os dados.")
+            else:
+                # Não há dados
+                st.info("ℹ️ Não há dados importados no sistema. Por favor, importe um arquivo CSV.")
+                
+                # Exibe exemplo
+                with st.expander("Ver exemplo de formato de arquivo CSV"):
+                    st.write("""
+                    ```
+                    Data,Banco,Agencia,Conta Banco,Natureza,Nome Natureza,Documento,Entrada,Saida,Historico
+                    01/01/2023,Banco X,1234,56789,1001,Receita de Vendas,NF-001,5000.00,0.00,Faturamento Cliente ABC
+                    15/01/2023,Banco X,1234,56789,2001,Aluguel,BOL-123,0.00,1500.00,Pagamento aluguel sede
+                    ```
+                    """)
     except Exception as e:
         st.error(f"❌ Erro ao consultar o banco de dados: {str(e)}")
-    finally:
-        db.close()
     
     # Botões no rodapé
     st.write("---")
@@ -0,0 +1,129 @@
+import functools
+import threading
+import time
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+
+from database import sessao
+from dados_financeiros import versao_dados
+from grafo_metricas import obter_grafo
+from snapshots import SnapshotDados, armazem
+
+# Períodos predefinidos oferecidos na barra lateral
+PERIODOS_PREDEFINIDOS = {
+    'mes_atual': 'Mês atual',
+    'mes_anterior': 'Mês anterior',
+    'trimestre': 'Trimestre até a data',
+    'ano': 'Ano até a data',
+    'ultimos_12_meses': 'Últimos 12 meses'
+}
+
+# Situação do último aquecimento do cache (compartilhada entre sessões)
+estado_aquecimento = {'estado': 'ocioso', 'versao': None, 'duracao': None, 'periodos': 0, 'erro': None,
+                      'pendente': False}
+_aquecimento_lock = threading.Lock()
+
+
+def intervalo_predefinido(chave, referencia):
+    """
+    Calcula o intervalo de um período predefinido.
+
+    Args:
+        chave (str): Chave de PERIODOS_PREDEFINIDOS
+        referencia (date): Data de referência ("hoje"), normalmente o último lançamento
+
+    Returns:
+        tuple: (início, fim) do período
+    """
+    inicio_mes = referencia.replace(day=1)
+
+    if chave == 'mes_atual':
+        return inicio_mes, referencia
+    if chave == 'mes_anterior':
+        fim = inicio_mes - timedelta(days=1)
+        return fim.replace(day=1), fim
+    if chave == 'trimestre':
+        return inicio_mes.replace(month=(referencia.month - 1) // 3 * 3 + 1), referencia
+    if chave == 'ano':
+        return referencia.replace(month=1, day=1), referencia
+    if chave == 'ultimos_12_meses':
+        return referencia - relativedelta(years=1) + timedelta(days=1), referencia
+
+    raise ValueError(f"Período predefinido desconhecido: {chave}")
+
+def intervalos_predefinidos(referencia):
+    """Intervalos de todos os períodos predefinidos para a data de referência"""
+    return {chave: intervalo_predefinido(chave, referencia) for chave in PERIODOS_PREDEFINIDOS}
+
+def aquecer_periodos_predefinidos():
+    """
+    Pré-calcula as métricas dos períodos predefinidos no cache de grafos.
+
+    Carrega o snapshot compartilhado da versão atual (o mesmo usado pelas sessões
+    do dashboard), constrói o índice consolidado e calcula o pacote de métricas de
+    cada período, de modo que a primeira visita ao dashboard após uma importação
+    encontre os dados e os grafos já calculados.
+    """
+    inicio = time.perf_counter()
+    estado_aquecimento.update({'estado': 'executando', 'erro': None})
+    try:
+        with sessao(descricao='aquecimento_periodos') as db:
+            versao = versao_dados(db)
+        snapshot = armazem.adquirir(versao, functools.partial(SnapshotDados.carregar_versao, versao))
+
+        try:
+            dados = snapshot.dataframes()
+            df_movimentacoes = dados['df_movimentacoes']
+            periodos = 0
+            if not df_movimentacoes.empty:
+                indice = snapshot.particoes.consolidado
+                referencia = df_movimentacoes['data'].max().date()
+
+                for periodo_inicio, periodo_fim in intervalos_predefinidos(referencia).values():
+                    obter_grafo(versao, df_movimentacoes, dados['df_despesas'], dados['df_faturas'],
+                                periodo_inicio, periodo_fim, indice).obter('metricas')
+                periodos = len(PERIODOS_PREDEFINIDOS)
+        finally:
+            armazem.liberar(versao)
+
+        estado_aquecimento.update({
+            'estado': 'concluido',
+            'versao': versao,
+            'periodos': periodos,
+            'duracao': time.perf_counter() - inicio
+        })
+    except Exception as e:
+        print(f"⚠️ Erro ao pré-calcular os períodos predefinidos: {e}")
+        estado_aquecimento.update({'estado': 'erro', 'erro': str(e)})
+
+def _executar_aquecimento():
+    """Aquece o cache e repete enquanto houver pedidos feitos durante a execução"""
+    while True:
+        aquecer_periodos_predefinidos()
+        with _aquecimento_lock:
+            if not estado_aquecimento['pendente']:
+                return
+            estado_aquecimento['pendente'] = False
+
+def iniciar_aquecimento(versao=None):
+    """
+    Inicia o aquecimento do cache em segundo plano.
+
+    Sem versão (chamado após uma importação), sempre aquece; se já houver um
+    aquecimento em andamento, outro é feito ao final dele. Com a versão atual dos
+    dados, não faz nada se ela já tiver sido aquecida ou estiver em aquecimento.
+
+    Returns:
+        bool: True se um novo aquecimento foi iniciado
+    """
+    with _aquecimento_lock:
+        if estado_aquecimento['estado'] == 'executando':
+            if versao is None:
+                estado_aquecimento['pendente'] = True
+            return False
+        if versao is not None and estado_aquecimento['versao'] == versao and estado_aquecimento['estado'] != 'erro':
+            return False
+        estado_aquecimento['estado'] = 'executando'
+        threading.Thread(target=_executar_aquecimento, name='aquecimento-periodos', daemon=True).start()
+        return True
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+
+from dados_financeiros import get_month_name
+from indice_acumulado import TERMOS_FIXOS_HISTORICO
+
+# Colunas da série mensal do ponto de equilíbrio
+COLUNAS_SERIE = ['mes_ano', 'receitas', 'custos_fixos', 'custos_variaveis', 'margem_contribuicao',
+                 'indice_mc', 'ponto_equilibrio', 'margem_seguranca', 'resultado']
+
+
+def custos_mensais(mov_periodo):
+    """
+    Receitas, custos fixos e custos variáveis de cada mês.
+
+    Usa a mesma classificação de calcular_custos_fixos_variaveis: o tipo_custo dos
+    lançamentos ou, quando nenhuma saída do período está classificada, o histórico.
+
+    Returns:
+        DataFrame: Indexado por período mensal, com mes_ano, receitas, custos_fixos
+            e custos_variaveis
+    """
+    colunas = ['mes_ano', 'receitas', 'custos_fixos', 'custos_variaveis']
+    if mov_periodo.empty or not all(col in mov_periodo.columns for col in ['data', 'entrada', 'saida']):
+        return pd.DataFrame(columns=colunas)
+
+    saida = mov_periodo['saida'].to_numpy(dtype='float64')
+    eh_saida = saida > 0
+
+    if 'tipo_custo' in mov_periodo.columns:
+        tipo = mov_periodo['tipo_custo'].astype(object)
+    else:
+        tipo = pd.Series('Não classificado', index=mov_periodo.index)
+    tipos_saida = set(tipo[eh_saida].dropna())
+
+    if tipos_saida == {'Não classificado'} and 'historico' in mov_periodo.columns:
+        # Sem classificação no período: usa os termos do histórico
+        padrao = '|'.join(TERMOS_FIXOS_HISTORICO)
+        eh_fixo = mov_periodo['historico'].astype(str).str.lower().str.contains(padrao, regex=True).to_numpy()
+        eh_variavel = ~eh_fixo
+    else:
+        eh_fixo = (tipo == 'Fixo').to_numpy()
+        eh_variavel = (tipo == 'Variável').to_numpy()
+
+    valores = pd.DataFrame({
+        'receitas': mov_periodo['entrada'].to_numpy(dtype='float64'),
+        'custos_fixos': np.where(eh_saida & eh_fixo, saida, 0.0),
+        'custos_variaveis': np.where(eh_saida & eh_variavel, saida, 0.0),
+    }, index=mov_periodo['data'].dt.to_period('M'))
+
+    mensal = valores.groupby(level=0).sum().sort_index()
+    mensal.index.name = 'periodo'
+    mensal.insert(0, 'mes_ano', [f"{get_month_name(p.month)}/{p.year}" for p in mensal.index])
+    return mensal
+
+def serie_ponto_equilibrio(mensal):
+    """
+    Calcula, de forma vetorizada, o ponto de equilíbrio de cada mês (Martins, 2018).
+
+    Meses sem receita ou com custos variáveis maiores que a receita ficam sem
+    ponto de equilíbrio (NaN), como em calcular_ponto_equilibrio.
+
+    Args:
+        mensal (DataFrame): Resultado de custos_mensais
+
+    Returns:
+        DataFrame: Margem de contribuição, índice MC, ponto de equilíbrio, margem de
+            segurança (% da receita acima do ponto de equilíbrio) e resultado por mês
+    """
+    if mensal.empty:
+        return pd.DataFrame(columns=COLUNAS_SERIE)
+
+    receitas = mensal['receitas'].to_numpy(dtype='float64')
+    custos_fixos = mensal['custos_fixos'].to_numpy(dtype='float64')
+    custos_variaveis = mensal['custos_variaveis'].to_numpy(dtype='float64')
+
+    margem_contribuicao = receitas - custos_variaveis
+    with np.errstate(divide='ignore', invalid='ignore'):
+        indice_mc = np.where(receitas > 0, margem_contribuicao / receitas, np.nan)
+        valido = indice_mc > 0
+        ponto_equilibrio = np.where(valido, custos_fixos / indice_mc, np.nan)
+        margem_seguranca = np.where(valido, (receitas - ponto_equilibrio) / receitas * 100, np.nan)
+
+    serie = mensal[['mes_ano', 'receitas', 'custos_fixos', 'custos_variaveis']].copy()
+    serie['margem_contribuicao'] = margem_contribuicao
+    serie['indice_mc'] = np.where(valido, indice_mc, np.nan)
+    serie['ponto_equilibrio'] = ponto_equilibrio
+    serie['margem_seguranca'] = margem_seguranca
+    serie['resultado'] = margem_contribuicao - custos_fixos
+    return serie
+
+def grade_sensibilidade(total_receitas, custos_fixos, custos_variaveis, variacoes_receita, variacoes_custos_fixos):
+    """
+    Avalia todos os cenários de variação de receita e de custos fixos com broadcasting.
+
+    Os custos variáveis acompanham a receita (são proporcionais ao volume), de modo
+    que o índice de margem de contribuição é o mesmo em todos os cenários.
+
+    Args:
+        total_receitas (float): Receita do período
+        custos_fixos (float): Custos fixos do período
+        custos_variaveis (float): Custos variáveis do período
+        variacoes_receita (array): Variações percentuais da receita (linhas)
+        variacoes_custos_fixos (array): Variações percentuais dos custos fixos (colunas)
+
+    Returns:
+        dict: DataFrames 'resultado' (R$), 'margem_seguranca' (%) e 'ponto_equilibrio' (R$),
+            indexados pelas variações de receita, com as variações de custos fixos nas colunas
+    """
+    fator_receita = 1 + np.asarray(variacoes_receita, dtype='float64')[:, None] / 100
+    fator_fixos = 1 + np.asarray(variacoes_custos_fixos, dtype='float64')[None, :] / 100
+
+    receitas = total_receitas * fator_receita
+    fixos = custos_fixos * fator_fixos
+    margem_contribuicao = (total_receitas - custos_variaveis) * fator_receita
+
+    resultado = margem_contribuicao - fixos
+    with np.errstate(divide='ignore', invalid='ignore'):
+        indice_mc = (total_receitas - custos_variaveis) / total_receitas if total_receitas > 0 else np.nan
+        ponto_equilibrio = np.broadcast_to(
+            np.where(indice_mc > 0, fixos / indice_mc, np.nan), resultado.shape
+        )
+        margem_seguranca = np.where(receitas > 0, (receitas - ponto_equilibrio) / receitas * 100, np.nan)
+
+    def quadro(valores):
+        return pd.DataFrame(valores, index=pd.Index(variacoes_receita, name='variacao_receita'),
+                            columns=pd.Index(variacoes_custos_fixos, name='variacao_custos_fixos'))
+
+    return {
+        'resultado': quadro(resultado),
+        'margem_seguranca': quadro(margem_seguranca),
+        'ponto_equilibrio': quadro(ponto_equilibrio)
+    }
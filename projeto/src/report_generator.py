@@ -16,6 +16,9 @@ from reportlab.graphics.charts.barcharts import VerticalBarChart
 from reportlab.graphics.charts.piecharts import Pie
 from reportlab.graphics.charts.linecharts import HorizontalLineChart
 
+from grafo_metricas import calcular_ponto_equilibrio
+from estatisticas_mensais import tabela_estatisticas_mensais
+
 
 class FinancialReportGenerator:
     """
@@ -225,16 +228,18 @@ class FinancialReportGenerator:
         elementos.append(Spacer(1, 20))
         elementos.append(Paragraph("Ponto de Equilíbrio", self.styles['Heading3']))
         
-        # Calcula ponto de equilíbrio (se possível)
-        if (self.dados_metricas['total_receitas'] > 0 and 
-            self.dados_metricas['custos_variaveis'] < self.dados_metricas['total_receitas']):
-            
-            # Calcula margem de contribuição
-            margem_contribuicao = self.dados_metricas['total_receitas'] - self.dados_metricas['custos_variaveis']
-            indice_mc = margem_contribuicao / self.dados_metricas['total_receitas']
-            
-            # Ponto de equilíbrio
-            pe = self.dados_metricas['custos_fixos'] / indice_mc if indice_mc > 0 else 0
+        # Usa o ponto de equilíbrio do grafo de métricas (ou calcula, se não foi fornecido)
+        if 'ponto_equilibrio' in self.dados_metricas:
+            ponto_equilibrio = self.dados_metricas['ponto_equilibrio']
+        else:
+            ponto_equilibrio = calcular_ponto_equilibrio(
+                self.dados_metricas['total_receitas'],
+                self.dados_metricas['custos_fixos'],
+                self.dados_metricas['custos_variaveis']
+            )
+        
+        if ponto_equilibrio is not None:
+            pe = ponto_equilibrio['ponto_equilibrio']
             
             texto_pe = f"Ponto de Equilíbrio: {self.formatar_valor(pe)}"
             elementos.append(Paragraph(texto_pe, self.styles['Indicador']))
@@ -503,6 +508,106 @@ class FinancialReportGenerator:
         
         return elementos
     
+    def gerar_estatisticas_mensais(self):
+        """Gera a tabela de estatísticas mensais (mesmo cálculo exibido no dashboard)"""
+        elementos = []
+        
+        estatisticas = self.dados_metricas.get('estatisticas_mensais', pd.DataFrame())
+        
+        if estatisticas is None or estatisticas.empty:
+            return elementos
+        
+        elementos.append(Spacer(1, 10))
+        elementos.append(Paragraph("Estatísticas Mensais", self.styles['Heading3']))
+        
+        # Seleciona as colunas que cabem na largura da página
+        tabela_df = tabela_estatisticas_mensais(estatisticas, [
+            'receitas_total', 'receitas_mediana', 'receitas_p90',
+            'despesas_total', 'despesas_mediana', 'despesas_p90'
+        ])
+        
+        cabecalho = ["Mês/Ano", "Receitas", "Mediana", "P90", "Despesas", "Mediana", "P90"]
+        dados_tabela = [cabecalho] + tabela_df.values.tolist()
+        
+        tabela = Table(dados_tabela, colWidths=[79] + [62] * 6, repeatRows=1)
+        estilo_tabela = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', 8),
+            ('FONT', (0, 1), (-1, -1), 'Helvetica', 7),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
+        ])
+        
+        # Alterna cores nas linhas
+        for i in range(2, len(dados_tabela), 2):
+            estilo_tabela.add('BACKGROUND', (0, i), (-1, i), colors.whitesmoke)
+        
+        tabela.setStyle(estilo_tabela)
+        elementos.append(tabela)
+        
+        elementos.append(Spacer(1, 5))
+        elementos.append(Paragraph(
+            "Valores em R$. A mediana e o percentil 90 (P90) consideram apenas os lançamentos "
+            "do respectivo tipo e ajudam a identificar meses com valores atípicos.",
+            self.styles['NormalPersonalizado']
+        ))
+        
+        return elementos
+    
+    def gerar_anexo_lancamentos(self):
+        """
+        Gera o anexo com os lançamentos do período.
+        
+        Os lançamentos vêm em lotes (dados_adicionais['lotes_lancamentos']), lidos do
+        banco sob demanda: cada lote vira uma tabela do anexo e é descartado em seguida.
+        """
+        elementos = []
+        
+        lotes = self.dados_adicionais.get('lotes_lancamentos')
+        if lotes is None:
+            return elementos
+        
+        cabecalho = ["Data", "Categoria", "Histórico", "Entrada", "Saída"]
+        estilo_tabela = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
+            ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', 7),
+            ('FONT', (0, 1), (-1, -1), 'Helvetica', 6),
+            ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('ALIGN', (3, 1), (-1, -1), 'RIGHT'),
+        ])
+        
+        total = 0
+        for lote in lotes:
+            linhas = [
+                [
+                    pd.Timestamp(data).strftime('%d/%m/%Y'),
+                    (categoria or '')[:22],
+                    (historico or '')[:48],
+                    self.formatar_valor(entrada) if entrada else '',
+                    self.formatar_valor(saida) if saida else ''
+                ]
+                for data, categoria, historico, entrada, saida in zip(
+                    lote['data'], lote['categoria'], lote['historico'], lote['entrada'], lote['saida']
+                )
+            ]
+            tabela = Table([cabecalho] + linhas, colWidths=[48, 90, 193, 60, 60], repeatRows=1)
+            tabela.setStyle(estilo_tabela)
+            elementos.append(tabela)
+            total += len(linhas)
+        
+        if total == 0:
+            return []
+        
+        return [
+            Paragraph("Anexo: Lançamentos do Período", self.styles['Subtitulo']),
+            Paragraph(f"{total:,} lançamentos, em ordem de data.", self.styles['TextoCentralizado']),
+            Spacer(1, 10)
+        ] + elementos
+    
     def gerar_consideracoes_finais(self):
         """Gera as considerações finais do relatório"""
         elementos = []
@@ -676,9 +781,16 @@ class FinancialReportGenerator:
         
         # Análise temporal e considerações
         elementos.extend(self.gerar_analise_temporal())
+        elementos.extend(self.gerar_estatisticas_mensais())
         consideracoes = self.gerar_consideracoes_finais()
         elementos.extend(consideracoes)
         
+        # Anexo opcional com os lançamentos
+        anexo = self.gerar_anexo_lancamentos()
+        if anexo:
+            elementos.append(PageBreak())
+            elementos.extend(anexo)
+        
         # Gera o PDF com o callback especial que previne páginas em branco
         class AvoidBlankPages:
             def __init__(self):
@@ -702,7 +814,7 @@ class FinancialReportGenerator:
             return output_file
 
 
-def gerar_relatorio_financeiro(dados_metricas, periodo_inicio, periodo_fim, nome_arquivo=None):
+def gerar_relatorio_financeiro(dados_metricas, periodo_inicio, periodo_fim, nome_arquivo=None, dados_adicionais=None):
     """
     Função de interface para gerar o relatório financeiro.
     
@@ -711,6 +823,7 @@ def gerar_relatorio_financeiro(dados_metricas, periodo_inicio, periodo_fim, nome
         periodo_inicio (date): Data de início do período analisado
         periodo_fim (date): Data de fim do período analisado
         nome_arquivo (str, optional): Nome do arquivo a ser gerado
+        dados_adicionais (dict, optional): Dados adicionais (ex.: lotes_lancamentos para o anexo)
     
     Returns:
         str: Caminho do arquivo ou base64 para download
@@ -726,7 +839,7 @@ def gerar_relatorio_financeiro(dados_metricas, periodo_inicio, periodo_fim, nome
         output_file = os.path.join(relatorios_dir, nome_arquivo)
     
     # Cria o gerador de relatórios
-    gerador = FinancialReportGenerator(dados_metricas, periodo_inicio, periodo_fim)
+    gerador = FinancialReportGenerator(dados_metricas, periodo_inicio, periodo_fim, dados_adicionais)
     
     # Gera o relatório
     return gerador.gerar_pdf(output_file)
@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+
+from sqlalchemy import text
+
+from database import engine_leitura
+
+# Idade máxima (s) do último resultado antes de uma nova sondagem em segundo plano
+TTL_SAUDE = float(os.getenv('DB_SAUDE_TTL', '30'))
+
+# Falhas consecutivas que abrem o circuito
+LIMITE_FALHAS = int(os.getenv('DB_SAUDE_LIMITE_FALHAS', '3'))
+
+# Intervalo (s) entre as sondagens enquanto o circuito está aberto
+TEMPO_RECUPERACAO = float(os.getenv('DB_SAUDE_RECUPERACAO', '30'))
+
+# Espera máxima (s) pela primeira sondagem do processo
+ESPERA_PRIMEIRA_SONDAGEM = 1.0
+
+# Estados do disjuntor
+CIRCUITO_FECHADO = 'fechado'
+CIRCUITO_ABERTO = 'aberto'
+CIRCUITO_MEIO_ABERTO = 'meio_aberto'
+
+
+def sondar_banco():
+    """Sondagem simples da conexão de leitura (lança exceção em caso de falha)"""
+    with engine_leitura.connect() as conn:
+        conn.execute(text("SELECT 1")).scalar()
+
+
+class VerificadorSaude:
+    """
+    Estado de saúde do banco, com cache e disjuntor (circuit breaker).
+
+    As páginas consultam apenas o último resultado conhecido: quando ele fica mais
+    velho que o TTL, uma nova sondagem é disparada em segundo plano, e a renderização
+    não espera por ela. Após LIMITE_FALHAS falhas consecutivas o circuito abre: o
+    banco é dado como indisponível sem novas tentativas até o tempo de recuperação,
+    quando uma única sondagem (meio aberto) decide se o circuito fecha novamente.
+    """
+    def __init__(self, sondar, ttl=TTL_SAUDE, limite_falhas=LIMITE_FALHAS, tempo_recuperacao=TEMPO_RECUPERACAO):
+        self._sondar = sondar
+        self.ttl = ttl
+        self.limite_falhas = limite_falhas
+        self.tempo_recuperacao = tempo_recuperacao
+
+        self._lock = threading.Lock()
+        self._primeira_sondagem = threading.Event()
+        self._sondando = False
+        self._disponivel = None
+        self._verificado_em = None
+        self._duracao = None
+        self._erro = None
+        self._falhas = 0
+        self._circuito = CIRCUITO_FECHADO
+        self._aberto_em = None
+
+    def _registrar(self, sucesso, erro=None, duracao=None):
+        """Atualiza o estado com o resultado de uma sondagem"""
+        with self._lock:
+            self._disponivel = sucesso
+            self._verificado_em = time.time()
+            self._duracao = duracao
+            if sucesso:
+                self._erro = None
+                self._falhas = 0
+                self._circuito = CIRCUITO_FECHADO
+                self._aberto_em = None
+            else:
+                self._erro = str(erro)
+                self._falhas += 1
+                if self._circuito == CIRCUITO_MEIO_ABERTO or self._falhas >= self.limite_falhas:
+                    self._circuito = CIRCUITO_ABERTO
+                    self._aberto_em = self._verificado_em
+
+    def _executar_sondagem(self):
+        inicio = time.perf_counter()
+        try:
+            self._sondar()
+            self._registrar(True, duracao=time.perf_counter() - inicio)
+        except Exception as e:
+            self._registrar(False, e, duracao=time.perf_counter() - inicio)
+        finally:
+            with self._lock:
+                self._sondando = False
+            self._primeira_sondagem.set()
+
+    def _precisa_sondar(self, agora):
+        """Decide se uma nova sondagem deve ser disparada (chamado com o lock adquirido)"""
+        if self._sondando:
+            return False
+        if self._circuito == CIRCUITO_ABERTO:
+            if agora - self._aberto_em < self.tempo_recuperacao:
+                return False
+            self._circuito = CIRCUITO_MEIO_ABERTO
+            return True
+        # Após uma falha, sonda de novo no próximo acesso, até o circuito abrir
+        return (self._verificado_em is None or self._disponivel is False
+                or agora - self._verificado_em >= self.ttl)
+
+    def verificar(self):
+        """Dispara uma sondagem em segundo plano, se o resultado em cache estiver vencido"""
+        with self._lock:
+            if not self._precisa_sondar(time.time()):
+                return
+            self._sondando = True
+        threading.Thread(target=self._executar_sondagem, name='saude-banco', daemon=True).start()
+
+    def disponivel(self):
+        """
+        Último estado conhecido do banco, sem esperar por novas sondagens.
+
+        Apenas a primeira chamada do processo aguarda (no máximo
+        ESPERA_PRIMEIRA_SONDAGEM) pelo resultado inicial; sem resposta nesse
+        prazo, o banco é considerado disponível até a sondagem terminar.
+        """
+        self.verificar()
+        if not self._primeira_sondagem.is_set():
+            self._primeira_sondagem.wait(ESPERA_PRIMEIRA_SONDAGEM)
+        with self._lock:
+            if self._circuito == CIRCUITO_ABERTO:
+                return False
+            return self._disponivel is not False
+
+    def estado(self):
+        """Resumo do estado para a página de diagnóstico"""
+        with self._lock:
+            return {
+                'disponivel': self._disponivel,
+                'circuito': self._circuito,
+                'falhas_consecutivas': self._falhas,
+                'verificado_em': self._verificado_em,
+                'duracao': self._duracao,
+                'erro': self._erro
+            }
+
+
+# Verificador único do processo
+saude_banco = VerificadorSaude(sondar_banco)
@@ -0,0 +1,350 @@
+"""
+Snapshot do histórico contábil em Parquet, particionado por ano/mês.
+
+Uso (a partir da pasta projeto):
+    python src/snapshot_parquet.py            # atualiza apenas as partições alteradas
+    python src/snapshot_parquet.py --completo # reescreve todas as partições
+"""
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+import time
+from datetime import date
+
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import BigInteger, Date, Float, Integer, String, cast, extract, func, select
+from sqlalchemy.dialects.postgresql import BIT
+
+from database import data_dir, sessao
+from dados_financeiros import (
+    COLUNAS_DESPESAS, COLUNAS_FATURAS, COLUNAS_MOVIMENTACOES,
+    create_despesas_df, create_faturas_df, create_movimentacoes_df, versao_dados
+)
+from leitura_em_lotes import TAMANHO_LOTE_LEITURA, ler_em_lotes
+from models import Despesa, Fatura, MovimentacaoBancaria, PlanoContas
+
+# O snapshot depende do pyarrow; sem ele o dashboard continua lendo apenas do banco
+PARQUET_DISPONIVEL = importlib.util.find_spec('pyarrow') is not None
+
+# Pasta do snapshot (um subdiretório por tabela e o manifesto)
+PASTA_PARQUET = os.getenv('PARQUET_DIR', os.path.join(data_dir, 'parquet'))
+
+# Arquivo com a versão dos dados e as partições de cada tabela
+ARQUIVO_MANIFESTO = 'manifesto.json'
+
+# Formato dos arquivos e das impressões digitais (snapshots de outro formato são regravados)
+FORMATO_SNAPSHOT = 2
+
+# Tabelas exportadas: nome -> (modelo, coluna de data que define as partições ou None)
+TABELAS_PARQUET = {
+    'movimentacoes': (MovimentacaoBancaria, MovimentacaoBancaria.data),
+    'faturas': (Fatura, Fatura.mes_referencia),
+    'despesas': (Despesa, Despesa.data_despesa),
+    'plano_contas': (PlanoContas, None)
+}
+
+# Chave da partição única das tabelas sem coluna de data
+PARTICAO_UNICA = 'unica'
+
+# Impede duas exportações simultâneas no mesmo processo
+_exportacao_lock = threading.Lock()
+
+
+def _tipo_arrow(coluna):
+    """Tipo Parquet de uma coluna do modelo (textos e enums viram string)"""
+    import pyarrow as pa
+
+    if isinstance(coluna.type, Integer):
+        return pa.int64()
+    if isinstance(coluna.type, Float):
+        return pa.float64()
+    if isinstance(coluna.type, Date):
+        return pa.date32()
+    return pa.string()
+
+def _colunas_exportadas(modelo):
+    """
+    Colunas gravadas no snapshot: todas, exceto a chave primária substituta (id inteiro).
+
+    A importação recria as movimentações e, no PostgreSQL, elas recebem novos ids: com
+    o id fora dos arquivos e das impressões digitais, uma partição com o mesmo conteúdo
+    continua válida. O dashboard não usa os ids.
+    """
+    return [coluna for coluna in modelo.__table__.columns
+            if not (coluna.primary_key and isinstance(coluna.type, Integer))]
+
+def _esquema(modelo):
+    import pyarrow as pa
+
+    return pa.schema([(coluna.name, _tipo_arrow(coluna)) for coluna in _colunas_exportadas(modelo)])
+
+# Bits do hash de cada linha: somas de até 2^22 linhas por partição cabem em um inteiro de 64 bits
+BITS_HASH_LINHA = 40
+
+def _hash_linha_sqlite(*valores):
+    """Hash de uma linha, registrado como função SQL nas conexões SQLite"""
+    digest = hashlib.blake2b(repr(valores).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') >> (64 - BITS_HASH_LINHA)
+
+def _expressao_hash_linha(db, colunas):
+    """
+    Expressão SQL com o hash de cada linha.
+
+    No PostgreSQL, os primeiros bits do md5 do texto da linha (NULL vira \\N); no
+    SQLite, que não tem função de hash, uma função registrada na conexão.
+    """
+    conexao = db.connection()
+    if conexao.dialect.name == 'postgresql':
+        texto = func.concat_ws('|', *(func.coalesce(cast(coluna, String), '\\N') for coluna in colunas))
+        hexadecimal = func.substr(func.md5(texto), 1, BITS_HASH_LINHA // 4)
+        return cast(cast(func.concat('x', hexadecimal), BIT(BITS_HASH_LINHA)), BigInteger)
+
+    conexao.connection.dbapi_connection.create_function(
+        'hash_linha', len(colunas), _hash_linha_sqlite, deterministic=True
+    )
+    return func.hash_linha(*colunas)
+
+def _assinaturas(db, modelo, coluna_data):
+    """
+    Impressão digital do conteúdo de cada partição, calculada no banco.
+
+    Soma os hashes das linhas completas (sem o id) e conta as linhas de cada partição:
+    qualquer alteração de valor ou rótulo, inclusive trocas de valores entre linhas,
+    muda a soma, enquanto a ordem das linhas e os ids atribuídos pela importação não
+    a alteram. Apenas uma linha por partição sai do banco.
+
+    Returns:
+        dict: 'AAAA-MM' (ou PARTICAO_UNICA) -> hash do conteúdo
+    """
+    agregados = [func.count(), func.sum(_expressao_hash_linha(db, _colunas_exportadas(modelo)))]
+
+    if coluna_data is None:
+        linhas = [(PARTICAO_UNICA, *db.execute(select(*agregados)).one())]
+    else:
+        ano, mes = extract('year', coluna_data), extract('month', coluna_data)
+        linhas = [
+            (f"{int(linha[0]):04d}-{int(linha[1]):02d}", *linha[2:])
+            for linha in db.execute(select(ano, mes, *agregados).group_by(ano, mes))
+        ]
+
+    return {
+        particao: hashlib.sha1(repr((int(contagem), int(soma))).encode('utf-8')).hexdigest()[:16]
+        for particao, contagem, soma in linhas
+        if contagem
+    }
+
+def _caminho_particao(tabela, particao, assinatura):
+    """Caminho relativo do arquivo da partição (layout Hive: ano=AAAA/mes=MM)"""
+    if particao == PARTICAO_UNICA:
+        return os.path.join(tabela, f'dados-{assinatura}.parquet')
+    ano, mes = particao.split('-')
+    return os.path.join(tabela, f'ano={ano}', f'mes={mes}', f'dados-{assinatura}.parquet')
+
+def _escrever_particao(db, modelo, coluna_data, particao, destino):
+    """Grava as linhas de uma partição, lidas do banco em lotes, em um arquivo Parquet"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    consulta = select(*_colunas_exportadas(modelo))
+    if particao != PARTICAO_UNICA:
+        inicio = date.fromisoformat(f'{particao}-01')
+        fim = inicio + relativedelta(months=1, days=-1)
+        consulta = consulta.where(coluna_data >= inicio, coluna_data <= fim)
+    consulta = consulta.order_by(*modelo.__table__.primary_key.columns)
+
+    esquema = _esquema(modelo)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    temporario = f'{destino}.tmp'
+    linhas = 0
+    with pq.ParquetWriter(temporario, esquema, compression='zstd') as arquivo:
+        for lote in ler_em_lotes(db, consulta):
+            arquivo.write_table(pa.Table.from_pandas(lote, schema=esquema, preserve_index=False))
+            linhas += len(lote)
+    os.replace(temporario, destino)
+    return linhas
+
+def ler_manifesto(pasta=PASTA_PARQUET):
+    """Manifesto do snapshot, ou None se ainda não houver snapshot"""
+    try:
+        with open(os.path.join(pasta, ARQUIVO_MANIFESTO), encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except FileNotFoundError:
+        return None
+
+def _gravar_manifesto(pasta, manifesto):
+    caminho = os.path.join(pasta, ARQUIVO_MANIFESTO)
+    with open(f'{caminho}.tmp', 'w', encoding='utf-8') as arquivo:
+        json.dump(manifesto, arquivo, ensure_ascii=False, indent=2)
+    os.replace(f'{caminho}.tmp', caminho)
+
+def _remover_arquivos(pasta, caminhos):
+    """Apaga arquivos de partições substituídas e os diretórios que ficarem vazios"""
+    for caminho in caminhos:
+        completo = os.path.join(pasta, caminho)
+        if os.path.exists(completo):
+            os.remove(completo)
+        diretorio = os.path.dirname(completo)
+        while os.path.abspath(diretorio) != os.path.abspath(pasta) and not os.listdir(diretorio):
+            os.rmdir(diretorio)
+            diretorio = os.path.dirname(diretorio)
+
+def _snapshot_em_dia(pasta, manifesto, versao):
+    """Indica se o manifesto corresponde à versão dos dados e todos os seus arquivos existem"""
+    if manifesto.get('formato') != FORMATO_SNAPSHOT:
+        return False
+    if manifesto.get('versao') is None or tuple(manifesto['versao']) != tuple(versao):
+        return False
+    if set(manifesto.get('tabelas', {})) != set(TABELAS_PARQUET):
+        return False
+    return all(
+        os.path.exists(os.path.join(pasta, particao['arquivo']))
+        for particoes in manifesto['tabelas'].values() for particao in particoes.values()
+    )
+
+def exportar_snapshot(pasta=PASTA_PARQUET, completo=False):
+    """
+    Exporta as tabelas para Parquet, reescrevendo apenas as partições alteradas.
+
+    A impressão digital de cada partição (ano/mês) é comparada com a do manifesto:
+    só as partições novas ou alteradas são lidas do banco e regravadas, e as que
+    deixaram de existir são removidas. Cada arquivo tem no nome a impressão digital
+    do conteúdo, e o manifesto (gravado por último) aponta para os arquivos atuais,
+    de modo que quem lê o snapshot durante uma exportação continua vendo a versão
+    anterior completa. Se o manifesto já corresponde à versão atual dos dados, nada
+    é consultado além da versão (use completo=True após alterações feitas fora das
+    importações).
+
+    Args:
+        pasta (str): Pasta do snapshot
+        completo (bool): Reescreve todas as partições, mesmo as inalteradas
+
+    Returns:
+        dict: Tabela -> {'reescritas', 'mantidas', 'removidas', 'linhas'}
+    """
+    if not PARQUET_DISPONIVEL:
+        raise RuntimeError("O snapshot em Parquet requer o pacote pyarrow")
+
+    with _exportacao_lock:
+        anterior = ler_manifesto(pasta) or {}
+        tabelas_anteriores = anterior.get('tabelas', {})
+
+        manifesto = {'formato': FORMATO_SNAPSHOT, 'tabelas': {}}
+        resumo = {}
+        obsoletos = []
+        with sessao(descricao='exportar_snapshot_parquet') as db:
+            versao = versao_dados(db)
+            if not completo and _snapshot_em_dia(pasta, anterior, versao):
+                return {
+                    tabela: {'reescritas': 0, 'mantidas': len(particoes), 'removidas': 0,
+                             'linhas': sum(particao['linhas'] for particao in particoes.values())}
+                    for tabela, particoes in tabelas_anteriores.items()
+                }
+
+            for tabela, (modelo, coluna_data) in TABELAS_PARQUET.items():
+                particoes_anteriores = tabelas_anteriores.get(tabela, {})
+                particoes = {}
+                contagem = {'reescritas': 0, 'mantidas': 0, 'removidas': 0, 'linhas': 0}
+
+                for particao, assinatura in sorted(_assinaturas(db, modelo, coluna_data).items()):
+                    existente = particoes_anteriores.get(particao)
+                    if (not completo and existente and existente['assinatura'] == assinatura
+                            and os.path.exists(os.path.join(pasta, existente['arquivo']))):
+                        particoes[particao] = existente
+                        contagem['mantidas'] += 1
+                    else:
+                        arquivo = _caminho_particao(tabela, particao, assinatura)
+                        linhas = _escrever_particao(db, modelo, coluna_data, particao, os.path.join(pasta, arquivo))
+                        particoes[particao] = {'assinatura': assinatura, 'arquivo': arquivo, 'linhas': linhas}
+                        contagem['reescritas'] += 1
+                        if existente and existente['arquivo'] != arquivo:
+                            obsoletos.append(existente['arquivo'])
+                    contagem['linhas'] += particoes[particao]['linhas']
+
+                for particao, existente in particoes_anteriores.items():
+                    if particao not in particoes:
+                        obsoletos.append(existente['arquivo'])
+                        contagem['removidas'] += 1
+
+                manifesto['tabelas'][tabela] = particoes
+                resumo[tabela] = contagem
+
+            # Sem uma transação de leitura única, uma escrita durante a exportação
+            # mudaria a versão: o snapshot fica sem versão e não é usado pelo dashboard
+            versao_final = versao_dados(db)
+
+        manifesto['versao'] = list(versao) if versao == versao_final else None
+        manifesto['gerado_em'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        _gravar_manifesto(pasta, manifesto)
+        _remover_arquivos(pasta, obsoletos)
+        return resumo
+
+def atualizar_em_segundo_plano(pasta=PASTA_PARQUET):
+    """Atualiza o snapshot em uma thread, se ele já existir (chamado após as importações)"""
+    if not PARQUET_DISPONIVEL or ler_manifesto(pasta) is None:
+        return False
+
+    def executar():
+        try:
+            exportar_snapshot(pasta)
+        except Exception as e:
+            print(f"⚠️ Erro ao atualizar o snapshot em Parquet: {e}")
+
+    threading.Thread(target=executar, name='snapshot-parquet', daemon=True).start()
+    return True
+
+def _lotes_tabela(pasta, particoes, colunas):
+    """Lê os arquivos das partições em lotes de DataFrames, apenas com as colunas pedidas"""
+    import pyarrow.parquet as pq
+
+    for particao in sorted(particoes):
+        arquivo = pq.ParquetFile(os.path.join(pasta, particoes[particao]['arquivo']))
+        for lote in arquivo.iter_batches(batch_size=TAMANHO_LOTE_LEITURA, columns=colunas):
+            yield lote.to_pandas()
+
+def carregar_dataframes_parquet(versao, pasta=PASTA_PARQUET):
+    """
+    Monta os DataFrames do dashboard a partir do snapshot, sem consultar as linhas no banco.
+
+    Só usa o snapshot se ele corresponder exatamente à versão atual dos dados.
+
+    Args:
+        versao (tuple): Versão atual dos dados (ver versao_dados)
+        pasta (str): Pasta do snapshot
+
+    Returns:
+        dict: Mesmo formato de carregar_dataframes, ou None se o snapshot não puder ser usado
+    """
+    if not PARQUET_DISPONIVEL:
+        return None
+    manifesto = ler_manifesto(pasta)
+    if manifesto is None or manifesto.get('versao') is None or tuple(manifesto['versao']) != tuple(versao):
+        return None
+
+    tabelas = manifesto['tabelas']
+    return {
+        'versao': versao,
+        'df_movimentacoes': create_movimentacoes_df(
+            _lotes_tabela(pasta, tabelas.get('movimentacoes', {}), COLUNAS_MOVIMENTACOES)),
+        'df_despesas': create_despesas_df(_lotes_tabela(pasta, tabelas.get('despesas', {}), COLUNAS_DESPESAS)),
+        'df_faturas': create_faturas_df(_lotes_tabela(pasta, tabelas.get('faturas', {}), COLUNAS_FATURAS))
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pasta', default=PASTA_PARQUET, help='Pasta do snapshot')
+    parser.add_argument('--completo', action='store_true', help='Reescreve todas as partições')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    resumo = exportar_snapshot(args.pasta, completo=args.completo)
+    print(f"{'Tabela':<15} {'Linhas':>10} {'Reescritas':>11} {'Mantidas':>9} {'Removidas':>10}")
+    for tabela, contagem in resumo.items():
+        print(f"{tabela:<15} {contagem['linhas']:>10,} {contagem['reescritas']:>11} "
+              f"{contagem['mantidas']:>9} {contagem['removidas']:>10}")
+    print(f"\nSnapshot gravado em {args.pasta} em {time.perf_counter() - inicio:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import threading
+import weakref
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+from dados_financeiros import CONSULTAS_DATAFRAMES, carregar_dataframes
+from database_async import executar_em_paralelo
+from filiais import ParticoesFiliais
+from grafo_metricas import descartar_grafos_versao
+from snapshot_parquet import carregar_dataframes_parquet
+
+# Tabelas de análise mantidas em cada snapshot
+TABELAS = ['df_movimentacoes', 'df_despesas', 'df_faturas']
+
+
+def _arrays_coluna(serie):
+    """Arrays numpy que guardam os valores de uma coluna (categorias: os códigos)"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.cat.codes
+    valores = serie.to_numpy(copy=False)
+    # Sem cópia, o array é uma visão do bloco do DataFrame: a cadeia de bases leva até ele
+    while isinstance(valores, np.ndarray):
+        yield valores
+        valores = valores.base
+
+def _somente_leitura(df):
+    """
+    Marca os arrays das colunas como somente leitura.
+
+    As sessões recebem cópias rasas, que compartilham esses arrays: uma escrita no
+    lugar (df.loc[...] = ..., fillna(inplace=True)) falha em vez de alterar o
+    snapshot de todas as sessões. Criar ou substituir colunas na cópia continua
+    permitido, pois não toca nos arrays compartilhados.
+    """
+    # Na cópia profunda, cada bloco passa a ser dono dos seus dados, e a visão de
+    # cada coluna leva ao array do próprio bloco (e não a um array intermediário)
+    df = df.copy(deep=True)
+    for _, serie in df.items():
+        for array in _arrays_coluna(serie):
+            array.flags.writeable = False
+    return df
+
+
+class SnapshotDados:
+    """
+    DataFrames de análise de uma versão dos dados, compartilhados por todas as sessões.
+
+    O snapshot nunca é modificado: as sessões recebem cópias rasas (sem copiar os
+    dados) de tabelas cujos arrays são somente leitura.
+    """
+    def __init__(self, versao, df_movimentacoes, df_despesas, df_faturas):
+        self.versao = versao
+        self._tabelas = {
+            'df_movimentacoes': _somente_leitura(df_movimentacoes),
+            'df_despesas': _somente_leitura(df_despesas),
+            'df_faturas': _somente_leitura(df_faturas)
+        }
+        self._particoes = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def carregar(cls, db=None):
+        """
+        Carrega as tabelas do banco e monta o snapshot.
+
+        Sem uma sessão, as tabelas são consultadas ao mesmo tempo pela camada assíncrona.
+        """
+        if db is None:
+            dados = executar_em_paralelo({nome: (consulta,) for nome, consulta in CONSULTAS_DATAFRAMES.items()})
+        else:
+            dados = carregar_dataframes(db)
+        return cls(dados['versao'], *(dados[tabela] for tabela in TABELAS))
+
+    @classmethod
+    def carregar_versao(cls, versao):
+        """
+        Monta o snapshot de uma versão, de preferência a partir do snapshot em Parquet.
+
+        Se o Parquet corresponder à versão (e puder ser lido), os lançamentos não
+        são consultados no banco; caso contrário, as tabelas são carregadas do banco.
+        """
+        try:
+            dados = carregar_dataframes_parquet(versao)
+        except Exception as e:
+            print(f"⚠️ Snapshot em Parquet ilegível; carregando do banco: {e}")
+            dados = None
+        if dados is None:
+            return cls.carregar()
+        return cls(dados['versao'], *(dados[tabela] for tabela in TABELAS))
+
+    def dataframes(self):
+        """Cópias rasas das tabelas (compartilham a memória, somente leitura, do snapshot)"""
+        return {nome: df.copy(deep=False) for nome, df in self._tabelas.items()}
+
+    @property
+    def particoes(self):
+        """Partições por filial e índices de somas acumuladas, construídos uma única vez"""
+        with self._lock:
+            if self._particoes is None:
+                self._particoes = ParticoesFiliais(self._tabelas['df_movimentacoes'])
+            return self._particoes
+
+    def memoria(self):
+        """Memória ocupada pelas tabelas do snapshot, em bytes"""
+        return int(sum(df.memory_usage(deep=True).sum() for df in self._tabelas.values()))
+
+
+class ArmazemSnapshots:
+    """
+    Armazém de snapshots do processo, com contagem de referências por versão.
+
+    Cada versão é carregada uma única vez, mesmo com várias sessões pedindo-a ao
+    mesmo tempo. Versões antigas são descartadas quando a última sessão que as usa
+    as libera; a versão mais recente é mantida para as próximas sessões.
+    """
+    def __init__(self):
+        self._snapshots = {}
+        self._referencias = {}
+        self._carregando = {}
+        self._versao_atual = None
+        self._lock = threading.Lock()
+
+    def adquirir(self, versao, carregar):
+        """
+        Retorna o snapshot da versão e incrementa sua contagem de referências.
+
+        Args:
+            versao (tuple): Versão dos dados (ver versao_dados)
+            carregar (callable): Função sem argumentos que monta o SnapshotDados
+
+        Returns:
+            SnapshotDados: Snapshot compartilhado
+        """
+        with self._lock:
+            snapshot = self._snapshots.get(versao)
+            futuro = None if snapshot else self._carregando.get(versao)
+            carregador = snapshot is None and futuro is None
+            if carregador:
+                # Esta sessão carrega a versão; as que chegarem até o fim da carga aguardam o futuro
+                futuro = self._carregando[versao] = Future()
+
+        if carregador:
+            try:
+                snapshot = carregar()
+            except BaseException as e:
+                with self._lock:
+                    self._carregando.pop(versao, None)
+                futuro.set_exception(e)
+                raise
+        elif snapshot is None:
+            snapshot = futuro.result()
+
+        with self._lock:
+            # A versão entra no armazém e o futuro sai dele na mesma seção crítica:
+            # quem chegar depois já encontra o snapshot
+            snapshot = self._snapshots.setdefault(versao, snapshot)
+            if carregador:
+                self._carregando.pop(versao, None)
+            self._referencias[versao] = self._referencias.get(versao, 0) + 1
+            anterior, self._versao_atual = self._versao_atual, versao
+            if anterior is not None and anterior != versao:
+                self._descartar_sem_referencias()
+
+        if carregador:
+            futuro.set_result(snapshot)
+        return snapshot
+
+    def liberar(self, versao):
+        """Decrementa a contagem de referências, descartando versões antigas sem uso"""
+        with self._lock:
+            if versao in self._referencias:
+                self._referencias[versao] = max(0, self._referencias[versao] - 1)
+            self._descartar_sem_referencias()
+
+    def _descartar_sem_referencias(self):
+        """Remove as versões antigas que nenhuma sessão usa (chamado com o lock adquirido)"""
+        for versao in list(self._snapshots):
+            if versao != self._versao_atual and self._referencias.get(versao, 0) == 0:
+                del self._snapshots[versao]
+                self._referencias.pop(versao, None)
+                descartar_grafos_versao(versao)
+
+    def estatisticas(self):
+        """Versões em memória, referências de cada uma e memória total ocupada"""
+        with self._lock:
+            snapshots = dict(self._snapshots)
+            referencias = dict(self._referencias)
+        return {
+            'versoes': len(snapshots),
+            'referencias': sum(referencias.values()),
+            'memoria': sum(snapshot.memoria() for snapshot in snapshots.values())
+        }
+
+
+class ReferenciaSnapshot:
+    """
+    Referência de uma sessão a um snapshot.
+
+    É liberada explicitamente quando a sessão passa para outra versão, ou
+    automaticamente quando o estado da sessão é descartado.
+    """
+    def __init__(self, armazem_snapshots, versao, carregar):
+        self.snapshot = armazem_snapshots.adquirir(versao, carregar)
+        self.versao = versao
+        self._finalizador = weakref.finalize(self, armazem_snapshots.liberar, versao)
+
+    def liberar(self):
+        """Libera a referência (apenas uma vez)"""
+        self._finalizador()
+
+
+# Armazém único do processo
+armazem = ArmazemSnapshots()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos da aplicação ficam em src e são importados pelo nome, como nas páginas
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
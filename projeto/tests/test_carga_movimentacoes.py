@@ -0,0 +1,84 @@
+import csv
+import io
+from datetime import date
+from unittest import mock
+
+import pandas as pd
+
+from carga_movimentacoes import COLUNAS_CARGA, NULO_COPY, TABELA_CARGA, _copiar_postgresql, _FluxoCsv, preparar_carga
+
+
+def _carga(linhas):
+    """Carga com uma movimentação por linha; campos não informados ficam ausentes"""
+    return preparar_carga(pd.DataFrame([
+        {'filial': '1', 'data': date(2024, 1, 1) + pd.Timedelta(days=i % 28), 'historico': f'Lançamento {i}',
+         'entrada': float(i), 'saida': None, 'entidade': '' if i % 2 else 'Cliente; "A"'}
+        for i in range(linhas)
+    ]))
+
+
+def _ler_em_blocos(fluxo, tamanho):
+    blocos = []
+    while True:
+        bloco = fluxo.read(tamanho)
+        if not bloco:
+            return ''.join(blocos)
+        assert len(bloco) <= tamanho
+        blocos.append(bloco)
+
+
+def test_fluxo_gera_o_csv_de_todos_os_lotes():
+    carga = _carga(25)
+    esperado = carga.to_csv(index=False, header=False, na_rep=NULO_COPY)
+
+    # Lotes menores que a carga e blocos de tamanhos que não coincidem com as linhas
+    for tamanho in (1, 7, 8192):
+        assert _ler_em_blocos(_FluxoCsv(carga, tamanho_lote=4), tamanho) == esperado
+    assert _FluxoCsv(carga, tamanho_lote=4).read() == esperado
+
+
+def test_fluxo_representa_nulos_e_textos_vazios():
+    texto = _FluxoCsv(_carga(2), tamanho_lote=1).read()
+    linhas = list(csv.reader(io.StringIO(texto)))
+
+    assert len(linhas) == 2
+    assert all(len(linha) == len(COLUNAS_CARGA) for linha in linhas)
+    primeira, segunda = (dict(zip(COLUNAS_CARGA, linha)) for linha in linhas)
+    # Valores ausentes viram NULL; textos vazios continuam sendo texto vazio
+    assert primeira['saida'] == NULO_COPY
+    assert primeira['banco'] == NULO_COPY
+    assert primeira['entidade'] == 'Cliente; "A"'
+    assert segunda['entidade'] == ''
+    assert segunda['data'] == '2024-01-02'
+    assert segunda['entrada'] == '1.0'
+
+
+def test_fluxo_de_carga_vazia():
+    assert _FluxoCsv(_carga(0)).read(8192) == ''
+
+
+def test_copia_postgresql_envia_o_csv_e_troca_as_movimentacoes():
+    carga = _carga(30)
+    recebido = []
+
+    def copy_expert(sql, arquivo):
+        # Como o psycopg2, lê o arquivo em blocos de 8 KiB
+        recebido.append((sql, _ler_em_blocos(arquivo, 8192)))
+
+    db = mock.MagicMock()
+    conexao = db.connection.return_value
+    cursor = conexao.connection.dbapi_connection.cursor.return_value
+    cursor.copy_expert.side_effect = copy_expert
+
+    _copiar_postgresql(db, carga)
+
+    (sql_copy, csv_enviado), = recebido
+    assert sql_copy.startswith(f"COPY {TABELA_CARGA} ({', '.join(COLUNAS_CARGA)}) FROM STDIN")
+    assert f"NULL '{NULO_COPY}'" in sql_copy
+    assert csv_enviado == carga.to_csv(index=False, header=False, na_rep=NULO_COPY)
+    cursor.close.assert_called_once()
+
+    comandos = [chamada.args[0] for chamada in conexao.exec_driver_sql.call_args_list]
+    assert comandos[0].startswith(f"CREATE TEMP TABLE {TABELA_CARGA} ON COMMIT DROP")
+    assert comandos[1] == "DELETE FROM movimentacoes"
+    assert comandos[2].startswith("INSERT INTO movimentacoes") and comandos[2].endswith(f"FROM {TABELA_CARGA}")
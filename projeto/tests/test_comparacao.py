@@ -0,0 +1,44 @@
+from datetime import date
+
+import pandas as pd
+
+from comparacao import comparar_mensal
+
+
+def _diario(inicio, fim):
+    """Um lançamento de valor 1 por dia"""
+    return pd.DataFrame({'data': pd.date_range(inicio, fim), 'valor': 1.0})
+
+
+def test_janelas_com_mesma_quantidade_de_meses():
+    df = _diario('2023-01-01', '2024-03-31')
+    resultado = comparar_mensal(df, 'data', ['valor'],
+                                (date(2024, 1, 1), date(2024, 3, 31)), (date(2023, 1, 1), date(2023, 3, 31)))
+
+    assert list(resultado['mes_ano']) == ['Janeiro/2024', 'Fevereiro/2024', 'Março/2024']
+    assert list(resultado['mes_ano_anterior']) == ['Janeiro/2023', 'Fevereiro/2023', 'Março/2023']
+    assert list(resultado['valor_atual']) == [31.0, 29.0, 31.0]
+    assert list(resultado['valor_anterior']) == [31.0, 28.0, 31.0]
+
+
+def test_janela_de_comparacao_com_mais_meses_que_a_atual():
+    # Período anterior de março/2024: 30/01 a 29/02, que cobre dois meses
+    df = _diario('2024-01-01', '2024-03-31')
+    resultado = comparar_mensal(df, 'data', ['valor'],
+                                (date(2024, 3, 1), date(2024, 3, 31)), (date(2024, 1, 30), date(2024, 2, 29)))
+
+    assert resultado['valor_atual'].sum() == 31.0
+    assert resultado['valor_anterior'].sum() == 31.0
+    assert list(resultado['mes_ano_anterior']) == ['Janeiro/2024', 'Fevereiro/2024']
+    assert list(resultado['valor_anterior']) == [2.0, 29.0]
+    assert list(resultado['mes_ano']) == ['Março/2024', '2º mês']
+
+
+def test_janela_atual_com_mais_meses_que_a_de_comparacao():
+    df = _diario('2024-01-01', '2024-03-31')
+    resultado = comparar_mensal(df, 'data', ['valor'],
+                                (date(2024, 2, 15), date(2024, 3, 15)), (date(2024, 1, 15), date(2024, 1, 31)))
+
+    assert list(resultado['valor_atual']) == [15.0, 15.0]
+    assert list(resultado['valor_anterior']) == [17.0, 0.0]
+    assert list(resultado['mes_ano_anterior']) == ['Janeiro/2024', '2º mês']